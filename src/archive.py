@@ -0,0 +1,241 @@
+import datetime
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set
+
+from src.config import DEFAULT_ARCHIVE_SEGMENT_PERIOD
+from src.hash import Hash
+from src.index import index_path, load_index
+from src.interpreter import items_to_markdown, iter_items
+from src.io import (
+    COMPRESSION_SUFFIXES,
+    append_to_archive,
+    compress_file,
+    write_text_file_atomically,
+)
+from src.types import JsonDict, MarkdownStr, Tag, Task
+
+MANIFEST_NAME = "manifest.json"
+SEGMENT_SUFFIX = ".md"
+# Name of the segment of tasks migrated from a single-file archive, which do not
+# record when they were archived
+MIGRATED_SEGMENT_NAME = "migrated"
+
+# Segment names, by segment period
+SEGMENT_NAME_FORMATS = {
+    "year": "%Y",
+    "month": "%Y-%m",
+    "day": "%Y-%m-%d",
+}
+
+
+def serialize_tag(tag: Tag) -> str:
+    return f"{tag.type}:{tag.value}"
+
+
+def deserialize_tag(raw_tag: str) -> Tag:
+    tag_type, _, value = raw_tag.partition(":")
+    return Tag(type=tag_type, value=value)
+
+
+@dataclass
+class SegmentSummary:
+    """What a segment contains, to skip it without reading it."""
+
+    name: str
+    task_count: int = 0
+    tags: Set[Tag] = field(default_factory=set)
+    min_hash: Optional[Hash] = None
+    max_hash: Optional[Hash] = None
+    # Compression of the segment file, see `COMPRESSION_SUFFIXES`
+    compression: Optional[str] = None
+
+    def add_tasks(self, tasks: Iterable[Task]) -> None:
+        for task in tasks:
+            self.task_count += 1
+            self.tags.update(task.tags)
+            if task.hash:
+                if self.min_hash is None or task.hash < self.min_hash:
+                    self.min_hash = task.hash
+                if self.max_hash is None or task.hash > self.max_hash:
+                    self.max_hash = task.hash
+
+    def may_contain_hash(self, hash: Hash) -> bool:
+        if self.min_hash is None or self.max_hash is None:
+            return False
+        return self.min_hash <= hash <= self.max_hash
+
+    def may_contain_tags(self, tags: Iterable[Tag]) -> bool:
+        return self.tags.issuperset(tags)
+
+    def to_json(self) -> JsonDict:
+        return dict(
+            name=self.name,
+            task_count=self.task_count,
+            tags=sorted(serialize_tag(tag) for tag in self.tags),
+            min_hash=self.min_hash,
+            max_hash=self.max_hash,
+            compression=self.compression,
+        )
+
+    @classmethod
+    def from_json(cls, data: JsonDict) -> "SegmentSummary":
+        return cls(
+            name=data["name"],
+            task_count=data["task_count"],
+            tags=set(deserialize_tag(raw_tag) for raw_tag in data["tags"]),
+            min_hash=data["min_hash"],
+            max_hash=data["max_hash"],
+            compression=data.get("compression"),
+        )
+
+
+class SegmentedArchive:
+    """Archive split in segment files, one per period (e.g.: month) of archiving.
+
+    A manifest in the archive directory summarizes every segment, so that commands
+    can skip the segments that cannot contain what they look for.
+    """
+
+    def __init__(
+        self, directory: Path, segment_period: str = DEFAULT_ARCHIVE_SEGMENT_PERIOD
+    ) -> None:
+        if segment_period not in SEGMENT_NAME_FORMATS:
+            raise ValueError(
+                f"Unsupported archive segment period {segment_period!r}, expected one"
+                f" of {sorted(SEGMENT_NAME_FORMATS)}"
+            )
+
+        self.directory = directory
+        self.segment_period = segment_period
+        self.segments: List[SegmentSummary] = self._load_manifest()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_NAME
+
+    def _load_manifest(self) -> List[SegmentSummary]:
+        if not self.manifest_path.exists():
+            return []
+
+        content = json.loads(self.manifest_path.read_text())
+        return [SegmentSummary.from_json(segment) for segment in content["segments"]]
+
+    def save_manifest(self) -> None:
+        content = dict(segments=[segment.to_json() for segment in self.segments])
+        write_text_file_atomically(
+            path=self.manifest_path, content=json.dumps(content, indent=2)
+        )
+
+    def segment_name(self, date: datetime.date) -> str:
+        return date.strftime(SEGMENT_NAME_FORMATS[self.segment_period])
+
+    def _find_segment(self, name: str) -> Optional[SegmentSummary]:
+        for segment in self.segments:
+            if segment.name == name:
+                return segment
+        return None
+
+    def segment_path(self, name: str) -> Path:
+        path = self.directory / f"{name}{SEGMENT_SUFFIX}"
+        segment = self._find_segment(name)
+        if segment is None or segment.compression is None:
+            return path
+        return path.with_name(f"{path.name}{COMPRESSION_SUFFIXES[segment.compression]}")
+
+    def _get_or_add_segment(self, name: str) -> SegmentSummary:
+        if (segment := self._find_segment(name)) is not None:
+            return segment
+
+        segment = SegmentSummary(name=name)
+        self.segments.append(segment)
+        return segment
+
+    def append(
+        self,
+        *,
+        tasks: List[Task],
+        content: MarkdownStr,
+        segment_name: Optional[str] = None,
+    ) -> Path:
+        """Append archived tasks to their segment, by default the current one.
+
+        `content` is how `tasks` are serialized in the segment.
+        """
+        if segment_name is None:
+            segment_name = self.segment_name(datetime.date.today())
+
+        segment = self._find_segment(segment_name)
+        if segment is not None and segment.compression is not None:
+            raise ValueError(f"Segment {segment_name!r} is compressed, cannot append")
+
+        path = self.segment_path(segment_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        append_to_archive(path=path, content=content)
+        load_index(document_path=path)  # index the tasks just appended
+
+        self._get_or_add_segment(segment_name).add_tasks(tasks)
+        self.save_manifest()
+        return path
+
+    def iter_segment_paths(
+        self,
+        *,
+        hash: Optional[Hash] = None,
+        tags: Optional[List[Tag]] = None,
+    ) -> Iterator[Path]:
+        """Yield paths of segments that may contain tasks with `hash` and `tags`."""
+        for segment in self.segments:
+            if hash is not None and not segment.may_contain_hash(hash):
+                continue
+            if tags and not segment.may_contain_tags(tags):
+                continue
+            yield self.segment_path(segment.name)
+
+    @property
+    def tags(self) -> Set[Tag]:
+        return set().union(*(segment.tags for segment in self.segments))
+
+    def compress_closed_segments(self, compression: str) -> List[Path]:
+        """Compress segments of past periods, return the paths of compressed segments.
+
+        Tasks are no longer appended to them, so they are read far less often than the
+        current segment. Compressed segments are read streaming their decompression,
+        and they are not indexed, as index records point to uncompressed offsets.
+        """
+        current_segment_name = self.segment_name(datetime.date.today())
+        compressed_paths: List[Path] = []
+        for segment in self.segments:
+            if segment.compression is not None or segment.name == current_segment_name:
+                continue
+
+            path = self.segment_path(segment.name)
+            compressed_paths.append(compress_file(path, compression=compression))
+            index_path(path).unlink(missing_ok=True)
+            segment.compression = compression
+            self.save_manifest()  # keep the manifest in sync with segment files
+
+        return compressed_paths
+
+
+def migrate_archive(*, archive_path: Path, archive: SegmentedArchive) -> int:
+    """Move tasks in a single-file archive into a segment, return the tasks amount.
+
+    Archived tasks do not record when they were archived, so they are all moved into
+    the same segment. The single-file archive is left untouched.
+    """
+    if any(segment.name == MIGRATED_SEGMENT_NAME for segment in archive.segments):
+        raise ValueError(f"{archive_path} was already migrated to {archive.directory}")
+
+    items = iter_items(path=archive_path)
+    tasks = [item for item in items if isinstance(item, Task)]
+    archive.append(
+        tasks=tasks,
+        content=items_to_markdown(tasks),
+        segment_name=MIGRATED_SEGMENT_NAME,
+    )
+    # Migrated tasks are the oldest ones
+    archive.segments.insert(0, archive.segments.pop())
+    archive.save_manifest()
+    return len(tasks)
@@ -0,0 +1,432 @@
+import hashlib
+import logging
+import os
+import pickle
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Generic, Iterable, List, Optional, TypeVar
+
+from src.interpreter import (
+    DocumentChunk,
+    Lexer,
+    ParsingVersion,
+    Token,
+    TokenizedLine,
+    analyse_lexically,
+    is_bigger_than,
+    iter_items,
+    parse_chunks_in_parallel,
+    parse_document,
+    parsing_version,
+    split_document,
+    tokenize_line,
+)
+from src.io import read_markdown_file, write_bytes_atomically
+from src.types import Item, MarkdownStr
+from src.validation import ValidationReport
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path("~/.cache/wip-manager").expanduser()
+DEFAULT_PARSE_CACHE_PATH = DEFAULT_CACHE_DIR / "parse.pickle"
+
+MAX_CACHED_LINES = 50_000
+MAX_CACHED_CHUNKS = 10_000
+
+Digest = bytes
+Value = TypeVar("Value")
+
+
+def digest(text: str) -> Digest:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class LruCache(Generic[Value]):
+    """Mapping that evicts the least recently used entries when it grows too big."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.entries: OrderedDict[Digest, Value] = OrderedDict()
+
+    def get(self, key: Digest) -> Optional[Value]:
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: Digest, value: Value) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class ParseCache:
+    """Persistent cache of tokenized lines and lexically analysed document chunks.
+
+    Lines are keyed by the digest of their content, and so are chunks: documents are
+    split at every safe boundary (see `split_document`), so editing a line only
+    requires to re-tokenize that line and to re-analyse the chunk that contains it.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_lines: int = MAX_CACHED_LINES,
+        max_chunks: int = MAX_CACHED_CHUNKS,
+    ) -> None:
+        self.path = path
+        self.lines: LruCache[List[Token]] = LruCache(max_size=max_lines)
+        self.chunks: LruCache[List[Item]] = LruCache(max_size=max_chunks)
+
+    @classmethod
+    def load(
+        cls,
+        path: Path = DEFAULT_PARSE_CACHE_PATH,
+        max_lines: int = MAX_CACHED_LINES,
+        max_chunks: int = MAX_CACHED_CHUNKS,
+    ) -> "ParseCache":
+        """Load cache from disk, start with an empty one if it is missing or stale."""
+        cache = cls(path=path, max_lines=max_lines, max_chunks=max_chunks)
+        if not path.exists():
+            return cache
+
+        try:
+            with path.open("rb") as f:
+                version, lines, chunks = pickle.load(f)
+        except Exception:
+            logger.info(f"Ignoring unreadable parse cache at {path}")
+            return cache
+
+        if version != parsing_version():
+            logger.info(f"Ignoring parse cache created by interpreter v{version}")
+            return cache
+
+        for key, tokens in lines.items():
+            cache.lines.set(key, tokens)
+        for key, items in chunks.items():
+            cache.chunks.set(key, items)
+
+        return cache
+
+    def save(self) -> None:
+        content = pickle.dumps(
+            (parsing_version(), self.lines.entries, self.chunks.entries),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        write_bytes_atomically(path=self.path, content=content)
+
+    def tokenize_line(self, line: str, lexer: Optional[Lexer] = None) -> List[Token]:
+        key = digest(line)
+        tokens = self.lines.get(key)
+        if tokens is None:
+            tokens = tokenize_line(line, lexer=lexer)
+            self.lines.set(key, tokens)
+        return tokens
+
+
+def _analyse_chunk(
+    chunk: DocumentChunk, cache: ParseCache, lexer: Optional[Lexer]
+) -> List[Item]:
+    lines = chunk.text.split("\n")
+    tokenized_lines = (
+        TokenizedLine(
+            line_number=line_number,
+            tokens=cache.tokenize_line(line, lexer=lexer),
+            text=line,
+        )
+        for line_number, line in enumerate(lines, start=chunk.first_line_number)
+    )
+    return analyse_lexically(tokenized_lines)
+
+
+def parse_document_incrementally(
+    raw: MarkdownStr,
+    cache: ParseCache,
+    lexer: Optional[Lexer] = None,
+    parallel_threshold: Optional[int] = None,
+) -> List[Item]:
+    """Parse document reusing the results cached from previous parsings.
+
+    Only chunks that changed since they were cached are analysed again, and only
+    lines that were never seen before are tokenized. If changed chunks are bigger
+    than `parallel_threshold` bytes in total (e.g.: the cache is cold), they are
+    parsed in parallel instead.
+    """
+    chunks = list(split_document(raw, chunk_size=1))
+    keys = [digest(chunk.text) for chunk in chunks]
+    # Look up all chunks first, so that chunks cached below cannot evict them
+    items_by_key: Dict[Digest, List[Item]] = {}
+    changed_chunks: Dict[Digest, DocumentChunk] = {}
+    for key, chunk in zip(keys, chunks):
+        if key in items_by_key or key in changed_chunks:
+            continue
+        if (chunk_items := cache.chunks.get(key)) is not None:
+            items_by_key[key] = chunk_items
+        else:
+            changed_chunks[key] = chunk
+
+    changed_text = "".join(chunk.text for chunk in changed_chunks.values())
+    if is_bigger_than(changed_text, parallel_threshold):
+        parsed_chunks = parse_chunks_in_parallel(
+            list(changed_chunks.values()), lexer=lexer
+        )
+    else:
+        parsed_chunks = [
+            _analyse_chunk(chunk, cache, lexer) for chunk in changed_chunks.values()
+        ]
+
+    for key, chunk_items in zip(changed_chunks, parsed_chunks):
+        items_by_key[key] = chunk_items
+        cache.chunks.set(key, chunk_items)
+
+    return [item for key in keys for item in items_by_key[key]]
+
+
+def parse_document_with_cache(
+    raw: MarkdownStr,
+    cache: Optional[ParseCache] = None,
+    parallel_threshold: Optional[int] = None,
+) -> List[Item]:
+    """Parse document incrementally if a cache is provided, from scratch otherwise.
+
+    Either way, the document, or the part of it that changed, is parsed in parallel
+    if it is bigger than `parallel_threshold` bytes.
+    """
+    if cache is None:
+        return parse_document(raw, parallel_threshold=parallel_threshold)
+
+    items = parse_document_incrementally(
+        raw, cache=cache, parallel_threshold=parallel_threshold
+    )
+    cache.save()
+    return items
+
+
+DEFAULT_SNAPSHOTS_DIR = DEFAULT_CACHE_DIR / "snapshots"
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    interpreter_version: ParsingVersion
+    path: str
+    size: int
+    mtime_ns: int
+    digest: Digest
+
+    @classmethod
+    def of(
+        cls, *, path: Path, content: MarkdownStr, stat: Optional[os.stat_result] = None
+    ) -> "FileFingerprint":
+        """Fingerprint file. Pass `stat` if taken before reading `content`."""
+        if stat is None:
+            stat = path.stat()
+
+        return cls(
+            interpreter_version=parsing_version(),
+            path=str(path),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            digest=digest(content),
+        )
+
+    def matches_stat(self, stat: os.stat_result) -> bool:
+        return (self.size, self.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+
+def path_key(path: Path) -> Digest:
+    return digest(str(path.resolve()))
+
+
+class SnapshotCache:
+    """Parsed items of whole files, stored in a binary format to skip parsing.
+
+    A snapshot is fresh while the file size and modification time do not change. If
+    they change but the content does not (e.g.: the file was touched), the snapshot is
+    still reused.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_SNAPSHOTS_DIR, rebuild: bool = False):
+        self.directory = directory
+        self.rebuild = rebuild
+
+    def _snapshot_path(self, path: Path) -> Path:
+        return self.directory / f"{path_key(path).hex()}.pickle"
+
+    def load(self, path: Path) -> Optional[List[Item]]:
+        """Return snapshot items if the snapshot is fresh, None otherwise."""
+        snapshot_path = self._snapshot_path(path)
+        if self.rebuild or not snapshot_path.exists():
+            return None
+
+        stat = path.stat()
+        try:
+            with snapshot_path.open("rb") as f:
+                # The header is stored as a separate pickle, so that stale snapshots
+                # are discarded without loading their items
+                header: FileFingerprint = pickle.load(f)
+                if header.interpreter_version != parsing_version():
+                    return None
+
+                if header.matches_stat(stat):
+                    return pickle.load(f)
+
+                content = read_markdown_file(path=path)
+                if digest(content) != header.digest:
+                    return None
+
+                items = pickle.load(f)
+        except Exception:
+            logger.info(f"Ignoring unreadable snapshot at {snapshot_path}")
+            return None
+
+        # Content did not change, refresh the snapshot to skip hashing next time
+        self.store(path=path, content=content, stat=stat, items=items)
+        return items
+
+    def store(
+        self,
+        *,
+        path: Path,
+        content: MarkdownStr,
+        stat: os.stat_result,
+        items: List[Item],
+    ) -> None:
+        """Store items of file, `stat` must be taken before reading."""
+        header = FileFingerprint.of(path=path, content=content, stat=stat)
+        protocol = pickle.HIGHEST_PROTOCOL
+        snapshot = pickle.dumps(header, protocol) + pickle.dumps(items, protocol)
+        write_bytes_atomically(path=self._snapshot_path(path), content=snapshot)
+
+
+def load_items(
+    path: Path,
+    snapshots: Optional[SnapshotCache] = None,
+    parallel_threshold: Optional[int] = None,
+) -> Iterable[Item]:
+    """Return items in file, using its snapshot if possible.
+
+    Without snapshots the file is streamed, see `iter_items`.
+    """
+    if snapshots is None:
+        return iter_items(path=path, parallel_threshold=parallel_threshold)
+
+    if (items := snapshots.load(path=path)) is not None:
+        return items
+
+    stat = path.stat()
+    content = read_markdown_file(path=path)
+    items = parse_document(content, parallel_threshold=parallel_threshold)
+    snapshots.store(path=path, content=content, stat=stat, items=items)
+    return items
+
+
+DEFAULT_VALIDATIONS_PATH = DEFAULT_CACHE_DIR / "validations.pickle"
+MAX_CACHED_VALIDATIONS = 100
+
+
+@dataclass(frozen=True)
+class CachedValidation:
+    fingerprint: FileFingerprint
+    max_diffs: Optional[int]
+    report: ValidationReport
+
+
+class ValidationCache:
+    """Outcome of the last validation of each file.
+
+    Validating again an unchanged file only costs a `stat` and a lookup. Like
+    snapshots, if only the modification time changes the content digest is compared.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_VALIDATIONS_PATH,
+        max_size: int = MAX_CACHED_VALIDATIONS,
+    ) -> None:
+        self.path = path
+        self.validations: LruCache[CachedValidation] = LruCache(max_size=max_size)
+
+    @classmethod
+    def load(
+        cls,
+        path: Path = DEFAULT_VALIDATIONS_PATH,
+        max_size: int = MAX_CACHED_VALIDATIONS,
+    ) -> "ValidationCache":
+        """Load cache from disk, start with an empty one if it is missing or stale."""
+        cache = cls(path=path, max_size=max_size)
+        if not path.exists():
+            return cache
+
+        try:
+            with path.open("rb") as f:
+                version, validations = pickle.load(f)
+        except Exception:
+            logger.info(f"Ignoring unreadable validation cache at {path}")
+            return cache
+
+        if version != parsing_version():
+            logger.info(f"Ignoring validation cache created by interpreter v{version}")
+            return cache
+
+        for key, validation in validations.items():
+            cache.validations.set(key, validation)
+
+        return cache
+
+    def save(self) -> None:
+        content = pickle.dumps(
+            (parsing_version(), self.validations.entries),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        write_bytes_atomically(path=self.path, content=content)
+
+    def get(
+        self, *, path: Path, max_diffs: Optional[int]
+    ) -> Optional[ValidationReport]:
+        """Return the last validation report of file, None if the file changed."""
+        cached = self.validations.get(path_key(path))
+        if cached is None or cached.max_diffs != max_diffs:
+            return None
+
+        stat = path.stat()
+        if cached.fingerprint.matches_stat(stat):
+            return cached.report
+
+        if cached.fingerprint.size != stat.st_size:
+            return None
+
+        content = read_markdown_file(path=path)
+        if digest(content) != cached.fingerprint.digest:
+            return None
+
+        # Content did not change, refresh the fingerprint to skip hashing next time
+        self.set(
+            path=path,
+            content=content,
+            stat=stat,
+            max_diffs=max_diffs,
+            report=cached.report,
+        )
+        return cached.report
+
+    def set(
+        self,
+        *,
+        path: Path,
+        content: MarkdownStr,
+        stat: os.stat_result,
+        max_diffs: Optional[int],
+        report: ValidationReport,
+    ) -> None:
+        """Remember validation report of file, `stat` must be taken before reading."""
+        fingerprint = FileFingerprint.of(path=path, content=content, stat=stat)
+        validation = CachedValidation(
+            fingerprint=fingerprint, max_diffs=max_diffs, report=report
+        )
+        self.validations.set(path_key(path), validation)
+        self.save()
@@ -1,20 +1,48 @@
+import datetime
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-from src.interpreter import items_to_markdown, parse_document
+from src.archive import SegmentedArchive
+from src.cache import ParseCache, parse_document_with_cache
+from src.index import load_index
+from src.interpreter import items_to_markdown
 from src.io import append_to_archive, read_markdown_file, write_text_file
+from src.store import TaskStore
 from src.types import Item, MarkdownStr, Task
 
 
-def archive_completed_tasks(*, path: Path, archive_path: Path) -> None:
+def archive_completed_tasks(
+    *,
+    path: Path,
+    archive_path: Path,
+    cache: Optional[ParseCache] = None,
+    archive: Optional[SegmentedArchive] = None,
+    compression: Optional[str] = None,
+    store: Optional[TaskStore] = None,
+) -> None:
+    """Move completed tasks to the archive.
+
+    Tasks are archived in `archive` if set, in the file at `archive_path` otherwise.
+    If `compression` is set too, closed segments of `archive` are compressed. Archived
+    tasks are added to `store` too, if set.
+    """
     # TODO: add a function to handle tag creation
     original_content = read_markdown_file(path=path)
-    items = parse_document(original_content)
+    items = parse_document_with_cache(original_content, cache=cache)
     completed_items, remaining_items = separate_completed_items(items)
 
     # Update task archive
     archived_tasks_as_str = serialize_completed_tasks(completed_tasks=completed_items)
-    append_to_archive(path=archive_path, content=archived_tasks_as_str)
+    if archive is None:
+        append_to_archive(path=archive_path, content=archived_tasks_as_str)
+        load_index(document_path=archive_path)  # index the tasks just appended
+    else:
+        if completed_items:
+            archive.append(tasks=completed_items, content=archived_tasks_as_str)
+        if compression is not None:
+            archive.compress_closed_segments(compression=compression)
+    if store is not None:
+        store.add_tasks(completed_items, archived_at=datetime.datetime.now())
 
     # Update WIP file
     updated_content = items_to_markdown(remaining_items)
@@ -1,18 +1,95 @@
+import contextlib
+import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
 import click
 
+from src.archive import SegmentedArchive, migrate_archive
+from src.cache import ParseCache, SnapshotCache, ValidationCache
 from src.cli.clean import archive_completed_tasks
 from src.cli.deadlines import show_tasks_sorted_by_deadline
 from src.cli.filter import GroupName, filter_wip_file
 from src.cli.format import format
+from src.cli.grep import grep
 from src.cli.hash import validate_and_add_hashes_to_tasks
+from src.cli.lookup import lookup_archived_tasks, parse_tag, reindex_archive
+from src.cli.search import load_archive_store, search_archived_tasks
+from src.cli.stats import print_stats
 from src.cli.tags import dump_group_tags, print_tags
+from src.cli.task import mark_task, show_task
 from src.cli.validate import validate_wip_file
-from src.config import get_config
+from src.config import Config, get_config
+from src.hash import Hash
+from src.interpreter import set_hash_width
+from src.io import COMPRESSION_SUFFIXES
+from src.query import parse_query
+from src.store import TaskStore
+
+no_cache_option = click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Run without reading or writing any cache",
+)
+rebuild_cache_option = click.option(
+    "--rebuild-cache",
+    is_flag=True,
+    default=False,
+    help="Parse files ignoring cached snapshots, and cache them again",
+)
+
+
+def _get_snapshots(*, no_cache: bool, rebuild_cache: bool) -> Optional[SnapshotCache]:
+    if no_cache:
+        return None
+    return SnapshotCache(rebuild=rebuild_cache)
+
+
+def _get_archive(config: Config) -> Optional[SegmentedArchive]:
+    if config.archive_dir is None:
+        return None
+    return SegmentedArchive(
+        directory=config.archive_dir, segment_period=config.archive_segment_period
+    )
+
+
+def _get_archive_paths(config: Config) -> Iterable[Path]:
+    """Return paths of the archive file, or of the segments of the archive."""
+    if (archive := _get_archive(config)) is None:
+        return [config.archive_path]
+    return archive.iter_segment_paths()
+
+
+def _get_store(config: Config) -> Optional[TaskStore]:
+    if config.archive_db_path is None:
+        return None
+    return TaskStore(path=config.archive_db_path)
+
+
+def _require_store(config: Config) -> TaskStore:
+    if (store := _get_store(config)) is None:
+        raise click.UsageError(
+            "Set 'archive_db_path' in the config to store the archive in a database"
+        )
+    return store
+
+
+def _get_tag_sources(
+    *, config: Config, no_cache: bool
+) -> Tuple[List[Path], List[Path], Optional[SegmentedArchive]]:
+    """Return paths to parse, paths to read incrementally and segmented archive."""
+    if (archive := _get_archive(config)) is not None:
+        return [config.wip_path], [], archive
+    if no_cache:
+        return [config.wip_path, config.archive_path], [], None
+    return [config.wip_path], [config.archive_path], None
 
 
 @click.group()
 def wip_group():
-    ...
+    # Wider hashes are text, see `hash_pattern`
+    set_hash_width(get_config().hash_width)
 
 
 @wip_group.command(name="clean", help="Move completed tasks to the archive")
@@ -20,15 +97,57 @@ def clean_cmd() -> None:
     config = get_config()
     default_wip_path = config.wip_path
     default_archive_path = config.archive_path
-    archive_completed_tasks(path=default_wip_path, archive_path=default_archive_path)
+    store = _get_store(config)
+    with store or contextlib.nullcontext():
+        archive_completed_tasks(
+            path=default_wip_path,
+            archive_path=default_archive_path,
+            cache=ParseCache.load(),
+            archive=_get_archive(config),
+            compression=config.archive_compression,
+            store=store,
+        )
 
 
 @wip_group.command(name="filter", help="Filter tasks in WIP file")
 @click.option("-g", "--group", "group_filter", help="Group name to filter by")
-def filter_cmd(group_filter: GroupName) -> None:
+@click.option(
+    "-q",
+    "--query",
+    "raw_query",
+    help="E.g.: 'g:infra AND NOT p:low', see README, defaults to undone tasks",
+)
+@click.option(
+    "--include-archive",
+    is_flag=True,
+    default=False,
+    help="Filter archived tasks too",
+)
+@no_cache_option
+@rebuild_cache_option
+def filter_cmd(
+    group_filter: Optional[GroupName],
+    raw_query: Optional[str],
+    include_archive: bool,
+    no_cache: bool,
+    rebuild_cache: bool,
+) -> None:
     config = get_config()
     default_wip_path = config.wip_path
-    filter_wip_file(path=default_wip_path, by_group=group_filter)
+    try:
+        query = parse_query(raw_query) if raw_query is not None else None
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--query")
+
+    archive_paths = _get_archive_paths(config) if include_archive else None
+    snapshots = _get_snapshots(no_cache=no_cache, rebuild_cache=rebuild_cache)
+    filter_wip_file(
+        path=default_wip_path,
+        by_group=group_filter,
+        snapshots=snapshots,
+        query=query,
+        archive_paths=archive_paths,
+    )
 
 
 @wip_group.command(name="validate", help="Validate WIP file")
@@ -38,51 +157,347 @@ def filter_cmd(group_filter: GroupName) -> None:
     default=False,
     help="Dump to compare against the original file",
 )
-def validate_cmd(debug: bool) -> None:
+@click.option(
+    "--max-diffs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Show up to this amount of diff lines",
+)
+@no_cache_option
+def validate_cmd(debug: bool, max_diffs: Optional[int], no_cache: bool) -> None:
     config = get_config()
     default_wip_path = config.wip_path
-    validate_wip_file(path=default_wip_path, debug=debug)
+    validate_wip_file(
+        path=default_wip_path,
+        debug=debug,
+        parallel_threshold=config.parallel_parse_threshold,
+        cache=None if no_cache else ParseCache.load(),
+        max_diffs=max_diffs,
+        validations=None if no_cache else ValidationCache.load(),
+    )
 
 
 @wip_group.command(name="hash", help="Add hashes to all tasks without a hash")
-def hash_cmd() -> None:
+@no_cache_option
+def hash_cmd(no_cache: bool) -> None:
     config = get_config()
     default_wip_path = config.wip_path
-    validate_and_add_hashes_to_tasks(path=default_wip_path)
+    validate_and_add_hashes_to_tasks(
+        path=default_wip_path,
+        cache=None if no_cache else ParseCache.load(),
+        validations=None if no_cache else ValidationCache.load(),
+        archive_paths=_get_archive_paths(config),
+        width=config.hash_width,
+    )
 
 
 @wip_group.command(name="deadlines", help="Show tasks sorted by deadline")
-def deadlines_cmd() -> None:
+@click.option(
+    "--within",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Only show tasks due in this amount of days",
+)
+@click.option(
+    "--overdue",
+    is_flag=True,
+    default=False,
+    help="Only show tasks due before today and not completed, or also with --within",
+)
+@click.option(
+    "--limit",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Show up to this amount of tasks",
+)
+@click.option(
+    "--include-archive",
+    is_flag=True,
+    default=False,
+    help="Show archived tasks too",
+)
+@no_cache_option
+@rebuild_cache_option
+def deadlines_cmd(
+    within: Optional[int],
+    overdue: bool,
+    limit: Optional[int],
+    include_archive: bool,
+    no_cache: bool,
+    rebuild_cache: bool,
+) -> None:
     config = get_config()
     default_wip_path = config.wip_path
-    show_tasks_sorted_by_deadline(path=default_wip_path)
+    snapshots = _get_snapshots(no_cache=no_cache, rebuild_cache=rebuild_cache)
+    try:
+        show_tasks_sorted_by_deadline(
+            path=default_wip_path,
+            snapshots=snapshots,
+            within=within,
+            overdue=overdue,
+            limit=limit,
+            archive_paths=_get_archive_paths(config) if include_archive else None,
+            use_index=not no_cache,
+        )
+    except ValueError as error:
+        raise click.ClickException(str(error))
 
 
 @wip_group.command(name="tags", help="Print all tag to console")
-def tags_cmd() -> None:
+@no_cache_option
+@rebuild_cache_option
+def tags_cmd(no_cache: bool, rebuild_cache: bool) -> None:
     config = get_config()
-    paths = [
-        config.wip_path,
-        config.archive_path,
-    ]
-    print_tags(paths=paths)
+    snapshots = _get_snapshots(no_cache=no_cache, rebuild_cache=rebuild_cache)
+    paths, indexed_paths, archive = _get_tag_sources(config=config, no_cache=no_cache)
+    print_tags(
+        paths=paths, snapshots=snapshots, indexed_paths=indexed_paths, archive=archive
+    )
 
 
 @wip_group.command(name="dump-tags", help="Add WIP and archive tags to config")
-def dump_tags_cmd() -> None:
+@no_cache_option
+@rebuild_cache_option
+def dump_tags_cmd(no_cache: bool, rebuild_cache: bool) -> None:
     config = get_config()
-    paths = [
-        config.wip_path,
-        config.archive_path,
-    ]
-    dump_group_tags(paths=paths)
+    snapshots = _get_snapshots(no_cache=no_cache, rebuild_cache=rebuild_cache)
+    paths, indexed_paths, archive = _get_tag_sources(config=config, no_cache=no_cache)
+    dump_group_tags(
+        paths=paths, snapshots=snapshots, indexed_paths=indexed_paths, archive=archive
+    )
 
 
 @wip_group.command(name="format", help="Format WIP file")
-def format_cmd() -> None:
+@no_cache_option
+@click.option(
+    "--timings",
+    is_flag=True,
+    default=False,
+    help="Show how long each step took and how many items it changed",
+)
+def format_cmd(no_cache: bool, timings: bool) -> None:
     config = get_config()
     default_wip_path = config.wip_path
-    format(path=default_wip_path)
+    format(
+        path=default_wip_path,
+        cache=None if no_cache else ParseCache.load(),
+        validations=None if no_cache else ValidationCache.load(),
+        timings=timings,
+        archive_paths=_get_archive_paths(config),
+        hash_width=config.hash_width,
+    )
+
+
+@wip_group.command(name="stats", help="Count tasks in WIP and archive files")
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    default=False,
+    help="Print stats as JSON",
+)
+@no_cache_option
+def stats_cmd(as_json: bool, no_cache: bool) -> None:
+    config = get_config()
+    print_stats(
+        wip_path=config.wip_path,
+        archive_path=config.archive_path,
+        archive=_get_archive(config),
+        snapshots=None if no_cache else SnapshotCache(),
+        use_index=not no_cache,
+        as_json=as_json,
+    )
+
+
+@wip_group.command(name="lookup", help="Look up archived tasks using the archive index")
+@click.option("--hash", "hash_", help="Task hash")
+@click.option("-t", "--tag", "tags", multiple=True, help="Tag, e.g.: g:group1")
+@click.option(
+    "-d",
+    "--deadline",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Deadline, e.g.: 2022-01-31",
+)
+def lookup_cmd(
+    hash_: Optional[str], tags: Tuple[str, ...], deadline: Optional[datetime.datetime]
+) -> None:
+    config = get_config()
+    try:
+        parsed_tags = [parse_tag(tag) for tag in tags]
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--tag")
+
+    try:
+        lookup_archived_tasks(
+            archive_path=config.archive_path,
+            archive=_get_archive(config),
+            hash=Hash(hash_) if hash_ else None,
+            tags=parsed_tags,
+            deadline=deadline.date() if deadline else None,
+        )
+    except ValueError as error:
+        raise click.ClickException(str(error))
+
+
+@wip_group.command(name="reindex", help="Index the archive from scratch")
+def reindex_cmd() -> None:
+    config = get_config()
+    reindex_archive(archive_path=config.archive_path, archive=_get_archive(config))
+
+
+@wip_group.command(
+    name="migrate-archive", help="Move archived tasks into a segmented archive"
+)
+def migrate_archive_cmd() -> None:
+    config = get_config()
+    archive = _get_archive(config)
+    if archive is None:
+        raise click.UsageError("Set 'archive_dir' in the config to segment the archive")
+
+    try:
+        tasks_amount = migrate_archive(
+            archive_path=config.archive_path, archive=archive
+        )
+    except ValueError as error:
+        raise click.ClickException(str(error))
+
+    print(f"Migrated tasks: {tasks_amount}")
+
+
+@wip_group.command(
+    name="compress-archive", help="Compress archive segments of past periods"
+)
+@click.option(
+    "--compression",
+    type=click.Choice(sorted(COMPRESSION_SUFFIXES)),
+    default=None,
+    help="Defaults to 'archive_compression' in the config, or gzip",
+)
+def compress_archive_cmd(compression: Optional[str]) -> None:
+    config = get_config()
+    archive = _get_archive(config)
+    if archive is None:
+        raise click.UsageError("Set 'archive_dir' in the config to segment the archive")
+
+    compressed_paths = archive.compress_closed_segments(
+        compression=compression or config.archive_compression or "gzip"
+    )
+    print(f"Compressed segments: {len(compressed_paths)}")
+
+
+@wip_group.command(name="search", help="Search archived tasks in the archive database")
+@click.argument("text", required=False)
+@click.option("--hash", "hash_", help="Task hash")
+@click.option("-t", "--tag", "tags", multiple=True, help="Tag, e.g.: g:group1")
+@click.option(
+    "-d",
+    "--deadline",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Deadline, e.g.: 2022-01-31",
+)
+@click.option(
+    "--limit",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Show up to this amount of tasks",
+)
+def search_cmd(
+    text: Optional[str],
+    hash_: Optional[str],
+    tags: Tuple[str, ...],
+    deadline: Optional[datetime.datetime],
+    limit: Optional[int],
+) -> None:
+    config = get_config()
+    try:
+        parsed_tags = [parse_tag(tag) for tag in tags]
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--tag")
+
+    with _require_store(config) as store:
+        try:
+            search_archived_tasks(
+                store=store,
+                text=text,
+                hash=Hash(hash_) if hash_ else None,
+                tags=parsed_tags,
+                deadline=deadline.date() if deadline else None,
+                limit=limit,
+            )
+        except ValueError as error:
+            raise click.ClickException(str(error))
+
+
+@wip_group.command(name="grep", help="Search tasks in WIP and archive files")
+@click.argument("text")
+@click.option(
+    "--limit",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Show up to this amount of tasks",
+)
+def grep_cmd(text: str, limit: Optional[int]) -> None:
+    config = get_config()
+    try:
+        grep(
+            text=text,
+            wip_path=config.wip_path,
+            archive_paths=_get_archive_paths(config),
+            limit=limit,
+        )
+    except ValueError as error:
+        raise click.ClickException(str(error))
+
+
+@wip_group.command(
+    name="show", help="Show the task with a hash, in WIP or archive files"
+)
+@click.argument("hash_", metavar="HASH")
+def show_cmd(hash_: str) -> None:
+    config = get_config()
+    try:
+        show_task(
+            hash=Hash(hash_),
+            wip_path=config.wip_path,
+            archive_paths=_get_archive_paths(config),
+        )
+    except ValueError as error:
+        raise click.ClickException(str(error))
+
+
+def _mark_task(hash_: str, *, done: bool) -> None:
+    config = get_config()
+    try:
+        mark_task(hash=Hash(hash_), path=config.wip_path, done=done)
+    except ValueError as error:
+        raise click.ClickException(str(error))
+
+
+@wip_group.command(
+    name="done", help="Mark the task with a hash in the WIP file as done"
+)
+@click.argument("hash_", metavar="HASH")
+def done_cmd(hash_: str) -> None:
+    _mark_task(hash_, done=True)
+
+
+@wip_group.command(
+    name="undone", help="Mark the task with a hash in the WIP file as not done"
+)
+@click.argument("hash_", metavar="HASH")
+def undone_cmd(hash_: str) -> None:
+    _mark_task(hash_, done=False)
+
+
+@wip_group.command(
+    name="load-archive-db", help="Load all archived tasks into the archive database"
+)
+def load_archive_db_cmd() -> None:
+    config = get_config()
+    with _require_store(config) as store:
+        load_archive_store(
+            store=store, archive_path=config.archive_path, archive=_get_archive(config)
+        )
 
 
 if __name__ == "__main__":
@@ -1,24 +1,144 @@
 import datetime
+import heapq
+import itertools
 from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from src.interpreter import parse_document
-from src.io import read_markdown_file
+from src.cache import SnapshotCache, load_items
+from src.index import load_index
+from src.io import is_compressed
 from src.types import Task
 
+DeadlineRange = Tuple[Optional[datetime.date], Optional[datetime.date]]
 
-def show_tasks_sorted_by_deadline(path: Path) -> None:
-    original_content = read_markdown_file(path=path)
-    items = parse_document(original_content)
 
+def criteria(task: Task) -> Tuple[datetime.date, bool]:
+    # earliest deadlines first, completed first
+    assert task.deadline, "Oops! I expected to have a date here :S"
+    return task.deadline, not task.done
+
+
+def get_deadline_range(
+    *, today: datetime.date, within: Optional[int] = None, overdue: bool = False
+) -> DeadlineRange:
+    """Return first and last deadlines to show, both included, None if unbounded.
+
+    Overdue tasks have a deadline before today, and `within` is an amount of days
+    since today.
+    """
+    start = today if within is not None and not overdue else None
+    end: Optional[datetime.date] = None
+    if within is not None:
+        end = today + datetime.timedelta(days=within)
+    elif overdue:
+        end = today - datetime.timedelta(days=1)
+    return start, end
+
+
+def iter_indexed_tasks_by_deadline(
+    path: Path, deadline_range: DeadlineRange
+) -> Iterator[Task]:
+    """Yield tasks with a deadline in range sorted by `criteria`, using an index.
+
+    Only tasks with a deadline in range are read from the file, see `DocumentIndex`.
+    """
+    index = load_index(document_path=path)
+
+    start, end = deadline_range
+    for _, records in index.iter_deadlines(start=start, end=end):
+        # Tasks with the same deadline are few, sort them to put completed first
+        yield from sorted(index.read_tasks(records), key=criteria)
+
+
+def iter_parsed_tasks_by_deadline(
+    path: Path,
+    deadline_range: DeadlineRange,
+    snapshots: Optional[SnapshotCache] = None,
+) -> Iterator[Task]:
+    """Same as `iter_indexed_tasks_by_deadline`, parsing the whole file."""
+    start, end = deadline_range
+    items = load_items(path=path, snapshots=snapshots)
     tasks = (item for item in items if isinstance(item, Task))
-    tasks_with_deadlines = [task for task in tasks if task.deadline]
+    tasks_in_range = [
+        task
+        for task in tasks
+        if task.deadline
+        and (start is None or start <= task.deadline)
+        and (end is None or task.deadline <= end)
+    ]
+    yield from sorted(tasks_in_range, key=criteria)
+
+
+def find_tasks_by_deadline(
+    *,
+    path: Path,
+    today: datetime.date,
+    within: Optional[int] = None,
+    overdue: bool = False,
+    limit: Optional[int] = None,
+    archive_paths: Optional[Iterable[Path]] = None,
+    snapshots: Optional[SnapshotCache] = None,
+    use_index: bool = True,
+) -> List[Task]:
+    """Return tasks with a deadline sorted by `criteria`, see `get_deadline_range`.
+
+    Tasks in every file are sorted on their own and then merged, so that only the
+    first `limit` tasks are read. With `use_index`, archived tasks are found with the
+    index of each archive file; otherwise files are parsed. The WIP file is always
+    parsed, as it is edited anywhere and indexes only notice appended lines, and so
+    are compressed files.
+    """
+    deadline_range = get_deadline_range(today=today, within=within, overdue=overdue)
+    archive_deadline_range = deadline_range
+    if overdue:
+        # Archived tasks are completed, so they are never overdue
+        archive_deadline_range = (today, deadline_range[1])
+
+    sorted_tasks_per_file: List[Iterator[Task]] = []
+    for file_path in [path, *(archive_paths or [])]:
+        is_wip_file = file_path == path
+        file_deadline_range = deadline_range if is_wip_file else archive_deadline_range
+        if use_index and not is_wip_file and not is_compressed(file_path):
+            tasks = iter_indexed_tasks_by_deadline(file_path, file_deadline_range)
+        else:
+            tasks = iter_parsed_tasks_by_deadline(
+                file_path, file_deadline_range, snapshots=snapshots
+            )
+        sorted_tasks_per_file.append(tasks)
+
+    sorted_tasks: Iterable[Task] = heapq.merge(*sorted_tasks_per_file, key=criteria)
+    if overdue:
+        # Completed tasks are not overdue
+        sorted_tasks = (
+            task
+            for task in sorted_tasks
+            if not task.done or (task.deadline and task.deadline >= today)
+        )
+
+    return list(itertools.islice(sorted_tasks, limit))
 
-    def criteria(task):
-        # earliest deadlines first, completed first
-        return task.deadline, not task.done
 
+def show_tasks_sorted_by_deadline(
+    path: Path,
+    snapshots: Optional[SnapshotCache] = None,
+    within: Optional[int] = None,
+    overdue: bool = False,
+    limit: Optional[int] = None,
+    archive_paths: Optional[Iterable[Path]] = None,
+    use_index: bool = True,
+) -> None:
     today = datetime.date.today()
-    for task in sorted(tasks_with_deadlines, key=criteria):
+    tasks = find_tasks_by_deadline(
+        path=path,
+        today=today,
+        within=within,
+        overdue=overdue,
+        limit=limit,
+        archive_paths=archive_paths,
+        snapshots=snapshots,
+        use_index=use_index,
+    )
+    for task in tasks:
         assert task.deadline, "Oops! I expected to have a date here :S"
         delta = task.deadline - today
         days_left = delta.days
@@ -1,31 +1,55 @@
+import itertools
 from pathlib import Path
-
-from src.interpreter import parse_document
-from src.io import read_markdown_file
-from src.types import Tag, TagValue, Task
+from typing import Iterable, List, Optional
+
+from src.cache import SnapshotCache, load_items
+from src.query import And, DoneTerm, Query, TagTerm
+from src.types import (
+    COMPLETED_TASK_PREFIX,
+    GROUP_TAG_TYPE,
+    INCOMPLETE_TASK_PREFIX,
+    Tag,
+    TagValue,
+    Task,
+)
 
 GroupName = TagValue
 
 
-def filter_wip_file(path: Path, by_group: GroupName) -> None:
-    group_tag = Tag(type="g", value=by_group)
-
-    original_content = read_markdown_file(path=path)
-    items = parse_document(original_content)
-
+def filter_wip_file(
+    path: Path,
+    by_group: Optional[GroupName] = None,
+    snapshots: Optional[SnapshotCache] = None,
+    query: Optional[Query] = None,
+    archive_paths: Optional[Iterable[Path]] = None,
+) -> None:
+    """Print tasks matching `query`, by default undone ones, in document order.
+
+    If `by_group` is set, only tasks in that group are printed. Tasks in
+    `archive_paths` are filtered too, after the ones in the WIP file. The query is
+    evaluated over each task, as indexing tasks for a single query takes longer.
+    """
+    conditions: List[Query] = [query or DoneTerm(done=False)]
+    if by_group is not None:
+        conditions.append(TagTerm(tag=Tag(type=GROUP_TAG_TYPE, value=by_group)))
+
+    paths = itertools.chain([path], archive_paths or [])
+    items = itertools.chain.from_iterable(
+        load_items(path=path, snapshots=snapshots) for path in paths
+    )
     tasks = (item for item in items if isinstance(item, Task))
-    tasks_in_group = (task for task in tasks if group_tag in task.tags)
-    todo_tasks = (task for task in tasks_in_group if not task.done)
 
-    for task in todo_tasks:
-        assert isinstance(task, Task)
-        print(format_task(task))
+    matching_query = And(operands=conditions)
+    for task in tasks:
+        if matching_query.matches(task):
+            print(format_task(task))
 
 
 def format_task(task: Task) -> str:
+    task_prefix = COMPLETED_TASK_PREFIX if task.done else INCOMPLETE_TASK_PREFIX
     return "\n".join(
         [
-            f"- [ ] {task.description}",
+            f"{task_prefix}{task.description}",
             *[detail.to_str() for detail in task.details],
         ]
     )
@@ -1,44 +1,108 @@
+from dataclasses import replace
 from pathlib import Path
+from typing import Iterable, Optional
 
-from src.cli.hash import add_hashes_to_tasks
-from src.cli.validate import validate_wip_file
-from src.format import add_eof_new_line, tidy_up_external_references
+from src.cache import ParseCache, ValidationCache
+from src.cli.hash import add_hashes, create_hash_allocator
+from src.cli.validate import print_validation_report, validate_items
+from src.format import add_eof_new_line_to_items, move_links_to_external_references
+from src.hash import DEFAULT_HASH_WIDTH
+from src.passes import (
+    PASSES,
+    Document,
+    Pass,
+    PassManager,
+    get_passes,
+    print_timings,
+    register_pass,
+)
 
+FORMAT_PASSES = ("eof-new-line", "hash", "external-references")
 
-def _pre(message: str) -> None:
-    print(f"{message:.<55}", end="")
 
+def validation_pass(validations: Optional[ValidationCache] = None) -> Pass:
+    def validate(document: Document) -> Document:
+        report = None
+        if validations is not None:
+            report = validations.get(path=document.path, max_diffs=None)
 
-def _done() -> None:
-    print(" done")
+        if report is None:
+            report = validate_items(
+                path=document.path,
+                content=document.original_content,
+                items=document.items,
+                stat=document.stat,
+                validations=validations,
+            )
 
+        print_validation_report(report)
+        return document
 
-def _validate(*, path: Path) -> None:
-    _pre("Validating WIP file")
-    validate_wip_file(path=path, debug=False)
-    _done()
+    return Pass(
+        name="validate",
+        function=validate,
+        description="Validating WIP file",
+        read_only=True,
+    )
 
 
-def _add_eof_new_line(*, path: Path) -> None:
-    _pre("Adding EOF new line if missing")
-    add_eof_new_line(path=path)
-    _done()
+@register_pass("eof-new-line", description="Adding EOF new line if missing")
+def _add_eof_new_line(document: Document) -> Document:
+    return document.with_items(add_eof_new_line_to_items(document.items))
 
 
-def _hash(*, path: Path) -> None:
-    _pre("Adding hashes to tasks")
-    add_hashes_to_tasks(path=path)
-    _done()
+@register_pass("hash", description="Adding hashes to tasks")
+def _hash(document: Document) -> Document:
+    return document.with_items(add_hashes(document.items))
 
 
-def _tidy_up_external_references(*, path: Path) -> None:
-    _pre("Moving links to external references")
-    tidy_up_external_references(path=path)
-    _done()
+def hash_pass(
+    *,
+    archive_paths: Optional[Iterable[Path]] = None,
+    width: int = DEFAULT_HASH_WIDTH,
+) -> Pass:
+    """Like the registered `hash` pass, with hashes unlike the archived ones too."""
 
+    def hash(document: Document) -> Document:
+        allocator = create_hash_allocator(
+            document.items,
+            archive_paths=archive_paths,
+            width=width,
+        )
+        return document.with_items(add_hashes(document.items, allocator=allocator))
 
-def format(*, path: Path) -> None:
-    _validate(path=path)
-    _add_eof_new_line(path=path)
-    _hash(path=path)
-    _tidy_up_external_references(path=path)
+    return replace(PASSES["hash"], function=hash)
+
+
+@register_pass("external-references", description="Moving links to external references")
+def _tidy_up_external_references(document: Document) -> Document:
+    return document.with_items(move_links_to_external_references(document.items))
+
+
+def format(
+    *,
+    path: Path,
+    cache: Optional[ParseCache] = None,
+    validations: Optional[ValidationCache] = None,
+    timings: bool = False,
+    archive_paths: Optional[Iterable[Path]] = None,
+    hash_width: int = DEFAULT_HASH_WIDTH,
+) -> None:
+    """Format WIP file, parsing and writing it only once.
+
+    New hashes have `hash_width` characters, and are unlike the hashes in the WIP
+    file and in `archive_paths`.
+    """
+    passes = [validation_pass(validations)]
+    for pass_ in get_passes(FORMAT_PASSES):
+        if pass_.name == "hash":
+            pass_ = hash_pass(
+                archive_paths=archive_paths,
+                width=hash_width,
+            )
+        passes.append(pass_)
+    result = PassManager(passes, verbose=True).run(path=path, cache=cache)
+
+    if timings:
+        print()
+        print_timings(result.reports)
@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from src.index import Record, iter_task_blocks, parse_task_lines
+from src.io import is_compressed, iter_markdown_lines
+from src.trigrams import DEFAULT_TRIGRAMS_DIR, load_trigram_index, task_text
+from src.types import Task
+
+# Matches in descriptions weigh more than matches in details
+DESCRIPTION_WEIGHT = 2
+
+
+@dataclass(frozen=True)
+class GrepMatch:
+    path: Path
+    line_number: int
+    task: Task
+    score: int
+
+    def to_str(self) -> str:
+        task_line, *_ = self.task.to_str().split("\n")
+        return f"{self.path}:{self.line_number}: {task_line}"
+
+
+def score_task(task: Task, words: List[str]) -> int:
+    """Return how often words appear in task, 0 unless all words appear."""
+    description = task.description.lower()
+    text = task_text(task)
+    score = 0
+    for word in words:
+        if (total := text.count(word)) == 0:
+            return 0
+        in_description = description.count(word)
+        score += in_description * DESCRIPTION_WEIGHT + total - in_description
+    return score
+
+
+def _iter_indexed_tasks(
+    path: Path, words: List[str], directory: Path
+) -> Iterator[Tuple[Record, Task]]:
+    index = load_trigram_index(document_path=path, directory=directory)
+    yield from index.read_tasks(index.find_candidates(words))
+
+
+def _iter_scanned_tasks(path: Path) -> Iterator[Tuple[Record, Task]]:
+    """Yield all tasks of a file reading it in full, without offsets."""
+    lines = (
+        (Record(offset=0, line_number=line_number), line, True)
+        for line_number, line in enumerate(iter_markdown_lines(path=path), start=1)
+    )
+    for block, _ in iter_task_blocks(lines):
+        first_line_number = block.record.line_number
+        yield block.record, parse_task_lines(
+            block.lines, first_line_number=first_line_number
+        )
+
+
+def grep_tasks(
+    *,
+    text: str,
+    wip_path: Optional[Path] = None,
+    archive_paths: Iterable[Path] = (),
+    directory: Path = DEFAULT_TRIGRAMS_DIR,
+) -> List[GrepMatch]:
+    """Return tasks with all words in text in their description or details.
+
+    Tasks that mention the words more often come first, otherwise tasks keep the
+    order of the WIP file and `archive_paths`, and the order in each file. Archive
+    files are searched with their trigram index, stored in `directory`. The WIP file
+    is edited anywhere, while indexes only notice appended lines, so it is read in
+    full, like compressed files.
+    """
+    words = text.lower().split()
+    matches: List[GrepMatch] = []
+    paths = [wip_path, *archive_paths] if wip_path is not None else archive_paths
+    for path in paths:
+        if not path.exists():
+            continue
+
+        if path == wip_path or is_compressed(path):
+            tasks = _iter_scanned_tasks(path)
+        else:
+            tasks = _iter_indexed_tasks(path, words, directory=directory)
+
+        for record, task in tasks:
+            if score := score_task(task, words):
+                matches.append(
+                    GrepMatch(
+                        path=path,
+                        line_number=record.line_number,
+                        task=task,
+                        score=score,
+                    )
+                )
+
+    return sorted(matches, key=lambda match: -match.score)
+
+
+def grep(
+    *,
+    text: str,
+    wip_path: Path,
+    archive_paths: Iterable[Path] = (),
+    limit: Optional[int] = None,
+) -> None:
+    """Print tasks matching text, best matches first."""
+    matches = grep_tasks(text=text, wip_path=wip_path, archive_paths=archive_paths)
+    for match in matches[:limit]:
+        print(match.to_str())
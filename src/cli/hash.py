@@ -1,44 +1,120 @@
+import itertools
 from dataclasses import replace
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 
+from src.cache import ParseCache, ValidationCache, parse_document_with_cache
 from src.cli.validate import validate_wip_file
-from src.hash import create_new_hash
-from src.interpreter import items_to_markdown, parse_document
-from src.io import read_markdown_file
+from src.hash import DEFAULT_HASH_WIDTH, HashAllocator, HashKey, hash_key
+from src.index import index_keys, load_index
+from src.interpreter import items_to_markdown
+from src.io import is_compressed, iter_markdown_lines, read_markdown_file
 from src.types import Item, Task
 
 
-def add_hashes_to_tasks(*, path: Path) -> None:
-    original_content = read_markdown_file(path=path)
-    items = parse_document(original_content)
+def add_hashes(
+    items: List[Item], allocator: Optional[HashAllocator] = None
+) -> List[Item]:
+    """Return items with a new hash for every task without one.
 
-    updated_items: List[Item] = []
-    tasks = (item for item in items if isinstance(item, Task))
-    existing_hashes = {task.hash for task in tasks if task.hash}
+    New hashes are allocated by `allocator`, which must know the hashes in items. By
+    default, new hashes are only unlike the hashes in items.
+    """
+    if allocator is None:
+        allocator = HashAllocator.from_hashes(
+            task.hash for task in _iter_tasks(items) if task.hash
+        )
 
+    tasks_without_hash = sum(1 for task in _iter_tasks(items) if not task.hash)
+    new_hashes = iter(allocator.allocate(tasks_without_hash))
+
+    updated_items: List[Item] = []
     for item in items:
-        if not isinstance(item, Task):
-            updated_items.append(item)
-            continue
+        if isinstance(item, Task) and not item.hash:
+            item = replace(item, hash=next(new_hashes))
+        updated_items.append(item)
+
+    return updated_items
+
+
+def _iter_tasks(items: Iterable[Item]) -> Iterator[Task]:
+    return (item for item in items if isinstance(item, Task))
 
-        task = item
-        if task.hash:
-            updated_items.append(item)
+
+def iter_archived_hash_keys(paths: Iterable[Path]) -> Iterator[HashKey]:
+    """Yield keys of the hashes in archive files, see `hash_key`.
+
+    Hashes are read from the index of each file, see `DocumentIndex`, so only the
+    lines appended since are read, except for compressed files, which are read in
+    full.
+    """
+    for path in paths:
+        if not path.exists():
             continue
+        if not is_compressed(path):
+            yield from load_index(document_path=path).iter_hash_keys()
+            continue
+        for line in iter_markdown_lines(path):
+            if (keys := index_keys(line)) is not None and keys.hash:
+                yield hash_key(keys.hash)
+
 
-        new_hash = create_new_hash(existing=existing_hashes)
-        updated_task = replace(task, hash=new_hash)
-        updated_items.append(updated_task)
+def create_hash_allocator(
+    items: List[Item],
+    *,
+    archive_paths: Optional[Iterable[Path]] = None,
+    width: int = DEFAULT_HASH_WIDTH,
+) -> HashAllocator:
+    """Return an allocator of hashes unlike the hashes in items and in the archive."""
+    wip_keys = (hash_key(task.hash) for task in _iter_tasks(items) if task.hash)
+    archived_keys = iter_archived_hash_keys(archive_paths or [])
+    return HashAllocator(existing=itertools.chain(wip_keys, archived_keys), width=width)
+
+
+def add_hashes_to_tasks(
+    *,
+    path: Path,
+    cache: Optional[ParseCache] = None,
+    archive_paths: Optional[Iterable[Path]] = None,
+    width: int = DEFAULT_HASH_WIDTH,
+) -> HashAllocator:
+    """Add a hash to every task without one, return the allocator of the new hashes.
+
+    New hashes have `width` characters and are unlike the hashes in the WIP file and
+    in `archive_paths`.
+    """
+    original_content = read_markdown_file(path=path)
+    items = parse_document_with_cache(original_content, cache=cache)
 
+    allocator = create_hash_allocator(
+        items,
+        archive_paths=archive_paths,
+        width=width,
+    )
+    updated_items = add_hashes(items, allocator=allocator)
     updated_content = items_to_markdown(updated_items)
 
     path.write_text(updated_content)
+    return allocator
 
 
-def validate_and_add_hashes_to_tasks(*, path: Path) -> None:
+def validate_and_add_hashes_to_tasks(
+    *,
+    path: Path,
+    cache: Optional[ParseCache] = None,
+    validations: Optional[ValidationCache] = None,
+    archive_paths: Optional[Iterable[Path]] = None,
+    width: int = DEFAULT_HASH_WIDTH,
+) -> None:
     print("Validating WIP file before adding hashes... ", end="")
-    validate_wip_file(path=path, debug=False)
+    validate_wip_file(path=path, debug=False, cache=cache, validations=validations)
     print("all valid :)")
 
-    add_hashes_to_tasks(path=path)
+    allocator = add_hashes_to_tasks(
+        path=path, cache=cache, archive_paths=archive_paths, width=width
+    )
+    print(
+        f"Added {len(allocator.allocated)} hashes, {len(allocator)} out of"
+        f" {allocator.capacity} hashes of {width} characters are in use: a new hash"
+        f" collides with probability {allocator.collision_probability:.2e}"
+    )
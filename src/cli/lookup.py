@@ -0,0 +1,109 @@
+import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from src.archive import SegmentedArchive
+from src.hash import Hash
+from src.index import DocumentIndex, Record, load_index
+from src.interpreter import iter_items
+from src.io import is_compressed
+from src.types import DEADLINE_TAG_TYPE, Tag, Task
+
+
+def parse_tag(raw_tag: str) -> Tag:
+    """Parse tags like `g:infra`, as written in tasks without the leading `#`."""
+    tag_type, separator, value = raw_tag.partition(":")
+    if not separator or not tag_type or not value:
+        raise ValueError(f"Expected a tag like 'g:group', got {raw_tag!r}")
+    return Tag(type=tag_type, value=value)
+
+
+def find_records(
+    index: DocumentIndex,
+    *,
+    hash: Optional[Hash] = None,
+    tags: Optional[List[Tag]] = None,
+    deadline: Optional[datetime.date] = None,
+) -> List[Record]:
+    """Return records that match all criteria, in document order."""
+    candidates: List[List[Record]] = []
+    if hash is not None:
+        record = index.find_by_hash(hash)
+        candidates.append([record] if record else [])
+    for tag in tags or []:
+        candidates.append(index.find_by_tag(tag))
+    if deadline is not None:
+        candidates.append(index.find_by_deadline(deadline))
+
+    if not candidates:
+        return index.records
+
+    matching = set(candidates[0]).intersection(*candidates[1:])
+    return sorted(matching, key=lambda record: record.offset)
+
+
+def scan_tasks(
+    path: Path,
+    *,
+    hash: Optional[Hash] = None,
+    tags: Optional[List[Tag]] = None,
+    deadline: Optional[datetime.date] = None,
+) -> Iterator[Task]:
+    """Yield tasks that match all criteria, reading the whole document."""
+    for item in iter_items(path=path):
+        if not isinstance(item, Task):
+            continue
+        if hash is not None and item.hash != hash:
+            continue
+        if tags and not set(tags).issubset(item.tags):
+            continue
+        if deadline is not None and item.deadline != deadline:
+            continue
+        yield item
+
+
+def lookup_archived_tasks(
+    *,
+    archive_path: Path,
+    hash: Optional[Hash] = None,
+    tags: Optional[List[Tag]] = None,
+    deadline: Optional[datetime.date] = None,
+    archive: Optional[SegmentedArchive] = None,
+) -> None:
+    """Print archived tasks that match all criteria.
+
+    If `archive` is set, only its segments that may contain matching tasks are read.
+    Compressed segments are not indexed, so they are scanned.
+    """
+    if archive is None:
+        paths: Iterable[Path] = [archive_path]
+    else:
+        segment_tags = list(tags or [])
+        if deadline is not None:
+            segment_tags.append(Tag(type=DEADLINE_TAG_TYPE, value=deadline.isoformat()))
+        paths = archive.iter_segment_paths(hash=hash, tags=segment_tags)
+
+    for path in paths:
+        if is_compressed(path):
+            tasks = scan_tasks(path, hash=hash, tags=tags, deadline=deadline)
+        else:
+            index = load_index(document_path=path)
+            records = find_records(index, hash=hash, tags=tags, deadline=deadline)
+            tasks = index.read_tasks(records)
+
+        for task in tasks:
+            print(task.to_str())
+
+
+def reindex_archive(
+    *, archive_path: Path, archive: Optional[SegmentedArchive] = None
+) -> None:
+    paths = [archive_path] if archive is None else archive.iter_segment_paths()
+    records_amount = 0
+    for path in paths:
+        if is_compressed(path):
+            continue  # see `SegmentedArchive.compress_closed_segments`
+        index = DocumentIndex(document_path=path)
+        records_amount += index.rebuild()
+        index.save()
+    print(f"Indexed tasks: {records_amount}")
@@ -0,0 +1,37 @@
+import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from src.archive import SegmentedArchive
+from src.hash import Hash
+from src.store import TaskStore
+from src.types import Tag
+
+
+def search_archived_tasks(
+    *,
+    store: TaskStore,
+    text: Optional[str] = None,
+    hash: Optional[Hash] = None,
+    tags: Optional[List[Tag]] = None,
+    deadline: Optional[datetime.date] = None,
+    limit: Optional[int] = None,
+) -> None:
+    """Print archived tasks that match all criteria, most relevant first."""
+    tasks = store.search(text, hash=hash, tags=tags, deadline=deadline, limit=limit)
+    for task in tasks:
+        print(task.to_str())
+
+
+def load_archive_store(
+    *,
+    store: TaskStore,
+    archive_path: Path,
+    archive: Optional[SegmentedArchive] = None,
+) -> None:
+    """Load all archived tasks into the store, replacing the stored ones."""
+    paths: Iterable[Path] = (
+        [archive_path] if archive is None else archive.iter_segment_paths()
+    )
+    tasks_amount = store.load_archive(paths)
+    print(f"Stored tasks: {tasks_amount}")
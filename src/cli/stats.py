@@ -0,0 +1,209 @@
+import datetime
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.archive import SegmentedArchive
+from src.cache import SnapshotCache
+from src.index import IndexKeys, index_path, load_index
+from src.interpreter import iter_items
+from src.io import is_compressed
+from src.types import GROUP_TAG_TYPE, Item, JsonDict, Tag, TagValue, Task, Title
+
+# Section of the tasks before the first title
+NO_SECTION = ""
+
+
+@dataclass
+class GroupCounts:
+    open: int = 0
+    done: int = 0
+
+
+@dataclass
+class DeadlineCounts:
+    """Open tasks by deadline."""
+
+    overdue: int = 0
+    this_week: int = 0
+    later: int = 0
+
+
+@dataclass
+class Stats:
+    """Task counts, collected one item at a time without keeping items around."""
+
+    today: datetime.date
+    groups: Dict[TagValue, GroupCounts] = field(
+        default_factory=lambda: defaultdict(GroupCounts)
+    )
+    sections: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    deadlines: DeadlineCounts = field(default_factory=DeadlineCounts)
+    # Archived tasks per archive file or segment
+    archive: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def end_of_week(self) -> datetime.date:
+        return self.today + datetime.timedelta(days=6 - self.today.weekday())
+
+    def add_task(self, task: Task) -> None:
+        self._count(tags=task.tags, deadline=task.deadline, done=task.done)
+
+    def _count(
+        self, *, tags: List[Tag], deadline: Optional[datetime.date], done: bool
+    ) -> None:
+        for tag in tags:
+            if tag.type == GROUP_TAG_TYPE:
+                counts = self.groups[tag.value]
+                if done:
+                    counts.done += 1
+                else:
+                    counts.open += 1
+
+        if deadline and not done:
+            if deadline < self.today:
+                self.deadlines.overdue += 1
+            elif deadline <= self.end_of_week:
+                self.deadlines.this_week += 1
+            else:
+                self.deadlines.later += 1
+
+    def add_wip_items(self, items: Iterable[Item]) -> None:
+        section = NO_SECTION
+        for item in items:
+            if isinstance(item, Title):
+                section = item.title
+            elif isinstance(item, Task):
+                self.sections[section] += 1
+                self.add_task(item)
+
+    def add_archived_tasks(self, name: str, tasks: Iterable[Task]) -> None:
+        archived_amount = 0
+        for task in tasks:
+            self.add_task(task)
+            archived_amount += 1
+        self.archive[name] = archived_amount
+
+    def add_archived_keys(self, name: str, keys_per_task: Iterable[IndexKeys]) -> None:
+        """Count archived tasks by their index keys, e.g.: read from an index."""
+        archived_amount = 0
+        for keys in keys_per_task:
+            self._count(tags=keys.tags, deadline=keys.deadline, done=keys.done)
+            archived_amount += 1
+        self.archive[name] = archived_amount
+
+    def to_json(self) -> JsonDict:
+        return dict(
+            today=self.today.isoformat(),
+            groups={
+                group: dict(open=counts.open, done=counts.done)
+                for group, counts in sorted(self.groups.items())
+            },
+            sections=dict(self.sections),
+            deadlines=dict(
+                overdue=self.deadlines.overdue,
+                this_week=self.deadlines.this_week,
+                later=self.deadlines.later,
+            ),
+            archive=self.archive,
+        )
+
+    def to_str(self) -> str:
+        lines: List[str] = ["Groups:"]
+        for group, counts in sorted(self.groups.items()):
+            lines.append(f"  {group}: {counts.open} open, {counts.done} done")
+
+        lines.append("Sections:")
+        for section, tasks_amount in self.sections.items():
+            lines.append(f"  {section or '(no title)'}: {tasks_amount} tasks")
+
+        lines.extend(
+            (
+                "Deadlines of open tasks:",
+                f"  overdue: {self.deadlines.overdue}",
+                f"  this week: {self.deadlines.this_week}",
+                f"  later: {self.deadlines.later}",
+                "Archive:",
+            )
+        )
+        for name, tasks_amount in self.archive.items():
+            lines.append(f"  {name}: {tasks_amount} tasks")
+        lines.append(f"  total: {sum(self.archive.values())} tasks")
+
+        return "\n".join(lines)
+
+
+def _iter_wip_items(
+    path: Path, snapshots: Optional[SnapshotCache] = None
+) -> Iterable[Item]:
+    """Return items of the snapshot if there is one, stream the file otherwise.
+
+    A missing snapshot is not created, as that would keep all items in memory.
+    """
+    if snapshots is not None and (items := snapshots.load(path=path)) is not None:
+        return items
+    return iter_items(path=path)
+
+
+def _add_archive_file(stats: Stats, *, path: Path, name: str, use_index: bool) -> None:
+    """Count tasks in the archive file, using its index if it has one."""
+    if use_index and not is_compressed(path) and index_path(path).exists():
+        index = load_index(document_path=path)
+        stats.add_archived_keys(name, index.iter_keys())
+        return
+
+    items = iter_items(path=path) if path.exists() else []
+    tasks = (item for item in items if isinstance(item, Task))
+    stats.add_archived_tasks(name, tasks)
+
+
+def collect_stats(
+    *,
+    wip_path: Path,
+    archive_path: Path,
+    today: datetime.date,
+    archive: Optional[SegmentedArchive] = None,
+    snapshots: Optional[SnapshotCache] = None,
+    use_index: bool = True,
+) -> Stats:
+    """Count tasks in the WIP file and the archive, reading each file once.
+
+    Files are streamed, so memory does not depend on their size. The WIP snapshot in
+    `snapshots` and the archive indexes are used instead, if they exist and
+    `use_index` is set.
+    """
+    stats = Stats(today=today)
+    stats.add_wip_items(_iter_wip_items(wip_path, snapshots=snapshots))
+
+    if archive is None:
+        _add_archive_file(
+            stats, path=archive_path, name=archive_path.name, use_index=use_index
+        )
+    else:
+        for segment in archive.segments:
+            path = archive.segment_path(segment.name)
+            _add_archive_file(stats, path=path, name=segment.name, use_index=use_index)
+
+    return stats
+
+
+def print_stats(
+    *,
+    wip_path: Path,
+    archive_path: Path,
+    archive: Optional[SegmentedArchive] = None,
+    snapshots: Optional[SnapshotCache] = None,
+    use_index: bool = True,
+    as_json: bool = False,
+) -> None:
+    stats = collect_stats(
+        wip_path=wip_path,
+        archive_path=archive_path,
+        today=datetime.date.today(),
+        archive=archive,
+        snapshots=snapshots,
+        use_index=use_index,
+    )
+    print(json.dumps(stats.to_json(), indent=2) if as_json else stats.to_str())
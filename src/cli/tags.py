@@ -1,17 +1,23 @@
 import dataclasses
 import itertools
 from pathlib import Path
-from typing import Iterator, List
+from typing import Iterator, List, Optional
 
+from src.archive import SegmentedArchive
+from src.cache import SnapshotCache, load_items
 from src.config import get_config, update_config
-from src.interpreter import parse_document
-from src.io import read_markdown_file
+from src.index import load_index
 from src.types import GROUP_TAG_TYPE, Tag, TagValue, Task
 
 
-def scrape_tags(path: Path) -> Iterator[Tag]:
-    original_content = read_markdown_file(path=path)
-    items = parse_document(original_content)
+def scrape_tags(
+    path: Path,
+    parallel_threshold: Optional[int] = None,
+    snapshots: Optional[SnapshotCache] = None,
+) -> Iterator[Tag]:
+    items = load_items(
+        path=path, snapshots=snapshots, parallel_threshold=parallel_threshold
+    )
 
     tasks = (item for item in items if isinstance(item, Task))
     tag_lists = (task.tags for task in tasks if task.tags)
@@ -19,17 +25,58 @@ def scrape_tags(path: Path) -> Iterator[Tag]:
     yield from tags
 
 
-def scrape_group_tags(path: Path) -> Iterator[Tag]:
-    group_tags = (tag for tag in scrape_tags(path) if tag.type == GROUP_TAG_TYPE)
+def scrape_group_tags(
+    path: Path,
+    parallel_threshold: Optional[int] = None,
+    snapshots: Optional[SnapshotCache] = None,
+) -> Iterator[Tag]:
+    tags = scrape_tags(path, parallel_threshold=parallel_threshold, snapshots=snapshots)
+    group_tags = (tag for tag in tags if tag.type == GROUP_TAG_TYPE)
     yield from group_tags
 
 
-def get_all_group_tags(paths: List[Path]) -> Iterator[TagValue]:
-    """Return group tag values in config and in WIP and archive files."""
-    tags_per_file = (scrape_group_tags(path) for path in paths)
-    tags_in_files = set(tag for tag in itertools.chain.from_iterable(tags_per_file))
+def scrape_indexed_group_tags(path: Path) -> Iterator[Tag]:
+    """Same as `scrape_group_tags`, but reading tags from the index of the file.
 
+    The file must be append-only, otherwise it is indexed from scratch.
+    """
+    tags = load_index(document_path=path).tags
+    group_tags = (tag for tag in tags if tag.type == GROUP_TAG_TYPE)
+    yield from group_tags
+
+
+def get_all_group_tags(
+    paths: List[Path],
+    snapshots: Optional[SnapshotCache] = None,
+    indexed_paths: Optional[List[Path]] = None,
+    archive: Optional[SegmentedArchive] = None,
+) -> Iterator[TagValue]:
+    """Return group tag values in config and in WIP and archive files.
+
+    Tags in `indexed_paths` are read from their index, see `DocumentIndex`, and tags in
+    `archive` are read from its manifest.
+    """
     config = get_config()
+
+    tags_per_file = (
+        scrape_group_tags(
+            path,
+            parallel_threshold=config.parallel_parse_threshold,
+            snapshots=snapshots,
+        )
+        for path in paths
+    )
+    indexed_tags_per_file = (
+        scrape_indexed_group_tags(path) for path in indexed_paths or []
+    )
+    archive_tags = archive.tags if archive else set()
+    all_tags = itertools.chain(
+        itertools.chain.from_iterable(tags_per_file),
+        itertools.chain.from_iterable(indexed_tags_per_file),
+        (tag for tag in archive_tags if tag.type == GROUP_TAG_TYPE),
+    )
+    tags_in_files = set(all_tags)
+
     tags_in_config = set((Tag(type=GROUP_TAG_TYPE, value=v) for v in config.tags))
 
     tags = tags_in_config.union(tags_in_files)
@@ -38,16 +85,30 @@ def get_all_group_tags(paths: List[Path]) -> Iterator[TagValue]:
     return tag_values
 
 
-def print_tags(paths: List[Path]) -> None:
+def print_tags(
+    paths: List[Path],
+    snapshots: Optional[SnapshotCache] = None,
+    indexed_paths: Optional[List[Path]] = None,
+    archive: Optional[SegmentedArchive] = None,
+) -> None:
     """Print all groups tags to console."""
-    tag_values = get_all_group_tags(paths=paths)
+    tag_values = get_all_group_tags(
+        paths=paths, snapshots=snapshots, indexed_paths=indexed_paths, archive=archive
+    )
     for tag in sorted(tag_values):
         print(tag)
 
 
-def dump_group_tags(paths: List[Path]) -> None:
+def dump_group_tags(
+    paths: List[Path],
+    snapshots: Optional[SnapshotCache] = None,
+    indexed_paths: Optional[List[Path]] = None,
+    archive: Optional[SegmentedArchive] = None,
+) -> None:
     """Add group tags in WIP and archive files to config."""
-    tag_values = get_all_group_tags(paths=paths)
+    tag_values = get_all_group_tags(
+        paths=paths, snapshots=snapshots, indexed_paths=indexed_paths, archive=archive
+    )
     sorted_tag_values = list(sorted(tag_values))
 
     config = get_config()
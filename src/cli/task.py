@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from src.hash import Hash
+from src.index import (
+    HighWaterMark,
+    Record,
+    index_keys,
+    iter_task_blocks,
+    parse_task_lines,
+)
+from src.io import is_compressed, iter_markdown_lines
+from src.locations import DEFAULT_LOCATIONS_DIR, TaskLocations, TaskSpan, load_locations
+from src.types import COMPLETED_TASK_PREFIX, INCOMPLETE_TASK_PREFIX, Task
+
+
+@dataclass(frozen=True)
+class FoundTask:
+    path: Path
+    line_number: int
+    task: Task
+
+    def to_str(self) -> str:
+        return f"{self.path}:{self.line_number}\n{self.task.to_str()}"
+
+
+def locate_task(
+    path: Path, hash: Hash, *, directory: Path = DEFAULT_LOCATIONS_DIR
+) -> Optional[Tuple[TaskLocations, TaskSpan, List[str]]]:
+    """Return locations of the file, and span and lines of the task with hash.
+
+    If the file changed other than by appending to it, tasks are located from
+    scratch, see `TaskLocations`. Return None if the task is not in the file.
+    """
+    locations = load_locations(document_path=path, directory=directory)
+    span = locations.find(hash)
+    if span is None or (lines := locations.read_lines(hash, span)) is None:
+        return None
+    return locations, span, lines
+
+
+def _scan_task(path: Path, hash: Hash) -> Optional[FoundTask]:
+    """Find task with hash reading the whole file, e.g.: if it is compressed."""
+    lines = (
+        (Record(offset=0, line_number=line_number), line, True)
+        for line_number, line in enumerate(iter_markdown_lines(path=path), start=1)
+    )
+    for block, _ in iter_task_blocks(lines):
+        keys = index_keys(block.lines[0])
+        if keys is not None and keys.hash == hash:
+            line_number = block.record.line_number
+            task = parse_task_lines(block.lines, first_line_number=line_number)
+            return FoundTask(path=path, line_number=line_number, task=task)
+    return None
+
+
+def find_task(
+    *,
+    hash: Hash,
+    wip_path: Path,
+    archive_paths: Iterable[Path] = (),
+    directory: Path = DEFAULT_LOCATIONS_DIR,
+) -> Optional[FoundTask]:
+    """Return the task with hash in the WIP file or the archive, None if missing.
+
+    Tasks are located with the task locations of each file, stored in `directory`, and
+    only the lines of the task are read. Compressed files are read in full.
+    """
+    for path in [wip_path, *archive_paths]:
+        if not path.exists():
+            continue
+
+        if is_compressed(path):
+            found = _scan_task(path, hash)
+        elif located := locate_task(path, hash, directory=directory):
+            _, span, lines = located
+            line_number = span.record.line_number
+            task = parse_task_lines(lines, first_line_number=line_number)
+            found = FoundTask(path=path, line_number=line_number, task=task)
+        else:
+            found = None
+
+        if found is not None:
+            return found
+
+    return None
+
+
+def _with_done(line: str, done: bool) -> str:
+    old_prefix, new_prefix = INCOMPLETE_TASK_PREFIX, COMPLETED_TASK_PREFIX
+    if not done:
+        old_prefix, new_prefix = new_prefix, old_prefix
+    if not line.startswith(old_prefix):
+        return line
+    return new_prefix + line.removeprefix(old_prefix)
+
+
+def set_task_done(
+    *,
+    path: Path,
+    hash: Hash,
+    done: bool,
+    directory: Path = DEFAULT_LOCATIONS_DIR,
+) -> FoundTask:
+    """Mark task with hash in the WIP file as done or not done, and return it.
+
+    Only the line of the task is rewritten, in place, as the checkbox keeps its size.
+    Raise ValueError if the task is not in the file.
+    """
+    located = locate_task(path, hash, directory=directory)
+    if located is None:
+        raise ValueError(f"No task with hash {hash!r} in {path}")
+
+    locations, span, (task_line, *detail_lines) = located
+    updated_line = _with_done(task_line, done)
+    if updated_line != task_line:
+        with path.open("r+b") as f:
+            f.seek(span.record.offset)
+            f.write(updated_line.encode("utf-8"))
+
+        # Offsets did not move, so record the change instead of locating tasks again
+        if (mark := locations.mark).size > span.record.offset:
+            locations.mark = HighWaterMark.of(path, size=mark.size, lines=mark.lines)
+        locations.save()
+
+    lines = [updated_line, *detail_lines]
+    task = parse_task_lines(lines, first_line_number=span.record.line_number)
+    return FoundTask(path=path, line_number=span.record.line_number, task=task)
+
+
+def show_task(
+    *, hash: Hash, wip_path: Path, archive_paths: Iterable[Path] = ()
+) -> None:
+    found = find_task(hash=hash, wip_path=wip_path, archive_paths=archive_paths)
+    if found is None:
+        raise ValueError(f"No task with hash {hash!r}")
+    print(found.to_str())
+
+
+def mark_task(*, hash: Hash, path: Path, done: bool) -> None:
+    found = set_task_done(path=path, hash=hash, done=done)
+    print(found.to_str())
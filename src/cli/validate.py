@@ -1,36 +1,98 @@
-import difflib
+import os
 from pathlib import Path
+from typing import List, Optional
 
-from src.interpreter import items_to_markdown, parse_document
+from src.cache import ParseCache, ValidationCache, parse_document_with_cache
+from src.interpreter import items_to_markdown
 from src.io import read_markdown_file
+from src.types import Item, MarkdownStr
+from src.validation import ValidationReport, validate_round_trip
 
 
-def validate_wip_file(*, path: Path, debug: bool) -> None:
-    original_content = read_markdown_file(path=path)
-    items = parse_document(original_content)
-    parsed_content = items_to_markdown(items)
+def validate_items(
+    *,
+    path: Path,
+    content: MarkdownStr,
+    items: List[Item],
+    stat: os.stat_result,
+    debug: bool = False,
+    max_diffs: Optional[int] = None,
+    validations: Optional[ValidationCache] = None,
+) -> ValidationReport:
+    """Validate that `items` parsed from the file `content` serialize back to it.
+
+    The report is stored in `validations`, if any. `stat` must be taken before
+    reading `content`, see `ValidationCache.set`.
+    """
+    # Render every item again, otherwise the round trip would always succeed
+    parsed_content = items_to_markdown(items, verbatim=False)
 
     if debug:
         output_path = path.parent / f"{path.stem}__VALIDATION_DEBUG.md"
         print(f"Parsed content dumped into {output_path}")
         output_path.write_text(parsed_content)
 
-    # Print diff
-    original_lines = original_content.split("\n")
-    parsed_lines = parsed_content.split("\n")
-    differ = difflib.Differ()
-    raw_diff = differ.compare(original_lines, parsed_lines)
-    numbered_diff = ((i, line) for i, line in enumerate(raw_diff))
-    diff = [(i, line) for i, line in numbered_diff if not line.startswith("  ")]
+    report = validate_round_trip(content, parsed_content, max_diffs)
+
+    if validations is not None:
+        validations.set(
+            path=path,
+            content=content,
+            stat=stat,
+            max_diffs=max_diffs,
+            report=report,
+        )
+
+    return report
 
-    diffs_found = bool(diff)
 
-    if diffs_found:
+def print_validation_report(
+    report: ValidationReport, max_diffs: Optional[int] = None
+) -> None:
+    """Print differences, if any, and exit with error."""
+    if not report.is_valid:
         print("File is not valid, see below:\n")
 
-    for i, line in diff:
+    for i, line in report.diff:
         print(i, line)
 
-    if diffs_found:
+    if report.truncated:
+        print(f"\nOnly the first {max_diffs} diff lines are shown")
+
+    if not report.is_valid:
         # Exiting with error on diff is useful to concatenate CLI instructions
         exit(1)
+
+
+def validate_wip_file(
+    *,
+    path: Path,
+    debug: bool,
+    parallel_threshold: Optional[int] = None,
+    cache: Optional[ParseCache] = None,
+    max_diffs: Optional[int] = None,
+    validations: Optional[ValidationCache] = None,
+) -> ValidationReport:
+    report: Optional[ValidationReport] = None
+    if validations is not None and not debug:
+        report = validations.get(path=path, max_diffs=max_diffs)
+
+    if report is None:
+        stat = path.stat()
+        original_content = read_markdown_file(path=path)
+        items = parse_document_with_cache(
+            original_content, cache=cache, parallel_threshold=parallel_threshold
+        )
+        report = validate_items(
+            path=path,
+            content=original_content,
+            items=items,
+            stat=stat,
+            debug=debug,
+            max_diffs=max_diffs,
+            validations=validations,
+        )
+
+    print_validation_report(report, max_diffs)
+
+    return report
@@ -1,11 +1,15 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
+from src.hash import DEFAULT_HASH_WIDTH, validate_hash_width
 from src.io import read_json_with_trailing_comma, safe_write_json
 from src.types import JsonDict, TagValue
 
 DEFAULT_CONFIG_PATH = Path("~/.config/wip-manager/config.json").expanduser()
+# Files bigger than this are parsed in parallel
+DEFAULT_PARALLEL_PARSE_THRESHOLD = 10 * 1024 * 1024  # bytes
+DEFAULT_ARCHIVE_SEGMENT_PERIOD = "month"
 
 
 @dataclass
@@ -13,12 +17,28 @@ class Config:
     wip_path: Path
     archive_path: Path
     tags: List[TagValue]
+    parallel_parse_threshold: int = DEFAULT_PARALLEL_PARSE_THRESHOLD
+    # If set, tasks are archived in segments under this directory
+    archive_dir: Optional[Path] = None
+    archive_segment_period: str = DEFAULT_ARCHIVE_SEGMENT_PERIOD
+    # If set, `gzip` or `lzma`, closed archive segments are compressed by `clean`
+    archive_compression: Optional[str] = None
+    # If set, archived tasks are mirrored in a SQLite database at this path
+    archive_db_path: Optional[Path] = None
+    # Characters of new task hashes, existing hashes keep theirs
+    hash_width: int = DEFAULT_HASH_WIDTH
 
     def to_json(self) -> JsonDict:
         json_dict = dict(
             wip_path=str(self.wip_path),
             archive_path=str(self.archive_path),
             tags=sorted(self.tags),
+            parallel_parse_threshold=self.parallel_parse_threshold,
+            archive_dir=str(self.archive_dir) if self.archive_dir else None,
+            archive_segment_period=self.archive_segment_period,
+            archive_compression=self.archive_compression,
+            archive_db_path=str(self.archive_db_path) if self.archive_db_path else None,
+            hash_width=self.hash_width,
         )
         assert json_dict.keys() == self.__dict__.keys()
         return json_dict
@@ -31,7 +51,24 @@ def get_config() -> Config:
         archive_path=parse_path(content["archive_path"]),
         # if no "tags" in config, add them
         tags=list(sorted(content.get("tags", []))),
+        parallel_parse_threshold=content.get(
+            "parallel_parse_threshold", DEFAULT_PARALLEL_PARSE_THRESHOLD
+        ),
+        archive_dir=(
+            parse_path(content["archive_dir"]) if content.get("archive_dir") else None
+        ),
+        archive_segment_period=content.get(
+            "archive_segment_period", DEFAULT_ARCHIVE_SEGMENT_PERIOD
+        ),
+        archive_compression=content.get("archive_compression"),
+        archive_db_path=(
+            parse_path(content["archive_db_path"])
+            if content.get("archive_db_path")
+            else None
+        ),
+        hash_width=content.get("hash_width", DEFAULT_HASH_WIDTH),
     )
+    validate_hash_width(config.hash_width)
     return config
 
 
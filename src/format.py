@@ -1,11 +1,9 @@
 import itertools
 import re
 from dataclasses import replace
-from pathlib import Path
+from typing import List
 
-from src.interpreter import items_to_markdown, parse_document
-from src.io import read_markdown_file, write_text_file
-from src.types import ExternalReference, Item, Task, TaskDetail
+from src.types import EmptyLine, ExternalReference, Item, Task, TaskDetail
 
 TASK_HAS_HYPERLINK = re.compile(r"\[[^\[\]]{2,}\]\(([^\(\)]*)\)")
 TASK_DETAIL_HAS_HYPERLINK = re.compile(r"\[[^\[\]]{2,}\]\(([^\(\)]*)\)")
@@ -13,19 +11,18 @@ TASK_DETAIL_HAS_HYPERLINK = re.compile(r"\[[^\[\]]{2,}\]\(([^\(\)]*)\)")
 EXTERNAL_REFERENCE_DEFAULT_DESCRIPTION = "?"
 
 
-def add_eof_new_line(*, path: Path) -> None:
-    lines = path.read_text().split("\n")
-    last_line = lines[-1]
-    empty_line = ""
-    if last_line != empty_line:
-        lines.append(empty_line)
-    path.write_text("\n".join(lines))
+def add_eof_new_line_to_items(items: List[Item]) -> List[Item]:
+    """Add an empty line after the last item, so the document ends in a new line."""
+    if items and not isinstance(items[-1], EmptyLine):
+        return [*items, EmptyLine()]
+    return items
 
 
-def tidy_up_external_references(*, path: Path) -> None:
-    original_content = read_markdown_file(path=path)
-    items = parse_document(original_content)
+def move_links_to_external_references(items: List[Item]) -> List[Item]:
+    """Replace task hyperlinks with references to new external references.
 
+    New external references are added at the end, before the EOF new line.
+    """
     external_refs = [item for item in items if isinstance(item, ExternalReference)]
     last_external_reference = external_refs[-1]
     new_numbers = itertools.count(last_external_reference.number + 1)
@@ -37,6 +34,11 @@ def tidy_up_external_references(*, path: Path) -> None:
             return item
 
         task = item
+        if not TASK_HAS_HYPERLINK.search(task.description) and not any(
+            TASK_DETAIL_HAS_HYPERLINK.search(detail.description)
+            for detail in task.details
+        ):
+            return task  # leave it untouched, to serialize it verbatim
 
         # process the task description
         hyperlinks = TASK_HAS_HYPERLINK.findall(task.description)
@@ -84,6 +86,4 @@ def tidy_up_external_references(*, path: Path) -> None:
     # insert new external references before the EOF new line
     last_item = processed_items.pop()
     processed_items.extend([*new_external_references, last_item])
-    processed_content = items_to_markdown(processed_items)
-
-    write_text_file(path=path, content=processed_content)
+    return processed_items
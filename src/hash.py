@@ -1,8 +1,18 @@
+import bisect
 import hashlib
+import random
+import re
 import uuid
-from typing import NewType, Set
+from array import array
+from typing import Iterable, List, NewType, Set
 
 Hash = NewType("Hash", str)
+# Hash as an integer, to store many of them compactly, see `hash_key`
+HashKey = int
+
+DEFAULT_HASH_WIDTH = 6
+# Keys of hashes up to this width fit in 64 bits
+MIN_HASH_WIDTH, MAX_HASH_WIDTH = 6, 11
 
 
 def create_hash() -> Hash:
@@ -17,3 +27,113 @@ def create_new_hash(existing: Set[Hash]) -> Hash:
         hash = create_hash()
         hash_already_exists = hash in existing
     return hash
+
+
+def hash_key(hash: Hash) -> HashKey:
+    """Return hash as an integer, different for every hash of any width.
+
+    Hashes are read in base 36, with a leading 1 to tell `00abcd` from `0abcd`.
+    """
+    return int(f"1{hash}", 36)
+
+
+def hash_pattern(width: int = DEFAULT_HASH_WIDTH) -> str:
+    """Return pattern of the hashes parsed when hashes have `width` characters.
+
+    Hashes wider than 6 characters are hexadecimal, with at least a digit and a letter,
+    so that words like `#general` or issue numbers like `#1234567` are not hashes. They
+    are only parsed up to `width`, so that short commit SHAs like `#a1b2c3d` are not
+    hashes either, unless hashes are that wide.
+    """
+    pattern = rf"[a-z0-9]{{{MIN_HASH_WIDTH}}}"
+    if width == MIN_HASH_WIDTH:
+        return pattern
+
+    wider_widths = f"{MIN_HASH_WIDTH + 1},{width}"
+    wider_pattern = rf"(?=[0-9a-f]*[0-9])(?=[0-9a-f]*[a-f])[0-9a-f]{{{wider_widths}}}"
+    return f"(?:{pattern}|{wider_pattern})"
+
+
+def is_hash(text: str, width: int = DEFAULT_HASH_WIDTH) -> bool:
+    """Return True if text would be parsed as a hash at the end of a task."""
+    return re.fullmatch(hash_pattern(width), text) is not None
+
+
+def validate_hash_width(width: int) -> None:
+    if not MIN_HASH_WIDTH <= width <= MAX_HASH_WIDTH:
+        raise ValueError(
+            f"Hash width must be between {MIN_HASH_WIDTH} and {MAX_HASH_WIDTH},"
+            f" got {width}"
+        )
+
+
+class HashAllocator:
+    """Allocate new hashes of `width` hexadecimal characters, unlike existing ones.
+
+    Existing hashes are kept as a sorted array of keys, as there can be millions of
+    them in the archive. Hashes are drawn from a pseudo-random generator seeded by
+    the OS, which is much faster than digesting UUIDs and random enough to avoid
+    collisions, which are checked anyway. Hashes wider than 6 characters without
+    both digits and letters are not drawn, as they would not be parsed as hashes.
+    """
+
+    def __init__(
+        self, existing: Iterable[HashKey], width: int = DEFAULT_HASH_WIDTH
+    ) -> None:
+        validate_hash_width(width)
+        self.width = width
+        self.existing = array("Q", sorted(existing))
+        self.allocated: Set[HashKey] = set()
+        self._random = random.Random()
+
+    @classmethod
+    def from_hashes(
+        cls, existing: Iterable[Hash], width: int = DEFAULT_HASH_WIDTH
+    ) -> "HashAllocator":
+        return cls(existing=(hash_key(hash) for hash in existing), width=width)
+
+    @property
+    def capacity(self) -> int:
+        """Amount of different hashes of `width` characters."""
+        return 16**self.width
+
+    def __len__(self) -> int:
+        """Amount of hashes in use."""
+        return len(self.existing) + len(self.allocated)
+
+    def __contains__(self, hash: Hash) -> bool:
+        return self._is_used(hash_key(hash))
+
+    def _is_used(self, key: HashKey) -> bool:
+        if key in self.allocated:
+            return True
+        position = bisect.bisect_left(self.existing, key)
+        return position < len(self.existing) and self.existing[position] == key
+
+    @property
+    def collision_probability(self) -> float:
+        """Probability for a random hash to be already in use.
+
+        Existing hashes of other widths never collide, so this is an upper bound.
+        """
+        return min(1.0, len(self) / self.capacity)
+
+    def allocate(self, amount: int) -> List[Hash]:
+        """Return `amount` new hashes, different from each other and existing ones."""
+        if len(self) + amount > self.capacity:
+            raise ValueError(
+                f"Cannot allocate {amount} hashes of {self.width} characters,"
+                f" {len(self)} out of {self.capacity} are in use"
+            )
+
+        bits = 4 * self.width
+        hashes: List[Hash] = []
+        while len(hashes) < amount:
+            hash = Hash(f"{self._random.getrandbits(bits):0{self.width}x}")
+            key = hash_key(hash)
+            if not is_hash(hash, self.width) or self._is_used(key):
+                continue
+            self.allocated.add(key)
+            hashes.append(hash)
+
+        return hashes
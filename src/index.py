@@ -0,0 +1,589 @@
+import bisect
+import datetime
+import hashlib
+import logging
+import pickle
+import time
+from array import array
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from src.cache import path_key
+from src.hash import Hash, HashKey, hash_key
+from src.interpreter import (
+    TokenizedLine,
+    analyse_lexically,
+    is_task,
+    parse_task,
+    parsing_version,
+    tokenize_line,
+    tokenize_lines,
+)
+from src.io import write_bytes_atomically
+from src.types import (
+    COMPLETED_TASK_PREFIX,
+    DETAIL_PREFIX,
+    INCOMPLETE_TASK_PREFIX,
+    Tag,
+    Task,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".index"
+# The indexed part of a document is digested in blocks of this size, so that moving
+# its end only requires to digest the last block again
+DIGESTED_BLOCK_SIZE = 1024 * 1024
+# Modification times this recent are not trusted to notice the next modification,
+# as it could happen within the same tick of the file system clock
+RACY_MTIME_NS = 2 * 1_000_000_000
+# Keys of hashes start with a 1, see `hash_key`
+NO_HASH_KEY: HashKey = 0
+TASK_PREFIXES = (INCOMPLETE_TASK_PREFIX, COMPLETED_TASK_PREFIX)
+
+Offset = int
+Key = TypeVar("Key")
+IndexType = TypeVar("IndexType", bound="IncrementalIndex")
+# Size and modification time of a file
+FileStat = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class Record:
+    """Position of a task in a document."""
+
+    offset: Offset  # bytes from the start of the document to the task line
+    line_number: int
+
+
+@dataclass(frozen=True)
+class IndexKeys:
+    """Task attributes a record can be looked up by."""
+
+    hash: Optional[Hash] = None
+    tags: List[Tag] = field(default_factory=list)
+    deadline: Optional[datetime.date] = None
+    done: bool = False
+
+
+def index_path(document_path: Path) -> Path:
+    return document_path.with_name(f"{document_path.name}{INDEX_SUFFIX}")
+
+
+def decode_line(raw_line: bytes) -> str:
+    """Decode a line read in binary mode, like `iter_markdown_lines` would yield it."""
+    line = raw_line.decode("utf-8")
+    if line.endswith("\r\n"):
+        return line[:-2]
+    if line.endswith("\n"):
+        return line[:-1]
+    return line
+
+
+def index_keys(line: str) -> Optional[IndexKeys]:
+    """Return the index keys of a task line, None if it is not a task line."""
+    tokenized_line = TokenizedLine(line_number=0, tokens=tokenize_line(line))
+    if not is_task(tokenized_line.kinds):
+        return None
+
+    task = parse_task(tokenized_line)
+    return IndexKeys(
+        hash=task.hash, tags=task.tags, deadline=task.deadline, done=task.done
+    )
+
+
+def _drop_positions(positions_by_key: Dict[Key, array], *, end: int) -> None:
+    """Drop positions from `end` on, and keys left without positions."""
+    for key in list(positions_by_key):
+        positions = positions_by_key[key]
+        while positions and positions[-1] >= end:
+            positions.pop()
+        if not positions:
+            del positions_by_key[key]
+
+
+def file_stat(path: Path) -> FileStat:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _settled_stat(path: Path) -> Optional[FileStat]:
+    """Return stat of file, None if it was modified too recently to rely on it."""
+    stat = file_stat(path)
+    _, mtime_ns = stat
+    if time.time_ns() - mtime_ns < RACY_MTIME_NS:
+        return None
+    return stat
+
+
+def _digest_blocks(f: BinaryIO, *, start: Offset, end: Offset) -> List[bytes]:
+    """Return digests of the blocks between offsets, `start` is a block boundary."""
+    digests: List[bytes] = []
+    f.seek(start)
+    for block_start in range(start, end, DIGESTED_BLOCK_SIZE):
+        block_size = min(DIGESTED_BLOCK_SIZE, end - block_start)
+        content = f.read(block_size)
+        digests.append(hashlib.blake2b(content, digest_size=16).digest())
+    return digests
+
+
+@dataclass(frozen=True)
+class HighWaterMark:
+    """Part of an append-only document that was already read, up to a complete line.
+
+    That whole part is digested, to notice if the document was modified instead of
+    appended to. Checking the mark reads that part again, unless the size and the
+    modification time of the document did not change since it was digested.
+    """
+
+    size: Offset = 0
+    lines: int = 0
+    # Digest of each block up to the mark, see `DIGESTED_BLOCK_SIZE`
+    block_digests: Tuple[bytes, ...] = ()
+    # Stat of the document when it was digested, unless it was modified too recently
+    stat: Optional[FileStat] = None
+
+    @classmethod
+    def of(
+        cls,
+        path: Path,
+        *,
+        size: Offset,
+        lines: int,
+        previous: Optional["HighWaterMark"] = None,
+    ) -> "HighWaterMark":
+        """Return mark of the first `size` bytes of the document, `lines` lines.
+
+        Blocks before `previous`, a valid mark of the document, are not read again.
+        """
+        stat = _settled_stat(path)
+        reused_digests: Tuple[bytes, ...] = ()
+        if previous is not None:
+            reused_blocks = min(size, previous.size) // DIGESTED_BLOCK_SIZE
+            reused_digests = previous.block_digests[:reused_blocks]
+
+        with path.open("rb") as f:
+            start = len(reused_digests) * DIGESTED_BLOCK_SIZE
+            digests = _digest_blocks(f, start=start, end=size)
+
+        block_digests = (*reused_digests, *digests)
+        return cls(size=size, lines=lines, block_digests=block_digests, stat=stat)
+
+    def is_valid(self, path: Path) -> bool:
+        """Return False if the part of the document up to the mark changed."""
+        if not path.exists():
+            return self.size == 0
+
+        stat = file_stat(path)
+        if self.stat is not None and stat == self.stat:
+            return True
+
+        size, _ = stat
+        if size < self.size:
+            return False
+
+        with path.open("rb") as f:
+            digests = _digest_blocks(f, start=0, end=self.size)
+
+        return tuple(digests) == self.block_digests
+
+
+class AppendedLines:
+    """Lines of a document after a valid high-water mark.
+
+    Once iterated, `mark` is moved forward up to the last complete line. The last line
+    is incomplete if the document does not end with a new line.
+    """
+
+    def __init__(self, path: Path, mark: HighWaterMark) -> None:
+        self.path = path
+        self.mark = mark
+
+    def __iter__(self) -> Iterator[Tuple[Record, str, bool]]:
+        """Yield record and content of each line, and whether the line is complete."""
+        if not self.path.exists():
+            return
+
+        size, lines = self.mark.size, self.mark.lines
+        with self.path.open("rb") as f:
+            f.seek(size)
+            offset = size
+            line_number = lines
+            for raw_line in f:
+                line_number += 1
+                record = Record(offset=offset, line_number=line_number)
+                offset += len(raw_line)
+                is_complete = raw_line.endswith(b"\n")
+                if is_complete:
+                    size, lines = offset, line_number
+
+                yield record, decode_line(raw_line), is_complete
+
+        if size == self.mark.size:
+            self.mark = replace(self.mark, stat=_settled_stat(self.path))
+        else:
+            self.mark = HighWaterMark.of(
+                self.path, size=size, lines=lines, previous=self.mark
+            )
+
+
+class IncrementalIndex:
+    """Base of indexes updated incrementally while their document is only appended to.
+
+    Only lines after the high-water mark are read (see `_read`), and the whole document
+    is read again if the part before the mark changed. Records are kept by position in
+    `offsets` and `line_numbers`, and the attributes named in `STATE` are stored too,
+    in `directory` by default.
+    """
+
+    NAME = "index"
+    DEFAULT_DIRECTORY: Optional[Path] = None
+    STATE: Tuple[str, ...] = ("offsets", "line_numbers")
+
+    def __init__(self, document_path: Path, directory: Optional[Path] = None) -> None:
+        self.document_path = document_path
+        self.directory = directory or self.DEFAULT_DIRECTORY
+        self._reset()
+
+    def _reset(self) -> None:
+        self.offsets = array("Q")
+        self.line_numbers = array("I")
+        # Indexed part of the document
+        self.mark = HighWaterMark()
+
+    @property
+    def path(self) -> Path:
+        assert self.directory, "Oops! I expected a directory to store the index in :S"
+        return self.directory / f"{path_key(self.document_path).hex()}.pickle"
+
+    @classmethod
+    def load(
+        cls: Type[IndexType], document_path: Path, directory: Optional[Path] = None
+    ) -> IndexType:
+        """Load index from disk, start with an empty one if it is missing or stale.
+
+        Call `update` to index any new content.
+        """
+        index = cls(document_path=document_path, directory=directory)
+        path = index.path
+        if not path.exists():
+            return index
+
+        try:
+            with path.open("rb") as f:
+                version, mark, *state = pickle.load(f)
+        except Exception:
+            logger.info(f"Ignoring unreadable {cls.NAME} at {path}")
+            return index
+
+        if version != parsing_version():
+            logger.info(f"Ignoring {cls.NAME} created by interpreter v{version}")
+            return index
+
+        index.mark = mark
+        for name, value in zip(cls.STATE, state):
+            setattr(index, name, value)
+        return index
+
+    @classmethod
+    def load_updated(
+        cls: Type[IndexType], document_path: Path, directory: Optional[Path] = None
+    ) -> IndexType:
+        """Load index of document, and update it with any lines appended since."""
+        index = cls.load(document_path=document_path, directory=directory)
+        state_before = (index.mark, len(index.offsets))
+        index.update()
+        if (index.mark, len(index.offsets)) != state_before:
+            index.save()
+        return index
+
+    def save(self) -> None:
+        state = (getattr(self, name) for name in self.STATE)
+        content = pickle.dumps(
+            (parsing_version(), self.mark, *state), protocol=pickle.HIGHEST_PROTOCOL
+        )
+        write_bytes_atomically(path=self.path, content=content)
+
+    def record(self, position: int) -> Record:
+        return Record(
+            offset=self.offsets[position], line_number=self.line_numbers[position]
+        )
+
+    def _records(self, positions: Iterable[int]) -> List[Record]:
+        return [self.record(position) for position in positions]
+
+    def is_stale(self) -> bool:
+        """Return True if the indexed part of the document changed."""
+        return not self.mark.is_valid(self.document_path)
+
+    def update(self) -> int:
+        """Index lines appended since the last update, return the new records amount.
+
+        If the indexed part of the document changed, index it from scratch.
+        """
+        if self.is_stale():
+            logger.info(f"Indexing {self.document_path} from scratch ({self.NAME})")
+            self._reset()
+
+        lines = AppendedLines(path=self.document_path, mark=self.mark)
+        records_amount = self._read(lines)
+        self.mark = self._next_mark(lines)
+        return records_amount
+
+    def _read(self, lines: AppendedLines) -> int:
+        """Index appended lines, return the new records amount."""
+        raise NotImplementedError
+
+    def _next_mark(self, lines: AppendedLines) -> HighWaterMark:
+        """Return the mark to read from next time, once `lines` were read."""
+        return lines.mark
+
+    def rebuild(self) -> int:
+        """Index the whole document from scratch, return the records amount."""
+        self._reset()
+        return self.update()
+
+
+@dataclass(frozen=True)
+class TaskBlock:
+    """Lines of a task and its details, as found in the document."""
+
+    record: Record
+    lines: List[str]
+
+
+def iter_task_blocks(
+    lines: Iterable[Tuple[Record, str, bool]]
+) -> Iterator[Tuple[TaskBlock, bool]]:
+    """Yield task blocks and whether they are complete.
+
+    A block is complete once a line that is not one of its details follows it: the
+    last block of the document could still get more details appended.
+    """
+    block: Optional[TaskBlock] = None
+    for record, line, _ in lines:
+        if block is not None and line.startswith(DETAIL_PREFIX):
+            block.lines.append(line)
+            continue
+
+        if block is not None:
+            yield block, True
+            block = None
+        if line.startswith(TASK_PREFIXES):
+            block = TaskBlock(record=record, lines=[line])
+
+    if block is not None:
+        yield block, False
+
+
+class TaskBlockIndex(IncrementalIndex):
+    """Base of indexes of tasks together with their details, see `TaskBlock`.
+
+    The mark stays before the last task, which is read again next time, as details
+    could be appended to it. The last task is not stored.
+    """
+
+    def _reset(self) -> None:
+        super()._reset()
+        self.last_task: Optional[TaskBlock] = None
+
+    def _read(self, lines: AppendedLines) -> int:
+        tasks_before = len(self.offsets)
+        self.last_task = None
+        for block, is_complete in iter_task_blocks(lines):
+            if is_complete:
+                self._add(block)
+            else:
+                self.last_task = block
+
+        return len(self.offsets) - tasks_before
+
+    def _add(self, block: TaskBlock) -> None:
+        raise NotImplementedError
+
+    def _next_mark(self, lines: AppendedLines) -> HighWaterMark:
+        if self.last_task is None:
+            return lines.mark
+
+        record = self.last_task.record
+        return HighWaterMark.of(
+            self.document_path,
+            size=record.offset,
+            lines=record.line_number - 1,
+            previous=lines.mark,
+        )
+
+
+class DocumentIndex(IncrementalIndex):
+    """Map task hashes, tags and deadlines to the records they are in.
+
+    The index is stored next to the document, see `index_path`. Hashes are stored as
+    keys (see `hash_key`), and tags and deadlines are mapped to arrays of record
+    positions, so that the index is quick to load and to save even for archives of
+    millions of tasks.
+    """
+
+    STATE = (
+        *IncrementalIndex.STATE,
+        "hash_keys",
+        "done",
+        "positions_by_tag",
+        "positions_by_deadline",
+    )
+
+    def _reset(self) -> None:
+        super()._reset()
+        self.hash_keys = array("Q")  # NO_HASH_KEY for tasks without a hash
+        self.done = array("B")
+        self.positions_by_tag: Dict[Tag, array] = {}
+        self.positions_by_deadline: Dict[datetime.date, array] = {}
+        self._positions_by_hash_key: Optional[Dict[HashKey, int]] = None
+
+    @property
+    def path(self) -> Path:
+        return index_path(self.document_path)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def records(self) -> List[Record]:
+        return self._records(range(len(self)))
+
+    @property
+    def tags(self) -> Set[Tag]:
+        return set(self.positions_by_tag)
+
+    def iter_hash_keys(self) -> Iterator[HashKey]:
+        """Yield keys of the hashes of every record, in document order."""
+        return (key for key in self.hash_keys if key != NO_HASH_KEY)
+
+    def iter_keys(self) -> Iterator[IndexKeys]:
+        """Yield keys of every record, in document order, without their hash."""
+        tags: List[List[Tag]] = [[] for _ in range(len(self))]
+        for tag, positions in self.positions_by_tag.items():
+            for position in positions:
+                tags[position].append(tag)
+        deadlines: List[Optional[datetime.date]] = [None] * len(self)
+        for deadline, positions in self.positions_by_deadline.items():
+            for position in positions:
+                deadlines[position] = deadline
+
+        for position in range(len(self)):
+            yield IndexKeys(
+                tags=tags[position],
+                deadline=deadlines[position],
+                done=bool(self.done[position]),
+            )
+
+    def _add(self, record: Record, keys: IndexKeys) -> None:
+        position = len(self)
+        self.offsets.append(record.offset)
+        self.line_numbers.append(record.line_number)
+        self.hash_keys.append(hash_key(keys.hash) if keys.hash else NO_HASH_KEY)
+        self.done.append(keys.done)
+        for tag in keys.tags:
+            self.positions_by_tag.setdefault(tag, array("I")).append(position)
+        if keys.deadline:
+            positions = self.positions_by_deadline.setdefault(keys.deadline, array("I"))
+            positions.append(position)
+        self._positions_by_hash_key = None
+
+    def _drop_unindexed_records(self) -> None:
+        """Drop records of lines that were not complete when they were indexed."""
+        end = bisect.bisect_left(self.offsets, self.mark.size)
+        if end == len(self):
+            return
+
+        for column in (self.offsets, self.line_numbers, self.hash_keys, self.done):
+            del column[end:]
+        _drop_positions(self.positions_by_tag, end=end)
+        _drop_positions(self.positions_by_deadline, end=end)
+        self._positions_by_hash_key = None
+
+    def _read(self, lines: AppendedLines) -> int:
+        self._drop_unindexed_records()
+        records_before = len(self)
+        for record, line, _ in lines:
+            if (keys := index_keys(line)) is not None:
+                self._add(record, keys)
+
+        return len(self) - records_before
+
+    def find_by_hash(self, hash: Hash) -> Optional[Record]:
+        if self._positions_by_hash_key is None:
+            # The last task with a hash wins
+            self._positions_by_hash_key = {
+                key: position
+                for position, key in enumerate(self.hash_keys)
+                if key != NO_HASH_KEY
+            }
+        position = self._positions_by_hash_key.get(hash_key(hash))
+        return None if position is None else self.record(position)
+
+    def find_by_tag(self, tag: Tag) -> List[Record]:
+        return self._records(self.positions_by_tag.get(tag, ()))
+
+    def find_by_deadline(self, deadline: datetime.date) -> List[Record]:
+        return self._records(self.positions_by_deadline.get(deadline, ()))
+
+    def iter_deadlines(
+        self,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+    ) -> Iterator[Tuple[datetime.date, List[Record]]]:
+        """Yield deadlines between `start` and `end`, both included, in order."""
+        deadlines = sorted(
+            deadline
+            for deadline in self.positions_by_deadline
+            if (start is None or start <= deadline) and (end is None or deadline <= end)
+        )
+        for deadline in deadlines:
+            yield deadline, self.find_by_deadline(deadline)
+
+    def read_tasks(self, records: Iterable[Record]) -> Iterator[Task]:
+        """Read tasks straight from their records, without reading the whole file."""
+        with self.document_path.open("rb") as f:
+            for record in records:
+                yield read_task(f, record=record)
+
+
+def load_index(document_path: Path) -> DocumentIndex:
+    """Load index of document, and update it with any lines appended since."""
+    return DocumentIndex.load_updated(document_path=document_path)
+
+
+def read_task(f: BinaryIO, *, record: Record) -> Task:
+    """Parse the task, and its details, at record."""
+    f.seek(record.offset)
+    lines = [decode_line(f.readline())]
+    while (raw_line := f.readline()).startswith(b"  - "):
+        lines.append(decode_line(raw_line))
+
+    return parse_task_lines(lines, first_line_number=record.line_number)
+
+
+def parse_task_lines(lines: List[str], *, first_line_number: int) -> Task:
+    """Parse the task in the first line, with its details in the following ones."""
+    tokenized_lines = tokenize_lines(lines, first_line_number=first_line_number)
+    items = analyse_lexically(tokenized_lines)
+    if not items:
+        raise ValueError(f"Expected a task at line {first_line_number}, got nothing")
+
+    task, *_ = items
+    if not isinstance(task, Task):
+        raise ValueError(f"Expected a task at line {first_line_number}, got {task}")
+
+    return task
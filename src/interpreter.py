@@ -1,11 +1,28 @@
 from __future__ import annotations
 
+import concurrent.futures
 import datetime
+import functools
+import itertools
+import os
 import re
-from dataclasses import dataclass
-from typing import Iterable, Iterator, List, Optional, Set, Tuple, Union, cast
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
-from src.hash import Hash
+from src.hash import DEFAULT_HASH_WIDTH, Hash, hash_pattern, validate_hash_width
+from src.io import iter_markdown_lines, read_markdown_file
 from src.types import (
     EmptyLine,
     ExternalReference,
@@ -16,47 +33,67 @@ from src.types import (
     Task,
     TaskDetail,
     Title,
+    get_source_text,
+    remember_source_text,
 )
 
 NEW_LINE = "\n"
 
+# Bump it whenever tokens, items or the way they are parsed change, so that any cached
+# parsing results are discarded
+INTERPRETER_VERSION = 7
+# Hashes are parsed up to this width, see `set_hash_width`
+_hash_width = DEFAULT_HASH_WIDTH
+
+ParsingVersion = Tuple[int, int]
+
 
-@dataclass
+def parsing_version() -> ParsingVersion:
+    """Return the version of parsing results, to discard cached ones that differ."""
+    return INTERPRETER_VERSION, _hash_width
+
+
+@dataclass(slots=True)
 class TokenizedLine:
     line_number: int
     tokens: List[Token]
+    # Original line, if known
+    text: str = field(default="", repr=False, compare=False)
+    # Kinds of tokens in the line, see `TOKEN_KINDS`
+    kinds: TokenKinds = field(init=False, repr=False, compare=False)
 
-    @property
-    def types(self) -> Set:
-        token_classes = (token.__class__ for token in self.tokens)
-        return set(token_classes)
+    def __post_init__(self) -> None:
+        kinds = 0
+        for token in self.tokens:
+            kinds |= TOKEN_KINDS[token.__class__]
+        self.kinds = kinds
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class IncompleteSymbol:
     # `- [ ] `
     ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CompletedSymbol:
     # `- [x] `
     ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TagToken:
     # Don't make "type" an enum, because it will cause you problems to add new tags via
     # config, or parse unknown tags
     token: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class HashToken:
     hash: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Text:
     text: str
 
@@ -64,7 +101,7 @@ class Text:
         return self.text
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class EscapedText:
     text: str
 
@@ -72,34 +109,34 @@ class EscapedText:
         return self.text
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Indentation:
     spaces: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BulletPointPrefix:
     ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class EmptyLineToken:
     ...
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TitleToken:
     title: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ExternalReferenceToken:
     number: int
     path: str
     description: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ExternalReferencesHeaderToken:
     ...
 
@@ -119,10 +156,75 @@ Token = Union[
     HashToken,
 ]
 
-
-def tokenize_document(document: str) -> Iterator[TokenizedLine]:
-    for line_number, line in enumerate(document.split(NEW_LINE)):
-        yield TokenizedLine(line_number=line_number + 1, tokens=tokenize_line(line))
+# Tokens without state are shared by all lines instead of creating one per line
+INCOMPLETE_SYMBOL = IncompleteSymbol()
+COMPLETED_SYMBOL = CompletedSymbol()
+BULLET_POINT_PREFIX = BulletPointPrefix()
+EMPTY_LINE_TOKEN = EmptyLineToken()
+EXTERNAL_REFERENCES_HEADER_TOKEN = ExternalReferencesHeaderToken()
+
+# Each token class is identified by a bit flag, so the kinds of tokens in a line fit in
+# a single integer and classifying a line only takes a few integer operations
+TokenKinds = int
+
+INCOMPLETE_SYMBOL_KIND: TokenKinds = 1 << 0
+COMPLETED_SYMBOL_KIND: TokenKinds = 1 << 1
+TAG_KIND: TokenKinds = 1 << 2
+TEXT_KIND: TokenKinds = 1 << 3
+ESCAPED_TEXT_KIND: TokenKinds = 1 << 4
+INDENTATION_KIND: TokenKinds = 1 << 5
+BULLET_POINT_PREFIX_KIND: TokenKinds = 1 << 6
+EMPTY_LINE_KIND: TokenKinds = 1 << 7
+TITLE_KIND: TokenKinds = 1 << 8
+EXTERNAL_REFERENCE_KIND: TokenKinds = 1 << 9
+EXTERNAL_REFERENCES_HEADER_KIND: TokenKinds = 1 << 10
+HASH_KIND: TokenKinds = 1 << 11
+
+TOKEN_KINDS: Dict[Type[Token], TokenKinds] = {
+    IncompleteSymbol: INCOMPLETE_SYMBOL_KIND,
+    CompletedSymbol: COMPLETED_SYMBOL_KIND,
+    TagToken: TAG_KIND,
+    Text: TEXT_KIND,
+    EscapedText: ESCAPED_TEXT_KIND,
+    Indentation: INDENTATION_KIND,
+    BulletPointPrefix: BULLET_POINT_PREFIX_KIND,
+    EmptyLineToken: EMPTY_LINE_KIND,
+    TitleToken: TITLE_KIND,
+    ExternalReferenceToken: EXTERNAL_REFERENCE_KIND,
+    ExternalReferencesHeaderToken: EXTERNAL_REFERENCES_HEADER_KIND,
+    HashToken: HASH_KIND,
+}
+
+TASK_SYMBOL_KINDS = INCOMPLETE_SYMBOL_KIND | COMPLETED_SYMBOL_KIND
+TASK_KINDS = TEXT_KIND | TASK_SYMBOL_KINDS | TAG_KIND | HASH_KIND | ESCAPED_TEXT_KIND
+DETAIL_MANDATORY_KINDS = INDENTATION_KIND | BULLET_POINT_PREFIX_KIND | TEXT_KIND
+DETAIL_KINDS = DETAIL_MANDATORY_KINDS | ESCAPED_TEXT_KIND
+
+
+def token_kinds(token_types: Iterable[Type[Token]]) -> TokenKinds:
+    kinds = 0
+    for token_type in token_types:
+        kinds |= TOKEN_KINDS[token_type]
+    return kinds
+
+
+# Turns a chunk of text without escaped text into tokens
+Lexer = Callable[[str], List[Token]]
+
+
+def tokenize_document(
+    document: str, lexer: Optional[Lexer] = None, first_line_number: int = 1
+) -> Iterator[TokenizedLine]:
+    lines = document.split(NEW_LINE)
+    return tokenize_lines(lines, lexer=lexer, first_line_number=first_line_number)
+
+
+def tokenize_lines(
+    lines: Iterable[str], lexer: Optional[Lexer] = None, first_line_number: int = 1
+) -> Iterator[TokenizedLine]:
+    for line_number, line in enumerate(lines, start=first_line_number):
+        tokens = tokenize_line(line, lexer=lexer)
+        yield TokenizedLine(line_number=line_number, tokens=tokens, text=line)
 
 
 HAS_DONE_PREFIX = re.compile(r"^- \[x\]\s")  # starts with `- [x] `
@@ -130,8 +232,33 @@ HAS_INCOMPLETE_PREFIX = re.compile(r"^(- \[\s\]\s)")  # starts with `- [ ] `
 INDENTATION_PATTERN = re.compile(r"^(\s*)")  # spaces
 HAS_BULLET_POINT_PREFIX = re.compile(r"^-\s")
 HAS_TAGS = re.compile(r"\s#([a-z]:[a-z0-9-_,]*)")  # `#g:group1_b`
-HAS_HASH = re.compile(r"\s#([a-z0-9]{6})$")  # `#34ja9i`
+HAS_HASH = re.compile(rf"\s#({hash_pattern()})$")  # `#34ja9i`
 EXTERNAL_REFERENCE_PATTERN = re.compile(r'^\[([0-9]+)\]: ([^\s]+)\s"(.*)"$')
+EXTERNAL_REFERENCES_HEADER = "<!-- External references -->"
+
+# Single-pass lexer patterns: they combine the patterns above so that a chunk is
+# classified and sliced with one match for its prefix and one scan for its suffixes
+LINE_PREFIX_PATTERN = re.compile(
+    r"(?P<indentation> \s*)?"
+    r"(?:(?P<done>- \[x\]\s)|(?P<incomplete>- \[\s\]\s)|(?P<bullet>-\s))?"
+)
+LINE_PREFIX_SYMBOLS: Dict[Optional[str], Tuple[Token, str]] = {
+    "done": (COMPLETED_SYMBOL, "- [x] "),
+    "incomplete": (INCOMPLETE_SYMBOL, "- [ ] "),
+    "bullet": (BULLET_POINT_PREFIX, "- "),
+}
+LINE_SUFFIX_PATTERN = re.compile(rf"(\s)#(?:([a-z]:[a-z0-9-_,]*)|({hash_pattern()})$)")
+
+
+def set_hash_width(width: int) -> None:
+    """Parse hashes of up to `width` characters from now on, see `hash_pattern`."""
+    global _hash_width, HAS_HASH, LINE_SUFFIX_PATTERN
+    validate_hash_width(width)
+    _hash_width = width
+    HAS_HASH = re.compile(rf"\s#({hash_pattern(width)})$")
+    LINE_SUFFIX_PATTERN = re.compile(
+        rf"(\s)#(?:([a-z]:[a-z0-9-_,]*)|({hash_pattern(width)})$)"
+    )
 
 
 IsEscaped = bool
@@ -147,76 +274,47 @@ def split_escaped(*, text: str) -> Iterator[Tuple[IsEscaped, str]]:
 
     where the second member of the tuple is True if the text is escaped.
 
-    Results should always contain
+    Results should always contain at least one non-escaped chunk, even if the text is
+    empty.
     """
-    if not text:
-        yield (False, "")
-        return
-
-    is_escaped_text = False
     # Problem, when one of the backticks is not closed, the last chunk should not
-    # contain one the last backtick as an regular (non-escaped) character
+    # contain one the last backtick as an regular (non-escaped) character, hence only
+    # pairs of backticks escape text
     BACKTICK = "`"
-    backtick_amount = sum((1 for character in text if character == BACKTICK))
-    all_backticks_are_closed = backtick_amount % 2 == 0
-
-    buffer: str = ""
-
-    def reset_buffer() -> None:
-        nonlocal buffer
-        buffer = ""
-
-    def append_to_buffer(character: str) -> None:
-        nonlocal buffer
-        buffer += character
-
-    def toggle_escaped_state() -> None:
-        nonlocal is_escaped_text
-        is_escaped_text = not is_escaped_text
-
-    backticks_found_so_far = 0
-    for character in text:
-        if character == BACKTICK:
-            backticks_found_so_far += 1
-            if (
-                not all_backticks_are_closed
-                and backticks_found_so_far == backtick_amount
-            ):
-                assert is_escaped_text is False
-                append_to_buffer(character)
-                # do not yield! you've just buffered the last not closed backtick, just
-                # carry on checking characters as usual
-                continue
+    backtick_pairs = text.count(BACKTICK) // 2
 
-            if is_escaped_text is True:  # buffer contains escaped text
-                yield (is_escaped_text, buffer)
-                reset_buffer()
-                append_to_buffer(character)
-            else:  # buffer contains non-escaped text
-                append_to_buffer(character)
-                yield (is_escaped_text, buffer)
-                reset_buffer()
-            toggle_escaped_state()
-        else:
-            append_to_buffer(character)
+    chunk_start = 0
+    search_start = 0
+    for _ in range(backtick_pairs):
+        opening = text.find(BACKTICK, search_start)
+        escaped_start = opening + 1
+        closing = text.find(BACKTICK, escaped_start)
+
+        # opening backtick belongs to the non-escaped chunk before it, and closing
+        # backtick to the non-escaped chunk after it
+        yield (False, text[chunk_start:escaped_start])
+        yield (True, text[escaped_start:closing])
+        chunk_start = closing
+        search_start = closing + 1
 
-    yield (is_escaped_text, buffer)
+    yield (False, text[chunk_start:])
 
 
-def tokenize_line(original_line: str) -> List[Token]:
+def tokenize_line(original_line: str, lexer: Optional[Lexer] = None) -> List[Token]:
+    tokenize_text = lexer or DEFAULT_LEXER
     tokens: List[Token] = []
 
     # line from which identified tokens will substracted token by token
     line = original_line
 
     if not line:
-        return [EmptyLineToken()]
+        return [EMPTY_LINE_TOKEN]
 
     for is_escaped, text in split_escaped(text=line):
         if is_escaped:
             tokens.append(EscapedText(text=text))
         else:
-            non_escaped_tokens = tokenize_escaped_text(text)
+            non_escaped_tokens = tokenize_text(text)
             tokens.extend(non_escaped_tokens)
 
     return tokens
@@ -250,8 +348,8 @@ def tokenize_escaped_text(original_text: str) -> List[Token]:
         ]
 
     # Tokenize external references header
-    if text == "<!-- External references -->":
-        return [ExternalReferencesHeaderToken()]
+    if text == EXTERNAL_REFERENCES_HEADER:
+        return [EXTERNAL_REFERENCES_HEADER_TOKEN]
 
     # Tokenize indentation
     if text.startswith(" "):
@@ -262,13 +360,13 @@ def tokenize_escaped_text(original_text: str) -> List[Token]:
 
     # Tokenize done/todo prefix
     if HAS_DONE_PREFIX.match(text):
-        tokens.append(CompletedSymbol())
+        tokens.append(COMPLETED_SYMBOL)
         text = text.replace("- [x] ", "", 1)
     elif HAS_INCOMPLETE_PREFIX.match(text):
-        tokens.append(IncompleteSymbol())
+        tokens.append(INCOMPLETE_SYMBOL)
         text = text.replace("- [ ] ", "", 1)
     elif HAS_BULLET_POINT_PREFIX.match(text):
-        tokens.append(BulletPointPrefix())
+        tokens.append(BULLET_POINT_PREFIX)
         text = text.replace("- ", "", 1)
 
     # Tokenize hash
@@ -304,6 +402,103 @@ def tokenize_escaped_text(original_text: str) -> List[Token]:
     return tokens
 
 
+def tokenize_escaped_text_in_single_pass(original_text: str) -> List[Token]:
+    """Tokenize text chunk that contains nothing that requires escaping.
+
+    Produces the same tokens as `tokenize_escaped_text`, but instead of searching and
+    replacing each token one after another, the chunk is scanned once from left to
+    right: one match classifies and slices the line prefix (indentation, task symbols,
+    bullet point) and one scan collects the tags and hash, so the remaining text is
+    only copied once.
+
+    A few unusual chunks (tabs between tokens, `#` symbols that are not part of a tag
+    or hash) are delegated to `tokenize_escaped_text`, because there the original
+    search-and-replace behaviour does not map to plain slicing.
+    """
+    text = original_text
+
+    # Whole line tokens are identified by their first character
+    first_character = text[:1]
+    if first_character == "#":
+        if text.startswith("##"):
+            return [TitleToken(title=text.replace("## ", "", 1))]
+    elif first_character == "[":
+        if matches := EXTERNAL_REFERENCE_PATTERN.match(text):
+            return [
+                ExternalReferenceToken(
+                    number=int(matches.group(1)),
+                    path=matches.group(2),
+                    description=matches.group(3),
+                )
+            ]
+    elif first_character == "<":
+        if text == EXTERNAL_REFERENCES_HEADER:
+            return [EXTERNAL_REFERENCES_HEADER_TOKEN]
+
+    tokens: List[Token] = []
+
+    # Tokenize indentation and done/todo/bullet point prefix
+    start = 0
+    prefix = cast(re.Match, LINE_PREFIX_PATTERN.match(text))
+    if prefix_end := prefix.end():
+        indentation_end = prefix.end("indentation")
+        if indentation_end > 0:
+            tokens.append(Indentation(spaces=indentation_end))
+            start = indentation_end
+
+        if prefix.lastgroup in LINE_PREFIX_SYMBOLS:
+            symbol_token, symbol = LINE_PREFIX_SYMBOLS[prefix.lastgroup]
+            tokens.append(symbol_token)
+            if text.startswith(symbol, start):
+                start = prefix_end
+            else:
+                # The symbol contains whitespaces other than a space, replicate how
+                # `tokenize_escaped_text` removes the symbol
+                text = text[start:].replace(symbol, "", 1)
+                start = 0
+
+    # Tokenize tags and hash
+    if text.find("#", start) == -1:
+        if start < len(text):
+            tokens.append(Text(text=text[start:]))
+        return tokens
+
+    # Splitting by the suffixes yields, for each suffix found, its preceding text, the
+    # whitespace before its `#` and either its tag or its hash
+    pieces = LINE_SUFFIX_PATTERN.split(text[start:] if start else text)
+    suffix_amount = len(pieces) // 4
+    if not suffix_amount:
+        tokens.append(Text(text=pieces[0]))
+        return tokens
+
+    whitespaces = pieces[1::4]
+    if whitespaces.count(" ") != suffix_amount or text.count("#") != suffix_amount:
+        return tokenize_escaped_text(original_text)
+
+    # remove double space between the text and the tags/hash
+    remaining_text = "".join(pieces[::4]).rstrip(" ")
+
+    # Tokenize text
+    if remaining_text:
+        tokens.append(Text(text=remaining_text))
+
+    # Add tags after text
+    tokens.extend([TagToken(token=raw_tag) for raw_tag in pieces[2::4] if raw_tag])
+
+    # Add hash at the end
+    if raw_hash := pieces[-2]:
+        tokens.append(HashToken(hash=raw_hash))
+
+    return tokens
+
+
+LEXERS: Dict[str, Lexer] = {
+    "multi-pass": tokenize_escaped_text,
+    "single-pass": tokenize_escaped_text_in_single_pass,
+}
+DEFAULT_LEXER: Lexer = tokenize_escaped_text
+
+
 PseudoItem = Union[Item, TaskDetail]
 
 # NOTE: failing if you find a tag outside a task is something that should happen in
@@ -311,143 +506,165 @@ PseudoItem = Union[Item, TaskDetail]
 # there is an incorrect syntax, etc.
 
 
-def analyse_lexically(document: Iterator[TokenizedLine]) -> List[Item]:
+def analyse_lexically(document: Iterable[TokenizedLine]) -> List[Item]:
+    return list(iter_analysed_items(document))
+
+
+def iter_analysed_items(document: Iterable[TokenizedLine]) -> Iterator[Item]:
     """
     Line by line:
         1. interpret line using its tokens
         2. check if buffer exists
         3. decide if to flush buffer or to compose with buffer
+
+    Items are yielded as soon as they are complete, e.g.: a task is yielded once the
+    next line shows that it has no more details.
     """
-    parsed_items: List[Item] = []
+    lines = iter(document)
+    previous_item: Optional[Item] = None
     buffer: Optional[PseudoItem] = None
-    for line in document:
-        token_types = line.types
+    buffered_lines: List[str] = []
+    for line in lines:
+        kinds = line.kinds
 
-        if is_empty_line(token_types):
+        if is_empty_line(kinds):
             if buffer:
-                parsed_items.append(cast(Item, buffer))
+                yield _flush_task(cast(Task, buffer), buffered_lines)
                 buffer = None
 
-            empty_line = EmptyLine()
-            parsed_items.append(empty_line)
+            previous_item = EmptyLine()
+            yield previous_item
             continue
 
-        if is_task(token_types):
+        if is_task(kinds):
             task = parse_task(line)
             if buffer:
-                parsed_items.append(cast(Item, buffer))
+                previous_item = _flush_task(cast(Task, buffer), buffered_lines)
+                yield previous_item
             buffer = task
+            buffered_lines = [line.text]
             continue
 
-        if is_detail(token_types):
+        if is_detail(kinds):
             detail = parse_task_detail(line)
             if not buffer:
-                raise ValueError("You cannot have details outside a task")
+                raise ValueError(
+                    f"You cannot have details outside a task (line {line.line_number})"
+                )
             else:
-                # Compose detail with task in buffer
+                # Compose detail with task in buffer. The buffered task is not shared
+                # with anyone until it is yielded, so its details can be appended in
+                # place instead of copying them with `Task.add_detail` on every line
                 partially_parsed_task = cast(Task, buffer)
-                updated_task = partially_parsed_task.add_detail(detail)
-                buffer = updated_task
+                partially_parsed_task.details.append(detail)
+                buffered_lines.append(line.text)
                 continue
 
-        if is_external_references_header(token_types):
-            previous_line = parsed_items[-1]
-            if not isinstance(previous_line, EmptyLine):
-                raise ValueError("Empty line expected before external reference header")
+        if is_external_references_header(kinds):
+            if not isinstance(previous_item, EmptyLine):
+                raise ValueError(
+                    "Empty line expected before external reference header"
+                    f" (line {line.line_number})"
+                )
 
             external_references_header = ExternalReferencesHeader()
-            next_line = next(document)
-            if not is_empty_line(next_line.types):
-                raise ValueError("Empty line expected after external reference header")
+            next_line = next(lines, None)
+            if next_line is None or not is_empty_line(next_line.kinds):
+                raise ValueError(
+                    "Empty line expected after external reference header"
+                    f" (line {line.line_number})"
+                )
 
-            parsed_items.append(external_references_header)
-            parsed_items.append(EmptyLine())
+            yield external_references_header
+            previous_item = EmptyLine()
+            yield previous_item
 
             buffer = None
             continue
 
-        if is_external_reference(token_types):
+        if is_external_reference(kinds):
             if buffer:
-                raise ValueError("Empty line expected before external references")
+                raise ValueError(
+                    "Empty line expected before external references"
+                    f" (line {line.line_number})"
+                )
 
             external_reference = parse_external_reference(line)
-            parsed_items.append(external_reference)
+            remember_source_text(external_reference, line.text)
+            previous_item = external_reference
+            yield external_reference
             # TODO: ensure that once you find the first external reference, nothing
             # else can be added to the WIP file
             continue
 
-        if is_title(token_types):
+        if is_title(kinds):
             assert not buffer, "I didn't expect to have anything buffered at this point"
 
             title = parse_title(line)
-            parsed_items.append(title)
+            remember_source_text(title, line.text)
+            previous_item = title
+            yield title
 
             continue
 
     if buffer:
-        parsed_items.append(cast(Item, buffer))
-
-    return parsed_items
-
+        yield _flush_task(cast(Task, buffer), buffered_lines)
 
-def is_empty_line(token_types: Set) -> bool:
-    return {EmptyLineToken} == token_types
 
+def _flush_task(task: Task, lines: List[str]) -> Task:
+    if all(lines):  # task and detail lines are never empty, unless they are unknown
+        remember_source_text(task, NEW_LINE.join(lines))
+    return task
 
-def is_task(token_types: Set) -> bool:
-    """Drop expected token types, if any left, return False"""
-    remaining_tokens = token_types
-
-    # Must have text
-    if Text in token_types:
-        remaining_tokens = remaining_tokens - {Text}
-    else:
-        return False
-
-    # Must have completed or incomplete prefix
-    if IncompleteSymbol in token_types or CompletedSymbol in token_types:
-        remaining_tokens = remaining_tokens - {IncompleteSymbol, CompletedSymbol}
-    else:
-        return False
-
-    optional_tokens = {TagToken, HashToken, EscapedText}
-    remaining_tokens = remaining_tokens - optional_tokens
 
-    if remaining_tokens:
-        return False
+def is_empty_line(kinds: TokenKinds) -> bool:
+    return kinds == EMPTY_LINE_KIND
 
-    return True
 
+def is_task(kinds: TokenKinds) -> bool:
+    # Must have text and completed or incomplete prefix, optionally tags, hash and
+    # escaped text, and nothing else
+    return (
+        bool(kinds & TEXT_KIND)
+        and bool(kinds & TASK_SYMBOL_KINDS)
+        and not kinds & ~TASK_KINDS
+    )
 
-def is_detail(token_types: Set) -> bool:
-    mandatory_tokens = {Indentation, BulletPointPrefix, Text}
-    optional_tokens = {EscapedText}
 
-    if token_types < mandatory_tokens:
+def is_detail(kinds: TokenKinds) -> bool:
+    is_strict_subset = not kinds & ~DETAIL_MANDATORY_KINDS
+    if is_strict_subset and kinds != DETAIL_MANDATORY_KINDS:
         # at least one mandatory token is missing
         return False
 
-    unexpected_tokens = token_types - mandatory_tokens - optional_tokens
-    if unexpected_tokens:
+    unexpected_kinds = kinds & ~DETAIL_KINDS
+    if unexpected_kinds:
         return False
 
     return True
 
 
-def is_external_references_header(token_types: Set) -> bool:
-    return {ExternalReferencesHeaderToken} == token_types
+def is_external_references_header(kinds: TokenKinds) -> bool:
+    return kinds == EXTERNAL_REFERENCES_HEADER_KIND
 
 
-def is_external_reference(token_types: Set) -> bool:
-    return {ExternalReferenceToken} == token_types
+def is_external_reference(kinds: TokenKinds) -> bool:
+    return kinds == EXTERNAL_REFERENCE_KIND
 
 
-def is_title(token_types: Set) -> bool:
-    return {TitleToken} == token_types
+def is_title(kinds: TokenKinds) -> bool:
+    return kinds == TITLE_KIND
 
 
 def parse_tag_token(tag: TagToken) -> Tag:
-    _type, value = tag.token.split(":")
+    return _parse_tag(tag.token)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_tag(raw_tag: str) -> Tag:
+    # Tags are immutable and the same few tags are used across the whole document, so
+    # all tasks share the same `Tag` instances
+    _type, value = raw_tag.split(":")
     return Tag(type=_type, value=value)
 
 
@@ -478,7 +695,7 @@ def parse_task(line: TokenizedLine) -> Task:
         deadline = datetime.date.fromisoformat(raw_deadline)
 
     task = Task(
-        done=prefix == CompletedSymbol(),
+        done=prefix == COMPLETED_SYMBOL,
         description="".join((token.to_str() for token in description_tokens)),
         tags=tags,
         details=[],
@@ -527,13 +744,158 @@ def parse_title(line: TokenizedLine) -> Title:
     return Title(title=title.title)
 
 
-def parse_document(raw: MarkdownStr) -> List[Item]:
-    tokenized_lines = tokenize_document(raw)
+def is_bigger_than(raw: MarkdownStr, size: Optional[int]) -> bool:
+    """Return True if raw takes more than `size` bytes encoded, like in a file."""
+    if size is None:
+        return False
+    # Characters take at least a byte, so longer documents are not encoded
+    return len(raw) > size or len(raw.encode("utf-8")) > size
+
+
+def parse_document(
+    raw: MarkdownStr,
+    lexer: Optional[Lexer] = None,
+    parallel_threshold: Optional[int] = None,
+) -> List[Item]:
+    """Parse a document, in parallel if it is bigger than `parallel_threshold` bytes."""
+    if is_bigger_than(raw, parallel_threshold):
+        return parse_document_in_parallel(raw, lexer=lexer)
+
+    tokenized_lines = tokenize_document(raw, lexer=lexer)
     items = analyse_lexically(tokenized_lines)
     return items
 
 
-def items_to_markdown(data: Iterable[Item]) -> MarkdownStr:
-    lines = [item.to_str() for item in data]
+def iter_items(
+    path: Path,
+    lexer: Optional[Lexer] = None,
+    parallel_threshold: Optional[int] = None,
+) -> Iterator[Item]:
+    """Parse a Markdown file line by line, yielding items as soon as they are parsed.
+
+    Unlike `parse_document`, the file is never fully loaded in memory, unless the file
+    is bigger than `parallel_threshold` bytes and it is parsed in parallel instead.
+    """
+    if parallel_threshold is not None and path.stat().st_size > parallel_threshold:
+        raw = read_markdown_file(path=path)
+        yield from parse_document_in_parallel(raw, lexer=lexer)
+        return
+
+    lines = iter_markdown_lines(path=path)
+    tokenized_lines = tokenize_lines(lines, lexer=lexer)
+    yield from iter_analysed_items(tokenized_lines)
+
+
+# Smallest chunk worth sending to another process
+MIN_PARALLEL_CHUNK_SIZE = 256 * 1024  # characters
+# Chunks per worker, so that workers that finish early can pick up more chunks
+CHUNKS_PER_WORKER = 4
+
+
+@dataclass(frozen=True, slots=True)
+class DocumentChunk:
+    # Every chunk but the first starts with an empty line
+    text: str
+    first_line_number: int
+
+
+def split_document(raw: MarkdownStr, chunk_size: int) -> Iterator[DocumentChunk]:
+    """Split a document in chunks of roughly `chunk_size` characters.
+
+    Documents are only split right before empty lines, because an empty line always
+    closes the buffered task, if any. This way each chunk can be analysed on its own,
+    and the analyser is in the same state the sequential analyser would be at that
+    point.
+    """
+    start = 0
+    first_line_number = 1
+    search_start = chunk_size
+    while True:
+        double_new_line = raw.find(NEW_LINE * 2, search_start)
+        if double_new_line == -1:
+            yield DocumentChunk(text=raw[start:], first_line_number=first_line_number)
+            return
+
+        # The external references header owns the empty line after it
+        line_start = raw.rfind(NEW_LINE, start, double_new_line) + 1
+        if raw[line_start:double_new_line] == EXTERNAL_REFERENCES_HEADER:
+            search_start = double_new_line + 1
+            continue
+
+        # The empty line starts after the first new line, and the current chunk ends
+        # right before that new line
+        empty_line_start = double_new_line + 1
+        yield DocumentChunk(
+            text=raw[start:double_new_line],
+            first_line_number=first_line_number,
+        )
+        first_line_number += raw.count(NEW_LINE, start, empty_line_start)
+        start = empty_line_start
+        search_start = start + chunk_size
+
+
+def _parse_chunk(chunk: DocumentChunk, lexer: Optional[Lexer]) -> List[Item]:
+    tokenized_lines = tokenize_document(
+        chunk.text, lexer=lexer, first_line_number=chunk.first_line_number
+    )
+    return analyse_lexically(tokenized_lines)
+
+
+def parse_document_in_parallel(
+    raw: MarkdownStr,
+    lexer: Optional[Lexer] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> List[Item]:
+    """Parse a document splitting it across CPU cores.
+
+    Items and errors are the same as with `parse_document`: if several chunks fail, the
+    error of the first one in the document is raised.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(
+            len(raw) // (workers * CHUNKS_PER_WORKER), MIN_PARALLEL_CHUNK_SIZE
+        )
+    chunks = list(split_document(raw, chunk_size=chunk_size))
+    parsed_chunks = parse_chunks_in_parallel(chunks, lexer=lexer, max_workers=workers)
+    return [item for items in parsed_chunks for item in items]
+
+
+def parse_chunks_in_parallel(
+    chunks: List[DocumentChunk],
+    lexer: Optional[Lexer] = None,
+    max_workers: Optional[int] = None,
+) -> List[List[Item]]:
+    """Return the items of each chunk, parsing chunks across CPU cores."""
+    workers = max_workers or os.cpu_count() or 1
+    if len(chunks) <= 1 or workers == 1:
+        return [_parse_chunk(chunk, lexer) for chunk in chunks]
+
+    # Many small chunks are sent to workers in batches
+    batch_size = max(len(chunks) // (workers * CHUNKS_PER_WORKER), 1)
+    # Workers parse hashes of the same width, even if they do not fork this process
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=set_hash_width, initargs=(_hash_width,)
+    ) as executor:
+        parsed_chunks = executor.map(
+            _parse_chunk, chunks, itertools.repeat(lexer), chunksize=batch_size
+        )
+        return list(parsed_chunks)
+
+
+def items_to_markdown(data: Iterable[Item], verbatim: bool = True) -> MarkdownStr:
+    """Serialize items to Markdown.
+
+    If `verbatim`, items that were not modified since they were parsed are serialized
+    as their original text, instead of rendering them again.
+    """
+    if verbatim:
+        lines = [
+            item.to_str() if (source := get_source_text(item)) is None else source
+            for item in data
+        ]
+    else:
+        lines = [item.to_str() for item in data]
     content = "\n".join(lines)
     return content
@@ -1,18 +1,64 @@
+import gzip
 import json
 import logging
+import lzma
+import os
+import shutil
 import textwrap
 from pathlib import Path
+from typing import IO, Callable, Dict, Iterator, Optional
 
 from src.types import JsonDict, MarkdownStr
 
 logger = logging.getLogger(__name__)
 
+# Suffix of compressed files, by compression
+COMPRESSION_SUFFIXES = {
+    "gzip": ".gz",
+    "lzma": ".xz",
+}
+_COMPRESSED_FILE_OPENERS: Dict[str, Callable[..., IO]] = {
+    ".gz": gzip.open,
+    ".xz": lzma.open,
+}
+
+
+def is_compressed(path: Path) -> bool:
+    return path.suffix in _COMPRESSED_FILE_OPENERS
+
+
+def open_markdown_file(path: Path) -> IO[str]:
+    """Open file in text mode, decompressing it on the fly if it is compressed."""
+    if (open_compressed := _COMPRESSED_FILE_OPENERS.get(path.suffix)) is not None:
+        return open_compressed(path, "rt")
+    return path.open("r")
+
 
 def read_markdown_file(path: Path) -> str:
+    if is_compressed(path):
+        with open_markdown_file(path) as f:
+            return f.read()
+
     content = path.read_text()
     return content
 
 
+def iter_markdown_lines(path: Path) -> Iterator[str]:
+    """Yield file lines without new line characters, one at a time.
+
+    Lines are the same as `read_markdown_file(path).split("\\n")`, including the
+    trailing empty line when the file ends with a new line. Compressed files are
+    decompressed while they are read.
+    """
+    with open_markdown_file(path) as f:
+        line = ""
+        for line in f:
+            yield line[:-1] if line.endswith("\n") else line
+
+        if not line or line.endswith("\n"):
+            yield ""
+
+
 def read_json(path: Path) -> JsonDict:
     with path.open("r") as f:
         return json.load(f)
@@ -94,3 +140,37 @@ def append_to_archive(*, path: Path, content: MarkdownStr) -> None:
 
 def write_text_file(*, path: Path, content: MarkdownStr) -> None:
     path.write_text(content)
+
+
+def write_bytes_atomically(*, path: Path, content: bytes) -> None:
+    """Write to a temporary file first, so that readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(content)
+    if path.exists():
+        shutil.copymode(path, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_text_file_atomically(*, path: Path, content: MarkdownStr) -> None:
+    write_bytes_atomically(path=path, content=content.encode("utf-8"))
+
+
+def compress_file(path: Path, compression: str) -> Path:
+    """Compress file, streaming it, and replace it with the compressed one."""
+    suffix: Optional[str] = COMPRESSION_SUFFIXES.get(compression)
+    if suffix is None:
+        raise ValueError(
+            f"Unsupported compression {compression!r}, expected one of"
+            f" {sorted(COMPRESSION_SUFFIXES)}"
+        )
+
+    compressed_path = path.with_name(f"{path.name}{suffix}")
+    tmp_path = compressed_path.with_name(f"{compressed_path.name}.{os.getpid()}.tmp")
+    with path.open("rb") as source, _COMPRESSED_FILE_OPENERS[suffix](
+        tmp_path, "wb"
+    ) as target:
+        shutil.copyfileobj(source, target)
+    os.replace(tmp_path, compressed_path)
+    path.unlink()
+    return compressed_path
@@ -0,0 +1,140 @@
+import bisect
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.cache import DEFAULT_CACHE_DIR
+from src.hash import Hash, HashKey, hash_key
+from src.index import (
+    Record,
+    TaskBlock,
+    TaskBlockIndex,
+    decode_line,
+    index_keys,
+    parse_task_lines,
+)
+from src.types import DETAIL_PREFIX, Task
+
+DEFAULT_LOCATIONS_DIR = DEFAULT_CACHE_DIR / "locations"
+# Appended hashes are merged with the sorted ones once there are more than this
+# amount of them, or an eighth of the sorted ones
+MIN_MERGED_HASHES = 10_000
+
+TaskId = int
+
+
+@dataclass(frozen=True)
+class TaskSpan:
+    """Lines of a task and its details in a document."""
+
+    record: Record
+    lines: int
+
+    @property
+    def last_line_number(self) -> int:
+        return self.record.line_number + self.lines - 1
+
+
+class TaskLocations(TaskBlockIndex):
+    """Map task hashes to the lines of their tasks in a document.
+
+    Hashes are kept sorted in arrays, to load them quickly, and hashes of tasks
+    appended since they were sorted are kept apart until they are many.
+    """
+
+    NAME = "task locations"
+    DEFAULT_DIRECTORY = DEFAULT_LOCATIONS_DIR
+    STATE = (
+        *TaskBlockIndex.STATE,
+        "line_amounts",
+        "merged_keys",
+        "merged_ids",
+        "appended_ids",
+    )
+
+    def _reset(self) -> None:
+        super()._reset()  # task ids are positions of the tasks with a hash
+        self.line_amounts = array("I")
+        # Hash keys of the first `len(merged_keys)` tasks, sorted, and their ids
+        self.merged_keys = array("Q")
+        self.merged_ids = array("I")
+        # Ids of the following tasks, by hash key
+        self.appended_ids: Dict[HashKey, TaskId] = {}
+
+    def save(self) -> None:
+        if len(self.appended_ids) > max(MIN_MERGED_HASHES, len(self.merged_keys) // 8):
+            self._merge()
+        super().save()
+
+    def _merge(self) -> None:
+        """Sort appended hashes together with the sorted ones."""
+        pairs = sorted(
+            [*zip(self.merged_keys, self.merged_ids), *self.appended_ids.items()]
+        )
+        self.merged_keys = array("Q", (key for key, _ in pairs))
+        self.merged_ids = array("I", (task_id for _, task_id in pairs))
+        self.appended_ids = {}
+
+    def _add(self, block: TaskBlock) -> None:
+        if (keys := index_keys(block.lines[0])) is None or not keys.hash:
+            return
+
+        self.appended_ids[hash_key(keys.hash)] = len(self.offsets)
+        self.offsets.append(block.record.offset)
+        self.line_numbers.append(block.record.line_number)
+        self.line_amounts.append(len(block.lines))
+
+    def _span(self, task_id: TaskId) -> TaskSpan:
+        return TaskSpan(record=self.record(task_id), lines=self.line_amounts[task_id])
+
+    def find(self, hash: Hash) -> Optional[TaskSpan]:
+        if (block := self.last_task) is not None:
+            keys = index_keys(block.lines[0])
+            if keys is not None and keys.hash == hash:
+                return TaskSpan(record=block.record, lines=len(block.lines))
+
+        key = hash_key(hash)
+        if (task_id := self.appended_ids.get(key)) is not None:
+            return self._span(task_id)
+
+        position = bisect.bisect_left(self.merged_keys, key)
+        if position < len(self.merged_keys) and self.merged_keys[position] == key:
+            return self._span(self.merged_ids[position])
+
+        return None
+
+    def read_lines(self, hash: Hash, span: TaskSpan) -> Optional[List[str]]:
+        """Return lines of the task at span, None if they are no longer there.
+
+        Lines are still there if the first one is a task with `hash`, followed by
+        exactly the details the span has.
+        """
+        lines: List[str] = []
+        with self.document_path.open("rb") as f:
+            f.seek(span.record.offset)
+            for _ in range(span.lines):
+                if not (raw_line := f.readline()):
+                    return None
+                lines.append(decode_line(raw_line))
+            next_line = decode_line(f.readline())
+
+        keys = index_keys(lines[0])
+        if keys is None or keys.hash != hash or next_line.startswith(DETAIL_PREFIX):
+            return None
+        if not all(line.startswith(DETAIL_PREFIX) for line in lines[1:]):
+            return None
+
+        return lines
+
+    def read_task(self, hash: Hash, span: TaskSpan) -> Optional[Task]:
+        if (lines := self.read_lines(hash, span)) is None:
+            return None
+        return parse_task_lines(lines, first_line_number=span.record.line_number)
+
+
+def load_locations(
+    document_path: Path, directory: Path = DEFAULT_LOCATIONS_DIR
+) -> TaskLocations:
+    """Load task locations of document, and update them with any tasks appended."""
+    return TaskLocations.load_updated(document_path=document_path, directory=directory)
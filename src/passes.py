@@ -0,0 +1,179 @@
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.cache import ParseCache, parse_document_with_cache
+from src.interpreter import items_to_markdown
+from src.io import read_markdown_file, write_text_file_atomically
+from src.types import Item, MarkdownStr
+
+
+@dataclass(frozen=True)
+class Document:
+    path: Path
+    # Taken before reading the file
+    stat: os.stat_result = field(repr=False)
+    original_content: MarkdownStr = field(repr=False)
+    items: List[Item] = field(repr=False)
+
+    def with_items(self, items: List[Item]) -> "Document":
+        return replace(self, items=items)
+
+
+PassFunction = Callable[[Document], Document]
+
+
+@dataclass(frozen=True)
+class Pass:
+    name: str
+    function: PassFunction
+    # Shown while the pass runs
+    description: str
+    # Read-only passes must return the document untouched, e.g.: validation
+    read_only: bool = False
+
+
+PASSES: Dict[str, Pass] = {}
+
+
+def register_pass(
+    name: str, *, description: str, read_only: bool = False
+) -> Callable[[PassFunction], PassFunction]:
+    """Register pass under `name`, so that it can be looked up with `get_passes`."""
+
+    def decorator(function: PassFunction) -> PassFunction:
+        if name in PASSES:
+            raise ValueError(f"There is already a pass called {name!r}")
+
+        PASSES[name] = Pass(
+            name=name, function=function, description=description, read_only=read_only
+        )
+        return function
+
+    return decorator
+
+
+def get_passes(names: Iterable[str]) -> List[Pass]:
+    passes: List[Pass] = []
+    for name in names:
+        if name not in PASSES:
+            raise ValueError(f"Unknown pass {name!r}, expected one of {sorted(PASSES)}")
+        passes.append(PASSES[name])
+    return passes
+
+
+@dataclass(frozen=True)
+class PassReport:
+    name: str
+    seconds: float
+    # Items added, replaced or removed by the pass
+    items_touched: int
+
+
+@dataclass(frozen=True)
+class PassManagerResult:
+    document: Document
+    reports: List[PassReport]
+    written: bool
+
+
+def count_touched_items(before: List[Item], after: List[Item]) -> int:
+    """Count items that were added, replaced or removed.
+
+    Items are compared by identity: passes return untouched items as they are. A
+    replaced item is both removed and added, but it is only counted once.
+    """
+    if after is before:
+        return 0
+
+    # Count identities, shared items like `EmptyLine` can appear many times
+    before_ids = Counter(id(item) for item in before)
+    after_ids = Counter(id(item) for item in after)
+    added = (after_ids - before_ids).total()
+    removed = (before_ids - after_ids).total()
+    return max(added, removed)
+
+
+def _pre(message: str) -> None:
+    print(f"{message:.<55}", end="")
+
+
+def _done() -> None:
+    print(" done")
+
+
+class PassManager:
+    """Run passes over a single parse of a file, and write the file once.
+
+    A pass is a function that takes a parsed document and returns it, transformed or
+    not. The file is only written if its content changed.
+    """
+
+    def __init__(self, passes: Iterable[Pass], verbose: bool = False) -> None:
+        self.passes = list(passes)
+        self.verbose = verbose
+
+    def run(
+        self, *, path: Path, cache: Optional[ParseCache] = None
+    ) -> PassManagerResult:
+        stat = path.stat()
+        original_content = read_markdown_file(path=path)
+        items = parse_document_with_cache(original_content, cache=cache)
+        document = Document(
+            path=path, stat=stat, original_content=original_content, items=items
+        )
+
+        reports: List[PassReport] = []
+        for pass_ in self.passes:
+            if self.verbose:
+                _pre(pass_.description)
+
+            start = time.perf_counter()
+            transformed = pass_.function(document)
+            seconds = time.perf_counter() - start
+
+            if pass_.read_only and transformed.items is not document.items:
+                raise ValueError(f"Read-only pass {pass_.name!r} changed the document")
+
+            touched = count_touched_items(document.items, transformed.items)
+            reports.append(
+                PassReport(name=pass_.name, seconds=seconds, items_touched=touched)
+            )
+            document = transformed
+
+            if self.verbose:
+                _done()
+
+        written = self._write(document)
+        return PassManagerResult(document=document, reports=reports, written=written)
+
+    def _write(self, document: Document) -> bool:
+        if all(pass_.read_only for pass_ in self.passes):
+            return False
+
+        if self.verbose:
+            _pre("Writing file")
+
+        content = items_to_markdown(document.items)
+        if content == document.original_content:
+            if self.verbose:
+                print(" nothing changed")
+            return False
+
+        write_text_file_atomically(path=document.path, content=content)
+        if self.verbose:
+            _done()
+        return True
+
+
+def print_timings(reports: List[PassReport]) -> None:
+    name_width = max((len(report.name) for report in reports), default=0)
+    for report in reports:
+        milliseconds = report.seconds * 1e3
+        print(
+            f"{report.name:<{name_width}}  {milliseconds:>9.2f} ms"
+            f"  {report.items_touched:>7} items touched"
+        )
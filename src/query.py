@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import bisect
+import datetime
+import re
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+from src.types import Tag, Task
+
+# Set of task positions, bit N is set if the task at position N is in the set
+Bitmap = int
+
+KEYWORDS = ("AND", "OR", "NOT")
+DONE_TERM = "done"
+UNDONE_TERM = "undone"
+BEFORE_PREFIX = "before:"
+AFTER_PREFIX = "after:"
+
+_TOKEN_PATTERN = re.compile(r"\(|\)|[^\s()]+")
+
+
+def bitmap_from_positions(positions: Iterable[int], size: int) -> Bitmap:
+    """Build a bitmap in one go, setting bits one by one is quadratic."""
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, byteorder="little")
+
+
+def iter_positions(bitmap: Bitmap) -> Iterator[int]:
+    """Yield positions in bitmap in ascending order."""
+    bits = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, byteorder="little")
+    for byte_position, byte in enumerate(bits):
+        while byte:
+            lowest_bit = byte & -byte
+            yield byte_position * 8 + lowest_bit.bit_length() - 1
+            byte ^= lowest_bit
+
+
+class TaskIndex:
+    """Inverted index of tasks: tag, done flag and deadline to task positions.
+
+    Building it takes longer than evaluating a query over the tasks (see
+    `Query.matches`), so it only pays off when running several queries.
+    """
+
+    def __init__(self, tasks: Sequence[Task]) -> None:
+        self.tasks = tasks
+        self.size = size = len(tasks)
+        self.all: Bitmap = (1 << size) - 1
+
+        positions_by_tag: Dict[Tag, List[int]] = defaultdict(list)
+        done_positions: List[int] = []
+        deadlines: List[Tuple[int, int]] = []
+        for position, task in enumerate(tasks):
+            for tag in task.tags:
+                positions_by_tag[tag].append(position)
+            if task.done:
+                done_positions.append(position)
+            if task.deadline is not None:
+                deadlines.append((task.deadline.toordinal(), position))
+
+        self.by_tag: Dict[Tag, Bitmap] = {
+            tag: bitmap_from_positions(positions, size)
+            for tag, positions in positions_by_tag.items()
+        }
+        self.done: Bitmap = bitmap_from_positions(done_positions, size)
+
+        # Positions of tasks with a deadline, sorted by deadline, as date ordinals
+        deadlines.sort()
+        self.deadline_ordinals = array("I", (ordinal for ordinal, _ in deadlines))
+        self.deadline_positions = array("I", (position for _, position in deadlines))
+
+    @property
+    def deadlines(self) -> List[datetime.date]:
+        """Deadlines of tasks, without duplicates, in order."""
+        ordinals = sorted(set(self.deadline_ordinals))
+        return [datetime.date.fromordinal(ordinal) for ordinal in ordinals]
+
+    def find_by_tag(self, tag: Tag) -> Bitmap:
+        return self.by_tag.get(tag, 0)
+
+    def find_by_deadline_before(self, date: datetime.date) -> Bitmap:
+        end = bisect.bisect_left(self.deadline_ordinals, date.toordinal())
+        return bitmap_from_positions(self.deadline_positions[:end], self.size)
+
+    def find_by_deadline_after(self, date: datetime.date) -> Bitmap:
+        start = bisect.bisect_right(self.deadline_ordinals, date.toordinal())
+        return bitmap_from_positions(self.deadline_positions[start:], self.size)
+
+    def select(self, query: Query) -> List[Task]:
+        """Return tasks matching query, in order."""
+        matching = query.evaluate(self)
+        return [self.tasks[position] for position in iter_positions(matching)]
+
+
+@dataclass(frozen=True)
+class TagTerm:
+    tag: Tag
+
+    def evaluate(self, index: TaskIndex) -> Bitmap:
+        return index.find_by_tag(self.tag)
+
+    def matches(self, task: Task) -> bool:
+        return self.tag in task.tags
+
+
+@dataclass(frozen=True)
+class DoneTerm:
+    done: bool
+
+    def evaluate(self, index: TaskIndex) -> Bitmap:
+        return index.done if self.done else index.all & ~index.done
+
+    def matches(self, task: Task) -> bool:
+        return task.done == self.done
+
+
+@dataclass(frozen=True)
+class DeadlineTerm:
+    date: datetime.date
+    before: bool  # after if False
+
+    def evaluate(self, index: TaskIndex) -> Bitmap:
+        if self.before:
+            return index.find_by_deadline_before(self.date)
+        return index.find_by_deadline_after(self.date)
+
+    def matches(self, task: Task) -> bool:
+        if task.deadline is None:
+            return False
+        if self.before:
+            return task.deadline < self.date
+        return task.deadline > self.date
+
+
+@dataclass(frozen=True)
+class Not:
+    operand: Query
+
+    def evaluate(self, index: TaskIndex) -> Bitmap:
+        return index.all & ~self.operand.evaluate(index)
+
+    def matches(self, task: Task) -> bool:
+        return not self.operand.matches(task)
+
+
+@dataclass(frozen=True)
+class And:
+    operands: List[Query]
+
+    def evaluate(self, index: TaskIndex) -> Bitmap:
+        matching = index.all
+        for operand in self.operands:
+            if not matching:
+                break
+            matching &= operand.evaluate(index)
+        return matching
+
+    def matches(self, task: Task) -> bool:
+        for operand in self.operands:
+            if not operand.matches(task):
+                return False
+        return True
+
+
+@dataclass(frozen=True)
+class Or:
+    operands: List[Query]
+
+    def evaluate(self, index: TaskIndex) -> Bitmap:
+        matching = 0
+        for operand in self.operands:
+            matching |= operand.evaluate(index)
+        return matching
+
+    def matches(self, task: Task) -> bool:
+        for operand in self.operands:
+            if operand.matches(task):
+                return True
+        return False
+
+
+Query = Union[TagTerm, DoneTerm, DeadlineTerm, Not, And, Or]
+
+
+def tokenize_query(raw_query: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(raw_query)
+
+
+def _parse_date(raw_date: str, *, term: str) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(raw_date)
+    except ValueError:
+        raise ValueError(f"Expected a date like 2022-01-31 in {term!r}")
+
+
+def parse_term(term: str) -> Query:
+    if term == DONE_TERM:
+        return DoneTerm(done=True)
+    if term == UNDONE_TERM:
+        return DoneTerm(done=False)
+    if term.startswith(BEFORE_PREFIX):
+        date = _parse_date(term.removeprefix(BEFORE_PREFIX), term=term)
+        return DeadlineTerm(date=date, before=True)
+    if term.startswith(AFTER_PREFIX):
+        date = _parse_date(term.removeprefix(AFTER_PREFIX), term=term)
+        return DeadlineTerm(date=date, before=False)
+
+    tag_type, separator, value = term.partition(":")
+    if not separator or not tag_type or not value:
+        raise ValueError(f"Expected a tag like 'g:group', or a keyword, got {term!r}")
+    return TagTerm(tag=Tag(type=tag_type, value=value))
+
+
+class _QueryParser:
+    """Recursive descent parser, `NOT` binds tighter than `AND`, tighter than `OR`."""
+
+    def __init__(self, tokens: List[str]) -> None:
+        self.tokens = tokens
+        self.position = 0
+
+    def _peek(self) -> str:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return ""
+
+    def _next(self) -> str:
+        token = self._peek()
+        if not token:
+            raise ValueError("Unexpected end of query")
+        self.position += 1
+        return token
+
+    def parse(self) -> Query:
+        query = self._parse_or()
+        if self.position < len(self.tokens):
+            raise ValueError(f"Unexpected {self._peek()!r} in query")
+        return query
+
+    def _parse_or(self) -> Query:
+        operands = [self._parse_and()]
+        while self._peek().upper() == "OR":
+            self._next()
+            operands.append(self._parse_and())
+        return operands[0] if len(operands) == 1 else Or(operands=operands)
+
+    def _parse_and(self) -> Query:
+        operands = [self._parse_not()]
+        while (token := self._peek()) and token.upper() != "OR" and token != ")":
+            if token.upper() == "AND":
+                self._next()
+            operands.append(self._parse_not())
+        return operands[0] if len(operands) == 1 else And(operands=operands)
+
+    def _parse_not(self) -> Query:
+        if self._peek().upper() == "NOT":
+            self._next()
+            return Not(operand=self._parse_not())
+        return self._parse_atom()
+
+    def _parse_atom(self) -> Query:
+        token = self._next()
+        if token == "(":
+            query = self._parse_or()
+            if self._next() != ")":
+                raise ValueError("Expected ')' in query")
+            return query
+        if token == ")" or token.upper() in KEYWORDS:
+            raise ValueError(f"Unexpected {token!r} in query")
+        return parse_term(token)
+
+
+def parse_query(raw_query: str) -> Query:
+    """Parse query, raise ValueError if it is not valid.
+
+    Queries combine terms with `AND`, `OR`, `NOT` and parentheses, and adjacent terms
+    are combined with `AND`, e.g.:
+
+        g:infra AND NOT p:low
+        (g:infra OR g:ops) undone before:2022-02-01
+
+    Terms are tags as written in tasks without the leading `#` (e.g.: `g:infra`),
+    `done`, `undone`, and `before:<date>`/`after:<date>` to match tasks with a
+    deadline before or after a date, both excluded.
+    """
+    tokens = tokenize_query(raw_query)
+    if not tokens:
+        raise ValueError("Empty query")
+    return _QueryParser(tokens).parse()
@@ -0,0 +1,213 @@
+import datetime
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from src.hash import Hash
+from src.interpreter import iter_items
+from src.types import Tag, Task, TaskDetail
+
+# Bump it when the schema changes, stores of other versions are loaded from scratch
+STORE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    done INTEGER NOT NULL,
+    hash TEXT,
+    deadline TEXT,
+    archived_at TEXT,
+    -- Tags like 'g:group1 p:low', in task order
+    tags TEXT NOT NULL,
+    -- Detail descriptions, one per line
+    details TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS task_tags (
+    task_id INTEGER NOT NULL REFERENCES tasks(id),
+    type TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_by_hash ON tasks(hash);
+CREATE INDEX IF NOT EXISTS tasks_by_deadline ON tasks(deadline);
+CREATE INDEX IF NOT EXISTS task_tags_by_tag ON task_tags(type, value, task_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS task_text USING fts5(description, details);
+"""
+TABLES = ("tasks", "task_tags", "task_text")
+
+TaskRow = Tuple[str, int, Optional[str], Optional[str], Optional[str], str, str]
+
+
+def _serialize_tags(tags: Iterable[Tag]) -> str:
+    return " ".join(f"{tag.type}:{tag.value}" for tag in tags)
+
+
+def _deserialize_tags(raw_tags: str) -> List[Tag]:
+    tags: List[Tag] = []
+    for raw_tag in raw_tags.split():
+        tag_type, _, value = raw_tag.partition(":")
+        tags.append(Tag(type=tag_type, value=value))
+    return tags
+
+
+def _row_to_task(row: TaskRow) -> Task:
+    description, done, hash, deadline, _, raw_tags, raw_details = row
+    return Task(
+        description=description,
+        done=bool(done),
+        details=[TaskDetail(description=d) for d in raw_details.splitlines()],
+        tags=_deserialize_tags(raw_tags),
+        hash=Hash(hash) if hash else None,
+        deadline=datetime.date.fromisoformat(deadline) if deadline else None,
+    )
+
+
+class TaskStore:
+    """SQLite mirror of archived tasks, to search them without reading the archive.
+
+    Tasks are indexed by hash, tag and deadline, and their descriptions and details
+    are full-text indexed (FTS5). The archive stays the source of truth: the store is
+    kept in sync by `clean`, and it can be loaded again from the archive at any time.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        with self.connection:
+            if version != STORE_VERSION:
+                for table in TABLES:
+                    self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {STORE_VERSION}")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "TaskStore":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        (amount,) = self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()
+        return amount
+
+    def _insert_tasks(
+        self, tasks: Iterable[Task], archived_at: Optional[datetime.datetime]
+    ) -> int:
+        timestamp = archived_at.isoformat(timespec="seconds") if archived_at else None
+        inserted_amount = 0
+        for task in tasks:
+            details = "\n".join(detail.description for detail in task.details)
+            cursor = self.connection.execute(
+                "INSERT INTO tasks"
+                " (description, done, hash, deadline, archived_at, tags, details)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    task.description,
+                    task.done,
+                    task.hash,
+                    task.deadline.isoformat() if task.deadline else None,
+                    timestamp,
+                    _serialize_tags(task.tags),
+                    details,
+                ),
+            )
+            task_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO task_tags (task_id, type, value) VALUES (?, ?, ?)",
+                [(task_id, tag.type, tag.value) for tag in task.tags],
+            )
+            self.connection.execute(
+                "INSERT INTO task_text (rowid, description, details) VALUES (?, ?, ?)",
+                (task_id, task.description, details),
+            )
+            inserted_amount += 1
+
+        return inserted_amount
+
+    def add_tasks(
+        self,
+        tasks: Iterable[Task],
+        archived_at: Optional[datetime.datetime] = None,
+    ) -> int:
+        """Store tasks, return the amount of stored tasks."""
+        with self.connection:
+            return self._insert_tasks(tasks, archived_at=archived_at)
+
+    def load_archive(self, paths: Iterable[Path]) -> int:
+        """Replace stored tasks with the tasks in archive files, in one transaction.
+
+        Archived tasks do not record when they were archived, so they are stored
+        without timestamp.
+        """
+        with self.connection:
+            for table in TABLES:
+                self.connection.execute(f"DELETE FROM {table}")
+
+            tasks_amount = 0
+            for path in paths:
+                items = iter_items(path=path)
+                tasks = (item for item in items if isinstance(item, Task))
+                tasks_amount += self._insert_tasks(tasks, archived_at=None)
+
+        return tasks_amount
+
+    def search(
+        self,
+        text: Optional[str] = None,
+        *,
+        hash: Optional[Hash] = None,
+        tags: Optional[List[Tag]] = None,
+        deadline: Optional[datetime.date] = None,
+        limit: Optional[int] = None,
+    ) -> List[Task]:
+        """Return stored tasks that match all criteria.
+
+        `text` is a FTS5 query over descriptions and details (e.g.: `deploy NOT
+        staging`), and results are sorted by relevance. Without `text`, results are
+        sorted in archiving order.
+        """
+        conditions: List[str] = []
+        parameters: List[object] = []
+        if text is not None:
+            conditions.append("task_text MATCH ?")
+            parameters.append(text)
+        if hash is not None:
+            conditions.append("tasks.hash = ?")
+            parameters.append(hash)
+        for tag in tags or []:
+            conditions.append(
+                "tasks.id IN"
+                " (SELECT task_id FROM task_tags WHERE type = ? AND value = ?)"
+            )
+            parameters.extend((tag.type, tag.value))
+        if deadline is not None:
+            conditions.append("tasks.deadline = ?")
+            parameters.append(deadline.isoformat())
+
+        query = (
+            "SELECT tasks.description, done, hash, deadline, archived_at, tags,"
+            " tasks.details FROM tasks"
+        )
+        if text is not None:
+            query += " JOIN task_text ON task_text.rowid = tasks.id"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY " + ("task_text.rank" if text is not None else "tasks.id")
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+
+        try:
+            rows = self.connection.execute(query, parameters).fetchall()
+        except sqlite3.OperationalError as error:
+            raise ValueError(f"Invalid search {text!r}: {error}") from error
+
+        return [_row_to_task(row) for row in rows]
@@ -0,0 +1,195 @@
+import bisect
+import logging
+from array import array
+from contextlib import nullcontext
+from pathlib import Path
+from typing import BinaryIO, ContextManager, Dict, Iterator, List, Optional, Set, Tuple
+
+from src.cache import DEFAULT_CACHE_DIR, path_key
+from src.index import Record, TaskBlock, TaskBlockIndex, parse_task_lines, read_task
+from src.io import write_bytes_atomically
+from src.types import Task
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRIGRAMS_DIR = DEFAULT_CACHE_DIR / "trigrams"
+POSTINGS_SUFFIX = ".postings"
+# Ids of appended tasks are merged in the postings file once there are more than
+# this amount of them, or an eighth of the tasks in the postings file
+MIN_MERGED_TASKS = 10_000
+
+TaskId = int
+
+
+def task_text(task: Task) -> str:
+    """Searchable text of a task: its description and details, lowercase."""
+    lines = [task.description, *(detail.description for detail in task.details)]
+    return "\n".join(lines).lower()
+
+
+def trigrams(text: str) -> Set[str]:
+    found: Set[str] = set()
+    for start in range(len(text) - 2):
+        end = start + 3
+        found.add(text[start:end])
+    return found
+
+
+def _contains(ids: array, task_id: TaskId) -> bool:
+    position = bisect.bisect_left(ids, task_id)
+    return position < len(ids) and ids[position] == task_id
+
+
+class TrigramIndex(TaskBlockIndex):
+    """Map trigrams of task descriptions and details to the tasks they are in.
+
+    Task ids of each trigram are stored in a postings file, and only the trigrams of
+    a search are read from it. Ids of tasks appended since the postings file was
+    written are kept apart, and merged into a new postings file once they are many,
+    so that appending tasks does not rewrite the whole index.
+    """
+
+    NAME = "trigram index"
+    DEFAULT_DIRECTORY = DEFAULT_TRIGRAMS_DIR
+    STATE = (
+        *TaskBlockIndex.STATE,
+        "generation",
+        "merged_postings",
+        "merged_size",
+        "appended_postings",
+    )
+
+    def _reset(self) -> None:
+        super()._reset()  # task ids are positions of the tasks before the mark
+        # Postings files are numbered, to replace them without breaking the index
+        self.generation = 0
+        # Byte offset and amount of ids of each trigram in the postings file, which
+        # has the ids of the first `merged_size` tasks
+        self.merged_postings: Dict[str, Tuple[int, int]] = {}
+        self.merged_size = 0
+        # Ids of the following tasks, by trigram
+        self.appended_postings: Dict[str, array] = {}
+
+    @property
+    def _key(self) -> str:
+        return path_key(self.document_path).hex()
+
+    def postings_path(self, generation: int) -> Path:
+        assert self.directory, "Oops! I expected a directory to store the index in :S"
+        return self.directory / f"{self._key}.{generation}{POSTINGS_SUFFIX}"
+
+    @classmethod
+    def load(
+        cls, document_path: Path, directory: Optional[Path] = None
+    ) -> "TrigramIndex":
+        index = super().load(document_path=document_path, directory=directory)
+        if index.merged_size and not index.postings_path(index.generation).exists():
+            logger.info(f"Ignoring trigram index without postings at {index.path}")
+            index._reset()
+        return index
+
+    def save(self) -> None:
+        if len(self.offsets) - self.merged_size > max(
+            MIN_MERGED_TASKS, self.merged_size // 8
+        ):
+            self._merge_postings()
+
+        super().save()
+
+        assert self.directory, "Oops! I expected a directory to store the index in :S"
+        for path in self.directory.glob(f"{self._key}.*{POSTINGS_SUFFIX}"):
+            if path != self.postings_path(self.generation):
+                path.unlink(missing_ok=True)
+
+    def _merge_postings(self) -> None:
+        """Write all ids in a new postings file."""
+        chunks: List[bytes] = []
+        merged_postings: Dict[str, Tuple[int, int]] = {}
+        offset = 0
+        all_trigrams = self.merged_postings.keys() | self.appended_postings.keys()
+        with self._open_postings() as f:
+            for trigram in sorted(all_trigrams):
+                ids = self._read_postings(f, trigram)
+                chunk = ids.tobytes()
+                chunks.append(chunk)
+                merged_postings[trigram] = (offset, len(ids))
+                offset += len(chunk)
+
+        self.generation += 1
+        write_bytes_atomically(
+            path=self.postings_path(self.generation), content=b"".join(chunks)
+        )
+        self.merged_postings = merged_postings
+        self.merged_size = len(self.offsets)
+        self.appended_postings = {}
+
+    def _open_postings(self) -> ContextManager[Optional[BinaryIO]]:
+        if not self.merged_postings:
+            return nullcontext()
+        return self.postings_path(self.generation).open("rb")
+
+    def _read_postings(self, f: Optional[BinaryIO], trigram: str) -> array:
+        """Return ids of tasks containing trigram, in ascending order."""
+        ids = array("I")
+        if f is not None and (position := self.merged_postings.get(trigram)):
+            offset, amount = position
+            f.seek(offset)
+            ids.frombytes(f.read(amount * ids.itemsize))
+        ids.extend(self.appended_postings.get(trigram, ()))
+        return ids
+
+    def __len__(self) -> int:
+        return len(self.offsets) + (self.last_task is not None)
+
+    def _add(self, block: TaskBlock) -> None:
+        task_id = len(self.offsets)
+        self.offsets.append(block.record.offset)
+        self.line_numbers.append(block.record.line_number)
+        task = parse_task_lines(block.lines, first_line_number=block.record.line_number)
+        for trigram in trigrams(task_text(task)):
+            if (ids := self.appended_postings.get(trigram)) is None:
+                ids = self.appended_postings[trigram] = array("I")
+            ids.append(task_id)
+
+    def find_candidates(self, words: List[str]) -> List[Record]:
+        """Return records of tasks that may contain all words, in document order.
+
+        Words are lowercase. Words shorter than a trigram do not narrow candidates
+        down, so candidates must still be checked.
+        """
+        records = self._records(self._find_candidate_ids(words))
+        if self.last_task is not None:
+            records.append(self.last_task.record)
+        return records
+
+    def _find_candidate_ids(self, words: List[str]) -> List[TaskId]:
+        word_trigrams = set().union(*(trigrams(word) for word in words))
+        if not word_trigrams:
+            return list(range(len(self.offsets)))
+
+        postings: List[array] = []
+        with self._open_postings() as f:
+            for trigram in word_trigrams:
+                if not (ids := self._read_postings(f, trigram)):
+                    return []
+                postings.append(ids)
+
+        # Look up ids of the rarest trigram in the other postings
+        smallest, *others = sorted(postings, key=len)
+        return [
+            task_id
+            for task_id in smallest
+            if all(_contains(other, task_id) for other in others)
+        ]
+
+    def read_tasks(self, records: List[Record]) -> Iterator[Tuple[Record, Task]]:
+        with self.document_path.open("rb") as f:
+            for record in records:
+                yield record, read_task(f, record=record)
+
+
+def load_trigram_index(
+    document_path: Path, directory: Path = DEFAULT_TRIGRAMS_DIR
+) -> TrigramIndex:
+    """Load trigram index of document, and update it with any tasks appended since."""
+    return TrigramIndex.load_updated(document_path=document_path, directory=directory)
@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import datetime
 import re
-from dataclasses import dataclass, replace
-from typing import Any, Dict, List, Optional, Union
+from dataclasses import dataclass, field, replace
+from typing import Any, ClassVar, Dict, List, Optional, Union
 
 from src.hash import Hash
 
@@ -20,17 +20,22 @@ LINE_IS_DETAIL_PATTERN = re.compile(r"^  - ")  # starts with `  - `
 LINE_IS_EXTERNAL_REFERENCE_PATTERN = re.compile(r'\[([0-9]+)\]: ([^\s]+)\s"(.*)"$')
 LINE_IS_TITLE_PATTERN = re.compile(r"^## (.*)$")
 GROUP_TAG_TYPE = "g"
+DEADLINE_TAG_TYPE = "d"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Title:
     title: str
+    # Text the item was parsed from, `None` once the item is modified
+    source_text: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def to_str(self) -> str:
         return f"## {self.title}"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Task:
     description: str
     done: bool
@@ -38,6 +43,10 @@ class Task:
     tags: List[Tag]  # you need to preserve order, no sets
     hash: Optional[Hash] = None
     deadline: Optional[datetime.date] = None
+    # Text the item was parsed from, `None` once the item is modified
+    source_text: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def add_detail(self, task_detail: TaskDetail) -> Task:
         return replace(self, details=[*self.details, task_detail])
@@ -65,7 +74,7 @@ class Task:
         return "\n".join(lines)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Tag:
     type: str  # g (group), p (priority), etc.
     value: TagValue
@@ -73,11 +82,8 @@ class Tag:
     def to_str(self) -> str:
         return f"#{self.type}:{self.value}"
 
-    def __hash__(self) -> int:
-        return hash(self.to_str())
 
-
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TaskDetail:
     description: str
 
@@ -86,6 +92,15 @@ class TaskDetail:
 
 
 class EmptyLine:
+    # Empty lines have no state, so all of them share the same instance
+    __slots__ = ()
+    _instance: ClassVar[Optional[EmptyLine]] = None
+
+    def __new__(cls) -> EmptyLine:
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
     def to_str(self) -> str:
         return ""
 
@@ -94,18 +109,44 @@ class EmptyLine:
 
 
 class ExternalReferencesHeader:
+    __slots__ = ()
+    _instance: ClassVar[Optional[ExternalReferencesHeader]] = None
+
+    def __new__(cls) -> ExternalReferencesHeader:
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
     def to_str(self) -> str:
         return "<!-- External references -->"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ExternalReference:
     number: int
     path: str
     description: str
+    # Text the item was parsed from, `None` once the item is modified
+    source_text: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def to_str(self) -> str:
         return f'[{self.number}]: {self.path} "{self.description}"'
 
 
 Item = Union[Title, EmptyLine, Task, ExternalReferencesHeader, ExternalReference]
+SourcedItem = Union[Title, Task, ExternalReference]
+
+
+def remember_source_text(item: SourcedItem, text: str) -> None:
+    """Remember the text `item` was parsed from, to serialize it verbatim later on.
+
+    Any copy of the item (e.g.: `dataclasses.replace`) forgets it, so modified items
+    are always rendered again.
+    """
+    object.__setattr__(item, "source_text", text)
+
+
+def get_source_text(item: Item) -> Optional[str]:
+    return getattr(item, "source_text", None)
@@ -0,0 +1,103 @@
+import difflib
+from dataclasses import dataclass
+from typing import Generator, Iterator, List, Optional, Tuple
+
+DiffLine = Tuple[int, str]  # position in the diff, `difflib.Differ` line
+
+
+@dataclass(frozen=True)
+class ValidationReport:
+    diff: List[DiffLine]
+    # True if more differences were found than the ones reported
+    truncated: bool = False
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.diff
+
+
+def validate_round_trip(
+    original: str, parsed: str, max_diffs: Optional[int] = None
+) -> ValidationReport:
+    """Compare the original document against its parsed and serialized version.
+
+    Differences are reported like `difflib.Differ` does, but `difflib` only runs on
+    the windows where both documents differ, which are located in linear time. Lines
+    are numbered after their position in the diff, as if the whole documents were
+    compared.
+
+    Only the first `max_diffs` diff lines are reported, if set.
+    """
+    if original == parsed:
+        return ValidationReport(diff=[])
+
+    diff: List[DiffLine] = []
+    for diff_line in _iter_diff(original.split("\n"), parsed.split("\n")):
+        if max_diffs is not None and len(diff) >= max_diffs:
+            return ValidationReport(diff=diff, truncated=True)
+        diff.append(diff_line)
+
+    return ValidationReport(diff=diff)
+
+
+def _iter_diff(original: List[str], parsed: List[str]) -> Iterator[DiffLine]:
+    shortest = min(len(original), len(parsed))
+
+    prefix = 0
+    while prefix < shortest and original[prefix] == parsed[prefix]:
+        prefix += 1
+
+    suffix = 0
+    max_suffix = shortest - prefix
+    while suffix < max_suffix and original[-1 - suffix] == parsed[-1 - suffix]:
+        suffix += 1
+
+    original_end = len(original) - suffix
+    parsed_end = len(parsed) - suffix
+    original_middle = original[prefix:original_end]
+    parsed_middle = parsed[prefix:parsed_end]
+
+    if len(original_middle) != len(parsed_middle):
+        # Lines were added or removed, so there is no way to pair them up cheaply
+        yield from _diff_window(original_middle, parsed_middle, position=prefix)
+        return
+
+    # Same amount of lines: compare them in lockstep and only diff the mismatches
+    position = prefix
+    window_start: Optional[int] = None
+    for i, (original_line, parsed_line) in enumerate(
+        zip(original_middle, parsed_middle)
+    ):
+        if original_line != parsed_line:
+            if window_start is None:
+                window_start = i
+            continue
+
+        if window_start is not None:
+            position = yield from _diff_window(
+                original_middle[window_start:i],
+                parsed_middle[window_start:i],
+                position=position,
+            )
+            window_start = None
+
+        position += 1  # equal line, not reported but still numbered
+
+    if window_start is not None:
+        yield from _diff_window(
+            original_middle[window_start:],
+            parsed_middle[window_start:],
+            position=position,
+        )
+
+
+def _diff_window(
+    original: List[str], parsed: List[str], position: int
+) -> Generator[DiffLine, None, int]:
+    """Yield the differences in a window, return the position after the window."""
+    for line in difflib.Differ().compare(original, parsed):
+        if not line.startswith("  "):
+            yield position, line
+        position += 1
+
+    return position
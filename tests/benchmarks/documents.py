@@ -0,0 +1,30 @@
+from typing import List
+
+from src.types import MarkdownStr
+
+
+def build_document(*, task_amount: int) -> MarkdownStr:
+    """Build a WIP-like document with titles, tasks, details and empty lines.
+
+    Every fifth task has two details, so the document has roughly 1.5 lines per task.
+    """
+    lines: List[str] = []
+    for i in range(task_amount):
+        if i % 100 == 0:
+            lines.extend((f"## Section {i // 100}", ""))
+
+        symbol = "- [x]" if i % 3 == 0 else "- [ ]"
+        tags = f"#g:group{i % 7} #p:p{i % 3}"
+        if i % 11 == 0:
+            tags += f" #d:2022-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+        lines.append(f"{symbol} Task number {i} with `some code`  {tags} #{i:06x}")
+
+        if i % 5 == 0:
+            lines.append(f"  - detail of task {i}")
+            lines.append("  - another detail with `#g:escaped` text")
+
+        if i % 100 == 99:
+            lines.append("")
+
+    lines.extend(("", "<!-- External references -->", "", '[1]: https://a.b "c"', ""))
+    return "\n".join(lines)
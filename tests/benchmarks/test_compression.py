@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import pytest
+
+from src.interpreter import iter_items
+from src.io import compress_file
+from tests.benchmarks.documents import build_document
+from tests.benchmarks.timing import best_time
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("compression", ("gzip", "lzma"))
+def test_read_and_parse_compressed_segment(tmp_path: Path, compression: str) -> None:
+    content = build_document(task_amount=50_000)
+    size_in_mb = len(content.encode("utf-8")) / 1024 / 1024
+    plain_path = tmp_path / "plain.md"
+    plain_path.write_text(content)
+    compressed_path = tmp_path / "compressed.md"
+    compressed_path.write_text(content)
+    compressed_path = compress_file(compressed_path, compression=compression)
+
+    plain = best_time(lambda: list(iter_items(path=plain_path)))
+    compressed = best_time(lambda: list(iter_items(path=compressed_path)))
+
+    ratio = compressed_path.stat().st_size / plain_path.stat().st_size
+    print(
+        f"plain {size_in_mb / plain:.1f} MB/s -> {compression}"
+        f" {size_in_mb / compressed:.1f} MB/s, size ratio {ratio:.2f}"
+    )
+    assert list(iter_items(path=compressed_path)) == list(iter_items(path=plain_path))
+    assert ratio < 0.5
@@ -0,0 +1,36 @@
+import datetime
+from pathlib import Path
+
+import pytest
+
+from src.cli.deadlines import find_tasks_by_deadline
+from tests.benchmarks.documents import build_document
+from tests.benchmarks.timing import best_time
+
+
+@pytest.mark.benchmark
+def test_deadline_index_is_faster_than_parsing(tmp_path: Path) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text("- [ ] Pending task  #d:2022-03-01\n")
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text(build_document(task_amount=100_000))
+    today = datetime.date(2022, 3, 1)
+
+    def find_tasks(use_index: bool) -> list:
+        return find_tasks_by_deadline(
+            path=wip_path,
+            today=today,
+            within=7,
+            limit=10,
+            archive_paths=[archive_path],
+            use_index=use_index,
+        )
+
+    find_tasks(use_index=True)  # build indexes
+
+    reference = best_time(lambda: find_tasks(use_index=False))
+    current = best_time(lambda: find_tasks(use_index=True))
+
+    print(f"{reference * 1e3:.0f} ms -> {current * 1e3:.1f} ms")
+    assert find_tasks(use_index=True) == find_tasks(use_index=False)
+    assert current * 10 < reference
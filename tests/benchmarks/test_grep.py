@@ -0,0 +1,34 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from src.cli.grep import grep_tasks
+from src.trigrams import load_trigram_index
+from tests.benchmarks.documents import build_document
+from tests.benchmarks.timing import best_time
+
+
+@pytest.mark.benchmark
+def test_grep_with_trigram_index(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(build_document(task_amount=300_000))
+    directory = tmp_path / "trigrams"
+    start = time.perf_counter()
+    load_trigram_index(path, directory=directory)
+    indexing = time.perf_counter() - start
+
+    def append_and_grep() -> None:
+        with path.open("a") as f:
+            f.write("- [x] Appended task\n")
+        matches = grep_tasks(
+            text="number 123456", archive_paths=[path], directory=directory
+        )
+        assert [match.task.description for match in matches] == [
+            "Task number 123456 with `some code`"
+        ]
+
+    current = best_time(append_and_grep)
+
+    print(f"Indexing: {indexing:.1f} s, grep: {current * 1e3:.1f} ms")
+    assert current < 0.1
@@ -0,0 +1,61 @@
+from array import array
+from pathlib import Path
+from typing import Set
+
+import pytest
+
+from src.cli.hash import iter_archived_hash_keys
+from src.hash import Hash, HashAllocator, create_new_hash, hash_key
+from src.interpreter import iter_items
+from src.types import Task
+from tests.benchmarks.documents import build_document
+from tests.benchmarks.timing import best_time
+
+EXISTING_HASHES_AMOUNT = 1_000_000
+NEW_HASHES_AMOUNT = 50_000
+
+
+@pytest.mark.benchmark
+def test_allocating_hashes_in_bulk_is_faster_than_one_by_one() -> None:
+    existing = {Hash(f"{number * 7:06x}") for number in range(EXISTING_HASHES_AMOUNT)}
+    # As read from the index of the archive
+    existing_keys = array("Q", sorted(hash_key(hash) for hash in existing))
+
+    def create_new_hashes() -> None:
+        existing_copy = existing.copy()
+        for _ in range(NEW_HASHES_AMOUNT):
+            existing_copy.add(create_new_hash(existing=existing_copy))
+
+    def allocate_hashes() -> None:
+        allocator = HashAllocator(existing=existing_keys)
+        allocator.allocate(NEW_HASHES_AMOUNT)
+
+    reference = best_time(create_new_hashes)
+    current = best_time(allocate_hashes)
+
+    print(f"{reference * 1e3:.0f} ms -> {current * 1e3:.0f} ms")
+    assert current < reference
+
+
+@pytest.mark.benchmark
+def test_reading_appended_hashes_is_faster_than_parsing(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(build_document(task_amount=50_000))
+    list(iter_archived_hash_keys([path]))
+
+    def parse_hashes() -> Set[Hash]:
+        items = iter_items(path=path)
+        return {item.hash for item in items if isinstance(item, Task) and item.hash}
+
+    def append_and_read_hashes() -> None:
+        with path.open("a") as f:
+            f.write("- [x] Appended task  #g:appended #abc999\n")
+        list(iter_archived_hash_keys([path]))
+
+    reference = best_time(parse_hashes)
+    current = best_time(append_and_read_hashes)
+
+    print(f"{reference * 1e3:.0f} ms -> {current * 1e3:.2f} ms")
+    expected_keys = {hash_key(hash) for hash in parse_hashes()}
+    assert set(iter_archived_hash_keys([path])) == expected_keys
+    assert current * 10 < reference
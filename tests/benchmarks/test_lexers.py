@@ -0,0 +1,21 @@
+from typing import Dict, List
+
+import pytest
+
+from src.interpreter import LEXERS, Token, tokenize_document
+from tests.benchmarks.documents import build_document
+from tests.benchmarks.timing import best_time
+
+
+@pytest.mark.benchmark
+def test_lexers_produce_the_same_tokens() -> None:
+    document = build_document(task_amount=30_000)
+
+    tokens: Dict[str, List[List[Token]]] = {}
+    for name, lexer in LEXERS.items():
+        lines = list(tokenize_document(document, lexer=lexer))
+        tokens[name] = [line.tokens for line in lines]
+        elapsed = best_time(lambda: list(tokenize_document(document, lexer=lexer)))
+        print(f"{name} lexer: {elapsed * 1e3:.1f} ms")
+
+    assert tokens["single-pass"] == tokens["multi-pass"]
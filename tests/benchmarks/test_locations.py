@@ -0,0 +1,48 @@
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from src.cli.task import find_task
+from src.hash import Hash
+from src.interpreter import iter_items
+from src.types import Task
+from tests.benchmarks.documents import build_document
+from tests.benchmarks.timing import best_time
+
+
+@pytest.mark.benchmark
+def test_finding_task_by_hash_is_faster_than_parsing(tmp_path: Path) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text(build_document(task_amount=1_000))
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text(build_document(task_amount=100_000))
+    hash = Hash(f"{54_321:06x}")
+    directory = tmp_path / "locations"
+
+    def parse_task() -> Optional[Task]:
+        for path in (wip_path, archive_path):
+            for item in iter_items(path=path):
+                if isinstance(item, Task) and item.hash == hash:
+                    return item
+        return None
+
+    def append_and_find_task() -> Optional[Task]:
+        with archive_path.open("a") as f:
+            f.write("- [x] Appended task  #g:appended\n")
+        found = find_task(
+            hash=hash,
+            wip_path=wip_path,
+            archive_paths=[archive_path],
+            directory=directory,
+        )
+        return None if found is None else found.task
+
+    append_and_find_task()  # locate tasks
+
+    reference = best_time(parse_task)
+    current = best_time(append_and_find_task)
+
+    print(f"{reference * 1e3:.0f} ms -> {current * 1e3:.1f} ms")
+    assert append_and_find_task() == parse_task()
+    assert current * 10 < reference
@@ -0,0 +1,27 @@
+import tracemalloc
+
+import pytest
+
+from src.interpreter import parse_document
+from tests.benchmarks.documents import build_document
+
+MB = 1024 * 1024
+
+# Before tokens and items used slots and shared instances, parsing this document
+# peaked at ~95 MB
+PEAK_MEMORY_BUDGET = 75 * MB
+
+
+@pytest.mark.benchmark
+def test_peak_memory_parsing_100k_tasks_is_within_budget() -> None:
+    document = build_document(task_amount=100_000)
+
+    tracemalloc.start()
+    try:
+        items = parse_document(document)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    print(f"{len(items)} items parsed, peak memory: {peak / MB:.1f} MB")
+    assert peak < PEAK_MEMORY_BUDGET
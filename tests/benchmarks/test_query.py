@@ -0,0 +1,38 @@
+from typing import List
+
+import pytest
+
+from src.interpreter import parse_document
+from src.query import TaskIndex, parse_query
+from src.types import Tag, Task
+from tests.benchmarks.documents import build_document
+from tests.benchmarks.timing import best_time
+
+
+@pytest.mark.benchmark
+def test_query_is_faster_than_scanning_tasks() -> None:
+    items = parse_document(build_document(task_amount=50_000))
+    tasks = [item for item in items if isinstance(item, Task)]
+    group, priority = Tag(type="g", value="group3"), Tag(type="p", value="p1")
+
+    def scan() -> List[Task]:
+        return [
+            task
+            for task in tasks
+            if group in task.tags and priority not in task.tags and not task.done
+        ]
+
+    index = TaskIndex(tasks)
+    query = parse_query("g:group3 AND NOT p:p1 AND undone")
+
+    reference = best_time(scan)
+    current = best_time(lambda: index.select(query))
+    indexing = best_time(lambda: TaskIndex(tasks))
+    matching = best_time(lambda: [task for task in tasks if query.matches(task)])
+
+    print(f"{reference * 1e3:.1f} ms -> {current * 1e3:.2f} ms")
+    print(f"Indexing: {indexing * 1e3:.1f} ms, matching: {matching * 1e3:.1f} ms")
+    assert index.select(query) == scan()
+    assert current * 2 < reference
+    # A single query, as `filter` runs, is quicker to match than to index
+    assert matching < indexing + current
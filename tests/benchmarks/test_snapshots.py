@@ -0,0 +1,28 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from src.cache import SnapshotCache, load_items
+from tests.benchmarks.documents import build_document
+
+
+@pytest.mark.benchmark
+def test_warm_snapshot_is_faster_than_parsing(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(build_document(task_amount=100_000))
+    snapshots = SnapshotCache(directory=tmp_path / "snapshots")
+
+    start = time.perf_counter()
+    cold_items = list(load_items(path=path, snapshots=snapshots))
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    warm_items = list(load_items(path=path, snapshots=snapshots))
+    warm = time.perf_counter() - start
+
+    print(
+        f"{len(warm_items)} items: {cold * 1e3:.0f} ms cold, {warm * 1e3:.0f} ms warm"
+    )
+    assert warm_items == cold_items
+    assert warm < cold
@@ -0,0 +1,84 @@
+import random
+from typing import Iterator, Tuple
+
+import pytest
+
+from src.interpreter import IsEscaped, split_escaped
+from tests.benchmarks.timing import best_time
+
+
+def split_escaped_character_by_character(
+    *, text: str
+) -> Iterator[Tuple[IsEscaped, str]]:
+    """Previous implementation of `split_escaped`, kept as a reference."""
+    if not text:
+        yield (False, "")
+        return
+
+    is_escaped_text = False
+    BACKTICK = "`"
+    backtick_amount = sum((1 for character in text if character == BACKTICK))
+    all_backticks_are_closed = backtick_amount % 2 == 0
+
+    buffer = ""
+    backticks_found_so_far = 0
+    for character in text:
+        if character == BACKTICK:
+            backticks_found_so_far += 1
+            if (
+                not all_backticks_are_closed
+                and backticks_found_so_far == backtick_amount
+            ):
+                buffer += character
+                continue
+
+            if is_escaped_text is True:
+                yield (is_escaped_text, buffer)
+                buffer = character
+            else:
+                buffer += character
+                yield (is_escaped_text, buffer)
+                buffer = ""
+            is_escaped_text = not is_escaped_text
+        else:
+            buffer += character
+
+    yield (is_escaped_text, buffer)
+
+
+def build_line(length: int, seed: int) -> str:
+    """Build a task line with many inline code spans."""
+    randomizer = random.Random(seed)
+    words = [
+        "foo",
+        "bar",
+        "`baz`",
+        "`#g:g1`",
+        "`git log --oneline --graph --decorate --all -- src/interpreter.py`",
+        "qux",
+        "`",
+        "quux  ",
+    ]
+    line = "- [ ] "
+    while len(line) < length:
+        line += randomizer.choice(words) + " "
+    return line[:length]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_split_escaped_matches_reference_implementation(seed: int) -> None:
+    line = build_line(length=seed * 7, seed=seed)
+    expected = list(split_escaped_character_by_character(text=line))
+    assert list(split_escaped(text=line)) == expected
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("length", (1_000, 10_000, 100_000))
+def test_split_escaped_is_faster_than_reference(length: int) -> None:
+    line = build_line(length=length, seed=length)
+
+    reference = best_time(lambda: list(split_escaped_character_by_character(text=line)))
+    current = best_time(lambda: list(split_escaped(text=line)))
+
+    print(f"{length} chars: {reference * 1e3:.2f} ms -> {current * 1e3:.2f} ms")
+    assert current < reference
@@ -0,0 +1,43 @@
+import datetime
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from src.cli.stats import collect_stats
+from tests.benchmarks.documents import build_document
+
+MB = 1024 * 1024
+
+# Only counters are kept, e.g.: one per section, while parsing documents takes
+# hundreds of bytes per task, see test_memory.py
+PEAK_MEMORY_BUDGET = 1 * MB
+
+
+def peak_memory_collecting_stats(tmp_path: Path, task_amount: int) -> int:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text(build_document(task_amount=task_amount))
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text(build_document(task_amount=task_amount))
+
+    tracemalloc.start()
+    try:
+        collect_stats(
+            wip_path=wip_path,
+            archive_path=archive_path,
+            today=datetime.date(2022, 6, 1),
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+@pytest.mark.benchmark
+def test_stats_memory_does_not_depend_on_file_size(tmp_path: Path) -> None:
+    small = peak_memory_collecting_stats(tmp_path, task_amount=5_000)
+    large = peak_memory_collecting_stats(tmp_path, task_amount=50_000)
+
+    print(f"Peak memory: {small / MB:.2f} MB -> {large / MB:.2f} MB")
+    assert large < PEAK_MEMORY_BUDGET
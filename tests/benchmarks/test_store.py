@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import pytest
+
+from src.cli.lookup import scan_tasks
+from src.store import TaskStore
+from src.types import Tag
+from tests.benchmarks.documents import build_document
+from tests.benchmarks.timing import best_time
+
+
+@pytest.mark.benchmark
+def test_searching_store_is_faster_than_scanning_archive(tmp_path: Path) -> None:
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text(build_document(task_amount=50_000))
+    store = TaskStore(path=tmp_path / "archive.sqlite")
+    store.load_archive([archive_path])
+    tag = Tag(type="g", value="group3")
+
+    def scan() -> list:
+        tasks = scan_tasks(archive_path, tags=[tag])
+        return [task for task in tasks if "4245" in task.description.split()]
+
+    reference = best_time(scan)
+    current = best_time(lambda: store.search("4245", tags=[tag]))
+
+    print(f"{reference * 1e3:.0f} ms -> {current * 1e3:.2f} ms")
+    (task,) = scan()
+    assert store.search("4245", tags=[tag]) == [task]
+    assert current * 100 < reference
+    store.close()
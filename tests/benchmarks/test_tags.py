@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import pytest
+
+from src.cli.tags import scrape_tags
+from src.index import load_index
+from tests.benchmarks.documents import build_document
+from tests.benchmarks.timing import best_time
+
+
+@pytest.mark.benchmark
+def test_reading_appended_tags_is_faster_than_parsing(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(build_document(task_amount=50_000))
+    load_index(document_path=path)
+
+    def append_and_load_tags() -> None:
+        with path.open("a") as f:
+            f.write("- [x] Appended task  #g:appended\n")
+        load_index(document_path=path)
+
+    reference = best_time(lambda: set(scrape_tags(path)))
+    current = best_time(append_and_load_tags)
+
+    print(f"{reference * 1e3:.0f} ms -> {current * 1e3:.2f} ms")
+    assert set(scrape_tags(path)) == load_index(document_path=path).tags
+    assert current * 10 < reference
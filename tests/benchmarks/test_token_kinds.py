@@ -0,0 +1,105 @@
+from typing import Callable, List, Set
+
+import pytest
+
+from src.interpreter import (
+    BulletPointPrefix,
+    CompletedSymbol,
+    EmptyLineToken,
+    EscapedText,
+    ExternalReferencesHeaderToken,
+    ExternalReferenceToken,
+    HashToken,
+    IncompleteSymbol,
+    Indentation,
+    TagToken,
+    Text,
+    TitleToken,
+    TokenizedLine,
+    is_detail,
+    is_empty_line,
+    is_external_reference,
+    is_external_references_header,
+    is_task,
+    is_title,
+    tokenize_document,
+)
+from tests.benchmarks.documents import build_document
+from tests.benchmarks.timing import best_time
+
+LineKind = str
+
+
+def classify_with_sets(line: TokenizedLine) -> LineKind:
+    """Previous set based classification of a line, kept as a reference."""
+    token_types: Set = {token.__class__ for token in line.tokens}
+    if {EmptyLineToken} == token_types:
+        return "empty_line"
+
+    if (
+        Text in token_types
+        and (IncompleteSymbol in token_types or CompletedSymbol in token_types)
+        and not token_types
+        - {Text, IncompleteSymbol, CompletedSymbol, TagToken, HashToken, EscapedText}
+    ):
+        return "task"
+
+    mandatory_tokens = {Indentation, BulletPointPrefix, Text}
+    if not token_types < mandatory_tokens and not (
+        token_types - mandatory_tokens - {EscapedText}
+    ):
+        return "detail"
+
+    if {ExternalReferencesHeaderToken} == token_types:
+        return "external_references_header"
+
+    if {ExternalReferenceToken} == token_types:
+        return "external_reference"
+
+    if {TitleToken} == token_types:
+        return "title"
+
+    return "unknown"
+
+
+def classify_with_kinds(line: TokenizedLine) -> LineKind:
+    kinds = line.kinds
+    if is_empty_line(kinds):
+        return "empty_line"
+    if is_task(kinds):
+        return "task"
+    if is_detail(kinds):
+        return "detail"
+    if is_external_references_header(kinds):
+        return "external_references_header"
+    if is_external_reference(kinds):
+        return "external_reference"
+    if is_title(kinds):
+        return "title"
+    return "unknown"
+
+
+@pytest.fixture(scope="module")
+def tokenized_lines() -> List[TokenizedLine]:
+    # roughly 100k lines
+    document = build_document(task_amount=70_000)
+    return list(tokenize_document(document))
+
+
+@pytest.mark.benchmark
+def test_classify_lines_with_kinds_is_faster_than_with_sets(
+    tokenized_lines: List[TokenizedLine],
+) -> None:
+    def classify_all(classify: Callable[[TokenizedLine], LineKind]) -> List[LineKind]:
+        return [classify(line) for line in tokenized_lines]
+
+    assert classify_all(classify_with_kinds) == classify_all(classify_with_sets)
+
+    with_sets = best_time(lambda: classify_all(classify_with_sets))
+    with_kinds = best_time(lambda: classify_all(classify_with_kinds))
+
+    print(
+        f"{len(tokenized_lines)} lines:"
+        f" {with_sets * 1e3:.1f} ms (sets) -> {with_kinds * 1e3:.1f} ms (kinds)"
+    )
+    assert with_kinds < with_sets
@@ -0,0 +1,26 @@
+import difflib
+
+import pytest
+
+from src.validation import validate_round_trip
+from tests.benchmarks.documents import build_document
+from tests.benchmarks.timing import best_time
+
+
+def validate_with_differ(original: str, parsed: str) -> bool:
+    """Previous implementation, kept as a reference."""
+    raw_diff = difflib.Differ().compare(original.split("\n"), parsed.split("\n"))
+    return not any(not line.startswith("  ") for line in raw_diff)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("mismatches", (0, 3))
+def test_validation_is_faster_than_differ(mismatches: int) -> None:
+    original = build_document(task_amount=20_000)
+    parsed = original.replace(" with `some code`", "  with `some code`", mismatches)
+
+    reference = best_time(lambda: validate_with_differ(original, parsed))
+    current = best_time(lambda: validate_round_trip(original, parsed))
+
+    print(f"{mismatches} mismatches: {reference:.2f} s -> {current * 1e3:.2f} ms")
+    assert current < reference
@@ -0,0 +1,7 @@
+import timeit
+from typing import Callable
+
+
+def best_time(function: Callable[[], object], *, number: int = 1) -> float:
+    """Return the best wall time in seconds out of a few runs of `function`."""
+    return min(timeit.repeat(function, number=number, repeat=3))
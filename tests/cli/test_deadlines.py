@@ -0,0 +1,114 @@
+import datetime
+from pathlib import Path
+from typing import Any, List, Optional
+
+import pytest
+
+from src.cli.deadlines import find_tasks_by_deadline
+from src.index import index_path
+
+TODAY = datetime.date(2022, 1, 15)
+WIP = "\n".join(
+    (
+        "- [ ] Overdue  #d:2022-01-10",
+        "- [x] Completed late  #d:2022-01-10",
+        "- [ ] No deadline",
+        "- [ ] Today  #d:2022-01-15",
+        "- [ ] Next week  #d:2022-01-22",
+        "- [ ] Next month  #d:2022-02-15",
+        "",
+    )
+)
+ARCHIVE = "\n".join(
+    (
+        "- [x] Archived long ago  #d:2021-12-01",
+        "- [x] Archived early  #d:2022-01-16",
+        "",
+    )
+)
+
+
+@pytest.fixture
+def paths(tmp_path: Path) -> List[Path]:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text(WIP)
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text(ARCHIVE)
+    return [wip_path, archive_path]
+
+
+@pytest.mark.parametrize("use_index", (True, False))
+@pytest.mark.parametrize(
+    ("within", "overdue", "limit", "expected"),
+    (
+        pytest.param(
+            None,
+            False,
+            None,
+            [
+                "Archived long ago",
+                "Completed late",
+                "Overdue",
+                "Today",
+                "Archived early",
+                "Next week",
+                "Next month",
+            ],
+            id="all",
+        ),
+        pytest.param(
+            7, False, None, ["Today", "Archived early", "Next week"], id="within"
+        ),
+        pytest.param(None, True, None, ["Overdue"], id="overdue"),
+        pytest.param(0, True, None, ["Overdue", "Today"], id="overdue_and_within"),
+        pytest.param(
+            None, False, 2, ["Archived long ago", "Completed late"], id="limit"
+        ),
+    ),
+)
+def test_find_tasks_by_deadline(
+    tmp_path: Path,
+    paths: List[Path],
+    use_index: bool,
+    within: Optional[int],
+    overdue: bool,
+    limit: Optional[int],
+    expected: List[str],
+) -> None:
+    wip_path, archive_path = paths
+
+    tasks = find_tasks_by_deadline(
+        path=wip_path,
+        today=TODAY,
+        within=within,
+        overdue=overdue,
+        limit=limit,
+        archive_paths=[archive_path],
+        use_index=use_index,
+    )
+
+    assert [task.description for task in tasks] == expected
+
+
+def test_wip_file_edited_in_the_middle_is_parsed_again(
+    tmp_path: Path, paths: List[Path]
+) -> None:
+    wip_path, _ = paths
+    # Edits in the middle of long files are not noticed by append-only indexes
+    padding = "- [ ] Padding\n" * 1000
+    wip_path.write_text(padding + WIP + padding)
+    find_tasks_by_deadline(path=wip_path, today=TODAY)
+    assert not index_path(wip_path).exists()
+
+    edited_wip = WIP.replace("Next week  #d:2022-01-22", "Next week  #d:2022-01-12")
+    edited_wip = edited_wip.replace(
+        "- [ ] Today  #d:2022-01-15", "  - no longer a task here."
+    )
+    wip_path.write_text(padding + edited_wip + padding)
+
+    def find(**kwargs: Any) -> List[str]:
+        tasks = find_tasks_by_deadline(path=wip_path, today=TODAY, **kwargs)
+        return [task.description for task in tasks]
+
+    assert find(overdue=True) == ["Overdue", "Next week"]
+    assert find(within=60) == ["Next month"]
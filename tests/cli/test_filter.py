@@ -0,0 +1,25 @@
+from pathlib import Path
+
+import pytest
+
+from src.cli.filter import filter_wip_file
+from src.query import parse_query
+
+
+def test_filter_cmd(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text(
+        "- [ ] First  #g:infra #p:low\n- [x] Second  #g:infra\n- [ ] Third  #g:ops\n"
+    )
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text("- [x] Archived  #g:infra\n  - detail\n")
+
+    filter_wip_file(path=wip_path, by_group="infra")
+    assert capsys.readouterr().out == "- [ ] First\n"
+
+    filter_wip_file(
+        path=wip_path,
+        query=parse_query("g:infra AND NOT p:low"),
+        archive_paths=[archive_path],
+    )
+    assert capsys.readouterr().out == "- [x] Second\n- [x] Archived\n  - detail\n"
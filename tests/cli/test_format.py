@@ -0,0 +1,102 @@
+import os
+import re
+from pathlib import Path
+
+import pytest
+
+from src.cli.format import format
+
+FORMATTED_DOCUMENT = "\n".join(
+    (
+        "## Backlog",
+        "",
+        "- [ ] Go [here][2]  #abc123",
+        "- [ ] Task with hash  #def456",
+        "",
+        "<!-- External references -->",
+        "",
+        '[1]: https://example.com "Example page"',
+        '[2]: http://foo.bar/ "?"',
+        "",
+    )
+)
+
+
+def test_format(tmp_path: Path) -> None:
+    path = tmp_path / "WIP.md"
+    path.write_text(
+        "\n".join(
+            (
+                "## Backlog",
+                "",
+                "- [ ] Go [here](http://foo.bar/)  #abc123",
+                "- [ ] Task without hash",
+                "",
+                "<!-- External references -->",
+                "",
+                '[1]: https://example.com "Example page"',
+            )
+        )
+    )
+
+    format(path=path)
+
+    formatted = path.read_text()
+    formatted_without_hashes = re.sub(r"#[0-9a-f]{6}", "#hash", formatted)
+    assert formatted_without_hashes == "\n".join(
+        (
+            "## Backlog",
+            "",
+            "- [ ] Go [here][2]  #hash",
+            "- [ ] Task without hash  #hash",
+            "",
+            "<!-- External references -->",
+            "",
+            '[1]: https://example.com "Example page"',
+            '[2]: http://foo.bar/ "?"',
+            "",
+        )
+    )
+
+
+def test_format_does_not_write_formatted_file(tmp_path: Path) -> None:
+    path = tmp_path / "WIP.md"
+    path.write_text(FORMATTED_DOCUMENT)
+    os.utime(path, ns=(0, 0))
+
+    format(path=path)
+
+    assert path.read_text() == FORMATTED_DOCUMENT
+    assert path.stat().st_mtime_ns == 0
+
+
+def test_format_does_not_write_invalid_file(tmp_path: Path) -> None:
+    path = tmp_path / "WIP.md"
+    invalid_document = FORMATTED_DOCUMENT.replace("  #def456", " #def456")
+    path.write_text(invalid_document)
+
+    with pytest.raises(SystemExit):
+        format(path=path)
+
+    assert path.read_text() == invalid_document
+
+
+@pytest.mark.usefixtures("wide_hashes")
+def test_format_adds_hashes_unlike_archived_ones(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "WIP.md"
+    path.write_text(FORMATTED_DOCUMENT.replace("  #def456", ""))
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text("- [x] Archived task  #0000aaa1\n")
+    # Draw the archived hash first
+    draws = iter((0xAAA1, 0xBBB2))
+    monkeypatch.setattr("random.Random.getrandbits", lambda self, bits: next(draws))
+
+    format(
+        path=path,
+        archive_paths=[archive_path],
+        hash_width=8,
+    )
+
+    assert path.read_text() == FORMATTED_DOCUMENT.replace("#def456", "#0000bbb2")
@@ -0,0 +1,16 @@
+from pathlib import Path
+
+from src.cli.hash import validate_and_add_hashes_to_tasks
+from src.interpreter import iter_items
+from src.types import Task
+
+
+def test_task_ending_with_a_short_commit_sha_gets_a_hash(tmp_path: Path) -> None:
+    path = tmp_path / "WIP.md"
+    path.write_text("- [ ] revert commit #a1b2c3d\n")
+
+    validate_and_add_hashes_to_tasks(path=path)
+
+    (task,) = [item for item in iter_items(path=path) if isinstance(item, Task)]
+    assert task.description == "revert commit #a1b2c3d"
+    assert task.hash is not None and len(task.hash) == 6
@@ -0,0 +1,88 @@
+import datetime
+from pathlib import Path
+
+import pytest
+
+from src.archive import SegmentedArchive
+from src.cli.stats import collect_stats
+from src.index import load_index
+from src.interpreter import parse_document
+from src.types import Task
+
+TODAY = datetime.date(2022, 1, 12)  # a Wednesday
+WIP = "\n".join(
+    (
+        "- [ ] Untitled  #g:ops",
+        "",
+        "## Infra",
+        "",
+        "- [ ] Overdue  #g:infra #d:2022-01-11",
+        "- [ ] This week  #g:infra #g:ops #d:2022-01-16",
+        "- [ ] Later  #d:2022-01-17",
+        "- [x] Done  #g:infra #d:2022-01-01",
+        "",
+    )
+)
+ARCHIVE = "- [x] Archived  #g:infra\n- [x] Another  #g:ci #d:2021-01-01\n"
+
+
+@pytest.mark.parametrize("indexed", (False, True))
+def test_collect_stats(tmp_path: Path, indexed: bool) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text(WIP)
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text(ARCHIVE)
+    if indexed:
+        load_index(document_path=archive_path)
+
+    stats = collect_stats(wip_path=wip_path, archive_path=archive_path, today=TODAY)
+
+    assert stats.to_json() == {
+        "today": "2022-01-12",
+        "groups": {
+            "ci": {"open": 0, "done": 1},
+            "infra": {"open": 2, "done": 2},
+            "ops": {"open": 2, "done": 0},
+        },
+        "sections": {"": 1, "Infra": 4},
+        "deadlines": {"overdue": 1, "this_week": 1, "later": 1},
+        "archive": {"archive.md": 2},
+    }
+    assert "  infra: 2 open, 2 done" in stats.to_str().splitlines()
+
+
+@pytest.mark.parametrize("indexed", (False, True))
+def test_reopened_archived_tasks_are_counted_as_open(
+    tmp_path: Path, indexed: bool
+) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text("")
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text(ARCHIVE + "- [ ] Reopened  #g:ci #d:2022-01-14\n")
+    if indexed:
+        load_index(document_path=archive_path)
+
+    stats = collect_stats(wip_path=wip_path, archive_path=archive_path, today=TODAY)
+
+    assert stats.to_json()["groups"]["ci"] == {"open": 1, "done": 1}
+    assert stats.to_json()["deadlines"] == {"overdue": 0, "this_week": 1, "later": 0}
+
+
+def test_collect_stats_of_segmented_archive(tmp_path: Path) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text("")
+    archive = SegmentedArchive(directory=tmp_path / "archive")
+    tasks = [item for item in parse_document(ARCHIVE) if isinstance(item, Task)]
+    archive.append(tasks=tasks[:1], content=ARCHIVE, segment_name="2022-01")
+    archive.append(tasks=tasks[1:], content="- [x] Third", segment_name="2022-02")
+    archive.compress_closed_segments(compression="gzip")
+
+    stats = collect_stats(
+        wip_path=wip_path,
+        archive_path=tmp_path / "unused.md",
+        today=TODAY,
+        archive=archive,
+    )
+
+    assert stats.archive == {"2022-01": 2, "2022-02": 1}
+    assert stats.to_str().endswith("  total: 3 tasks")
@@ -0,0 +1,14 @@
+from typing import Iterator
+
+import pytest
+
+from src.hash import DEFAULT_HASH_WIDTH, MAX_HASH_WIDTH
+from src.interpreter import set_hash_width
+
+
+@pytest.fixture
+def wide_hashes() -> Iterator[None]:
+    """Parse hashes of any supported width, as if `hash_width` were the widest."""
+    set_hash_width(MAX_HASH_WIDTH)
+    yield
+    set_hash_width(DEFAULT_HASH_WIDTH)
@@ -0,0 +1,133 @@
+import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from src.archive import MIGRATED_SEGMENT_NAME, SegmentedArchive, migrate_archive
+from src.cli.clean import archive_completed_tasks
+from src.cli.lookup import lookup_archived_tasks, reindex_archive
+from src.hash import Hash
+from src.interpreter import parse_document
+from src.types import Tag, Task
+
+
+def parse_tasks(raw: str) -> List[Task]:
+    return [item for item in parse_document(raw) if isinstance(item, Task)]
+
+
+def test_segment_names_depend_on_segment_period(tmp_path: Path) -> None:
+    date = datetime.date(2022, 5, 17)
+    assert SegmentedArchive(tmp_path, segment_period="year").segment_name(date) == (
+        "2022"
+    )
+    assert SegmentedArchive(tmp_path).segment_name(date) == "2022-05"
+    assert SegmentedArchive(tmp_path, "day").segment_name(date) == "2022-05-17"
+
+    with pytest.raises(ValueError, match="Unsupported archive segment period"):
+        SegmentedArchive(tmp_path, segment_period="week")
+
+
+def test_manifest_summarizes_segments(tmp_path: Path) -> None:
+    archive = SegmentedArchive(directory=tmp_path)
+    first = "- [x] First  #g:g1 #aaa111\n- [x] Second  #g:g2 #ccc333"
+    archive.append(tasks=parse_tasks(first), content=first, segment_name="2022-01")
+    third = "- [x] Third  #g:g1 #bbb222"
+    archive.append(tasks=parse_tasks(third), content=third, segment_name="2022-02")
+
+    reloaded = SegmentedArchive(directory=tmp_path)
+
+    assert [segment.name for segment in reloaded.segments] == ["2022-01", "2022-02"]
+    first_segment = reloaded.segments[0]
+    assert first_segment.task_count == 2
+    assert first_segment.tags == {Tag(type="g", value="g1"), Tag(type="g", value="g2")}
+    assert (first_segment.min_hash, first_segment.max_hash) == ("aaa111", "ccc333")
+    assert (tmp_path / "2022-01.md").read_text() == first + "\n"
+
+
+def test_segments_are_skipped(tmp_path: Path) -> None:
+    archive = SegmentedArchive(directory=tmp_path)
+    first = "- [x] First  #g:g1 #aaa111"
+    archive.append(tasks=parse_tasks(first), content=first, segment_name="2022-01")
+    second = "- [x] Second  #g:g2 #ccc333"
+    archive.append(tasks=parse_tasks(second), content=second, segment_name="2022-02")
+
+    def segment_names(
+        hash: Optional[Hash] = None, tags: Optional[List[Tag]] = None
+    ) -> List[str]:
+        paths = archive.iter_segment_paths(hash=hash, tags=tags)
+        return [path.stem for path in paths]
+
+    assert segment_names() == ["2022-01", "2022-02"]
+    assert segment_names(tags=[Tag(type="g", value="g2")]) == ["2022-02"]
+    assert segment_names(hash=Hash("aaa111")) == ["2022-01"]
+    assert segment_names(hash=Hash("bbb222")) == []
+
+
+def test_clean_archives_tasks_in_current_segment(tmp_path: Path) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text("- [x] Done task  #g:g1\n- [ ] Pending task\n")
+    archive = SegmentedArchive(directory=tmp_path / "archive")
+
+    archive_completed_tasks(
+        path=wip_path, archive_path=tmp_path / "unused.md", archive=archive
+    )
+
+    segment_name = archive.segment_name(datetime.date.today())
+    segment_path = tmp_path / "archive" / f"{segment_name}.md"
+    assert segment_path.read_text() == "- [x] Done task  #g:g1\n"
+    assert wip_path.read_text() == "- [ ] Pending task\n"
+    assert not (tmp_path / "unused.md").exists()
+
+
+def test_migrate_archive(tmp_path: Path) -> None:
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text("- [x] Old task #g:g1\n  - detail\n- [x] Older task\n")
+    archive = SegmentedArchive(directory=tmp_path / "archive")
+    current = "- [x] Recent task"
+    archive.append(tasks=parse_tasks(current), content=current, segment_name="2022-01")
+
+    assert migrate_archive(archive_path=archive_path, archive=archive) == 2
+
+    assert [segment.name for segment in archive.segments] == [
+        MIGRATED_SEGMENT_NAME,
+        "2022-01",
+    ]
+    migrated_path = archive.segment_path(MIGRATED_SEGMENT_NAME)
+    assert migrated_path.read_text() == archive_path.read_text()
+
+    with pytest.raises(ValueError, match="already migrated"):
+        migrate_archive(archive_path=archive_path, archive=archive)
+
+
+def test_closed_segments_are_compressed(
+    tmp_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    archive = SegmentedArchive(directory=tmp_path)
+    old = "- [x] Old task  #g:g1 #aaa111\n  - detail"
+    archive.append(tasks=parse_tasks(old), content=old, segment_name="2022-01")
+    current = "- [x] Current task  #g:g1 #bbb222"
+    archive.append(tasks=parse_tasks(current), content=current)
+
+    (compressed_path,) = archive.compress_closed_segments(compression="gzip")
+
+    assert compressed_path == tmp_path / "2022-01.md.gz"
+    assert not (tmp_path / "2022-01.md").exists()
+    assert not (tmp_path / "2022-01.md.index").exists()
+    reloaded = SegmentedArchive(directory=tmp_path)
+    assert reloaded.segment_path("2022-01") == compressed_path
+    assert reloaded.compress_closed_segments(compression="gzip") == []
+
+    lookup_archived_tasks(archive_path=tmp_path / "unused.md", archive=reloaded)
+    assert capsys.readouterr().out == old + "\n" + current + "\n"
+
+    lookup_archived_tasks(
+        archive_path=tmp_path / "unused.md", hash=Hash("aaa111"), archive=reloaded
+    )
+    assert capsys.readouterr().out == old + "\n"
+
+    reindex_archive(archive_path=tmp_path / "unused.md", archive=reloaded)
+    assert capsys.readouterr().out == "Indexed tasks: 1\n"
+
+    with pytest.raises(ValueError, match="is compressed"):
+        reloaded.append(tasks=[], content="", segment_name="2022-01")
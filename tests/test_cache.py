@@ -0,0 +1,257 @@
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from src.cache import (
+    LruCache,
+    ParseCache,
+    SnapshotCache,
+    ValidationCache,
+    digest,
+    load_items,
+    parse_document_incrementally,
+    parse_document_with_cache,
+)
+from src.interpreter import (
+    DocumentChunk,
+    Lexer,
+    Token,
+    parse_chunks_in_parallel,
+    parse_document,
+    tokenize_escaped_text,
+)
+from src.types import Item, MarkdownStr
+from src.validation import ValidationReport
+
+DOCUMENT: MarkdownStr = "\n".join(
+    (
+        "## Tasks to focus on",
+        "",
+        "- [ ] Task for today  #g:g1",
+        "  - with `escaped` details",
+        "",
+        "## Backlog",
+        "",
+        "- [ ] Future task  #345def",
+        "- [x] Done task",
+        "",
+        "<!-- External references -->",
+        "",
+        '[1]: https://example.com "Example page"',
+        "",
+    )
+)
+
+
+class CountingLexer:
+    def __init__(self) -> None:
+        self.tokenized_chunks: List[str] = []
+
+    def __call__(self, text: str) -> List[Token]:
+        self.tokenized_chunks.append(text)
+        return tokenize_escaped_text(text)
+
+
+def test_parse_document_incrementally(tmp_path: Path) -> None:
+    cache = ParseCache(path=tmp_path / "parse.pickle")
+    items = parse_document_incrementally(DOCUMENT, cache=cache)
+    assert items == parse_document(DOCUMENT)
+
+
+def test_only_changed_lines_are_tokenized_again(tmp_path: Path) -> None:
+    cache_path = tmp_path / "parse.pickle"
+    cache = ParseCache(path=cache_path)
+    parse_document_incrementally(DOCUMENT, cache=cache)
+    cache.save()
+
+    edited_document = DOCUMENT.replace("Future task", "Edited task")
+    lexer = CountingLexer()
+    items = parse_document_incrementally(
+        edited_document, cache=ParseCache.load(path=cache_path), lexer=lexer
+    )
+
+    assert items == parse_document(edited_document)
+    assert lexer.tokenized_chunks == ["- [ ] Edited task  #345def"]
+
+
+def test_changed_chunks_are_parsed_in_parallel_past_threshold(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    parallel_chunks: List[DocumentChunk] = []
+
+    def parse_chunks(
+        chunks: List[DocumentChunk], lexer: Optional[Lexer] = None
+    ) -> List[List[Item]]:
+        parallel_chunks.extend(chunks)
+        return parse_chunks_in_parallel(chunks, lexer=lexer, max_workers=1)
+
+    monkeypatch.setattr("src.cache.parse_chunks_in_parallel", parse_chunks)
+    cache = ParseCache(path=tmp_path / "parse.pickle")
+
+    items = parse_document_with_cache(DOCUMENT, cache=cache, parallel_threshold=10)
+    assert items == parse_document(DOCUMENT)
+    assert len(parallel_chunks) == len(cache.chunks) > 1  # the cache was cold
+
+    parallel_chunks.clear()
+    edited_document = DOCUMENT.replace("Future task", "Edited task")
+    items = parse_document_with_cache(
+        edited_document, cache=cache, parallel_threshold=100
+    )
+    assert items == parse_document(edited_document)
+    assert parallel_chunks == []  # a single short chunk changed
+
+
+def test_cache_is_discarded_if_interpreter_version_changes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache_path = tmp_path / "parse.pickle"
+    cache = ParseCache(path=cache_path)
+    parse_document_incrementally(DOCUMENT, cache=cache)
+    cache.save()
+    assert len(ParseCache.load(path=cache_path).lines) > 0
+
+    monkeypatch.setattr("src.interpreter.INTERPRETER_VERSION", -1)
+    reloaded_cache = ParseCache.load(path=cache_path)
+
+    assert len(reloaded_cache.lines) == 0
+    assert len(reloaded_cache.chunks) == 0
+
+
+def test_unreadable_cache_is_discarded(tmp_path: Path) -> None:
+    cache_path = tmp_path / "parse.pickle"
+    cache_path.write_bytes(b"not a pickle")
+    assert len(ParseCache.load(path=cache_path).lines) == 0
+
+
+def test_lru_cache_evicts_least_recently_used_entries() -> None:
+    cache: LruCache[int] = LruCache(max_size=2)
+    cache.set(digest("a"), 1)
+    cache.set(digest("b"), 2)
+    assert cache.get(digest("a")) == 1
+
+    cache.set(digest("c"), 3)
+
+    assert cache.get(digest("b")) is None
+    assert cache.get(digest("a")) == 1
+    assert cache.get(digest("c")) == 3
+
+
+def test_load_items_uses_fresh_snapshot(tmp_path: Path) -> None:
+    path = tmp_path / "wip.md"
+    path.write_text(DOCUMENT)
+    snapshots = SnapshotCache(directory=tmp_path / "snapshots")
+    assert snapshots.load(path=path) is None
+
+    items = load_items(path=path, snapshots=snapshots)
+
+    assert items == parse_document(DOCUMENT)
+    assert snapshots.load(path=path) == items
+
+
+def test_snapshot_is_stale_once_file_changes(tmp_path: Path) -> None:
+    path = tmp_path / "wip.md"
+    path.write_text(DOCUMENT)
+    snapshots = SnapshotCache(directory=tmp_path / "snapshots")
+    load_items(path=path, snapshots=snapshots)
+
+    edited_document = DOCUMENT.replace("Future task", "Edited task")
+    path.write_text(edited_document)
+
+    assert snapshots.load(path=path) is None
+    assert load_items(path=path, snapshots=snapshots) == parse_document(edited_document)
+
+
+def test_snapshot_of_file_edited_while_reading_is_stale(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "wip.md"
+    path.write_text(DOCUMENT)
+    edited_document = DOCUMENT.replace("Future task", "Edited task, longer")
+
+    def read_and_edit(path: Path) -> MarkdownStr:
+        content = path.read_text()
+        path.write_text(edited_document)
+        return content
+
+    snapshots = SnapshotCache(directory=tmp_path / "snapshots")
+    with monkeypatch.context() as patch:
+        patch.setattr("src.cache.read_markdown_file", read_and_edit)
+        load_items(path=path, snapshots=snapshots)
+
+    assert snapshots.load(path=path) is None
+    assert load_items(path=path, snapshots=snapshots) == parse_document(edited_document)
+
+
+def test_snapshot_is_fresh_if_only_modification_time_changes(tmp_path: Path) -> None:
+    path = tmp_path / "wip.md"
+    path.write_text(DOCUMENT)
+    snapshots = SnapshotCache(directory=tmp_path / "snapshots")
+    items = load_items(path=path, snapshots=snapshots)
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert snapshots.load(path=path) == items
+
+
+def test_rebuild_ignores_snapshot(tmp_path: Path) -> None:
+    path = tmp_path / "wip.md"
+    path.write_text(DOCUMENT)
+    load_items(path=path, snapshots=SnapshotCache(directory=tmp_path / "snapshots"))
+
+    snapshots = SnapshotCache(directory=tmp_path / "snapshots", rebuild=True)
+
+    assert snapshots.load(path=path) is None
+
+
+def remember_validation(
+    cache: ValidationCache, path: Path, report: ValidationReport
+) -> None:
+    stat = path.stat()
+    content = path.read_text()
+    cache.set(path=path, content=content, stat=stat, max_diffs=None, report=report)
+
+
+def test_validation_is_reused_while_file_does_not_change(tmp_path: Path) -> None:
+    path = tmp_path / "wip.md"
+    path.write_text(DOCUMENT)
+    cache = ValidationCache(path=tmp_path / "validations.pickle")
+    assert cache.get(path=path, max_diffs=None) is None
+
+    report = ValidationReport(diff=[(1, "- foo")])
+    remember_validation(cache, path, report)
+
+    assert cache.get(path=path, max_diffs=None) == report
+    assert cache.get(path=path, max_diffs=5) is None
+    loaded = ValidationCache.load(path=tmp_path / "validations.pickle")
+    assert loaded.get(path=path, max_diffs=None) == report
+
+
+def test_validation_is_stale_once_file_changes(tmp_path: Path) -> None:
+    path = tmp_path / "wip.md"
+    path.write_text(DOCUMENT)
+    cache = ValidationCache(path=tmp_path / "validations.pickle")
+    remember_validation(cache, path, ValidationReport(diff=[]))
+
+    path.write_text(DOCUMENT.replace("Future task", "Future_task"))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.get(path=path, max_diffs=None) is None
+
+
+def test_validation_is_reused_if_only_modification_time_changes(
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "wip.md"
+    path.write_text(DOCUMENT)
+    cache = ValidationCache(path=tmp_path / "validations.pickle")
+    report = ValidationReport(diff=[])
+    remember_validation(cache, path, report)
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.get(path=path, max_diffs=None) == report
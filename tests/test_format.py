@@ -1,8 +1,7 @@
-from pathlib import Path
-
 import pytest
 
-from src.format import tidy_up_external_references
+from src.format import move_links_to_external_references
+from src.interpreter import items_to_markdown, parse_document
 
 
 @pytest.mark.parametrize(
@@ -144,10 +143,6 @@ from src.format import tidy_up_external_references
         # ),
     ),
 )
-def test_tidy_up_external_references(tmp_path: Path, untidy: str, tidy: str) -> None:
-    path = tmp_path / "wip.md"
-    path.write_text(untidy)
-    tidy_up_external_references(path=path)
-
-    result = path.read_text()
-    assert result == tidy
+def test_move_links_to_external_references(untidy: str, tidy: str) -> None:
+    items = move_links_to_external_references(parse_document(untidy))
+    assert items_to_markdown(items) == tidy
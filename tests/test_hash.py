@@ -1,6 +1,13 @@
 import pytest
 
-from src.hash import Hash, create_hash, create_new_hash
+from src.hash import (
+    Hash,
+    HashAllocator,
+    create_hash,
+    create_new_hash,
+    hash_key,
+    is_hash,
+)
 
 
 @pytest.mark.skip(reason="only for developent purposes")
@@ -13,3 +20,54 @@ def test_create_new_hash():
     existing_hashes = {Hash("000000"), Hash("000001")}
     new_hash = create_new_hash(existing=existing_hashes)
     assert new_hash not in existing_hashes
+
+
+def test_hash_keys_differ_for_every_hash():
+    hashes = [Hash("00abcd"), Hash("000abcd"), Hash("abcd00"), Hash("zzzzzzzzzzz")]
+    keys = [hash_key(hash) for hash in hashes]
+    assert len(set(keys)) == len(hashes)
+    assert max(keys) < 2**64
+
+
+def test_allocate_hashes_unlike_existing_and_each_other():
+    existing = [Hash(f"{number:06x}") for number in range(16**4)]
+    allocator = HashAllocator.from_hashes(existing)
+
+    new_hashes = allocator.allocate(1000)
+
+    assert len(set(new_hashes)) == 1000
+    assert not set(new_hashes) & set(existing)
+    assert all(len(hash) == 6 for hash in new_hashes)
+    assert all(hash in allocator for hash in new_hashes)
+    assert len(allocator) == 16**4 + 1000
+
+
+def test_allocate_hashes_of_another_width():
+    allocator = HashAllocator.from_hashes([Hash("abc123")], width=8)
+    hashes = allocator.allocate(1000)
+    assert all(len(hash) == 8 for hash in hashes)
+    assert all(
+        is_hash(hash, width=8) for hash in hashes
+    )  # never only digits or letters
+    assert allocator.capacity == 16**8
+
+
+def test_collision_probability():
+    allocator = HashAllocator(existing=range(16**5), width=6)
+    assert allocator.collision_probability == 1 / 16
+
+    allocator.allocate(16**5)
+
+    assert allocator.collision_probability == 2 / 16
+
+
+def test_allocating_more_hashes_than_available_fails():
+    allocator = HashAllocator(existing=[], width=6)
+    with pytest.raises(ValueError, match="Cannot allocate"):
+        allocator.allocate(16**6 + 1)
+
+
+@pytest.mark.parametrize("width", (5, 12))
+def test_hash_width_must_be_supported(width: int) -> None:
+    with pytest.raises(ValueError, match="Hash width must be between"):
+        HashAllocator(existing=[], width=width)
@@ -0,0 +1,272 @@
+import datetime
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import pytest
+
+from src.cli.clean import archive_completed_tasks
+from src.cli.lookup import find_records, parse_tag
+from src.hash import Hash, hash_key
+from src.index import (
+    DocumentIndex,
+    IndexKeys,
+    Record,
+    index_keys,
+    index_path,
+    load_index,
+    parse_task_lines,
+)
+from src.types import MarkdownStr, Tag, TaskDetail
+
+ARCHIVE: MarkdownStr = "\n".join(
+    (
+        "- [x] Café with ünïcödé  #g:g1 #abc123",
+        "  - with details",
+        "- [x] Second task  #g:g2 #d:2022-01-31 #def456",
+        "- [x] Third task  #g:g1 #p:low",
+        "",
+    )
+)
+
+
+def test_find_and_read_tasks(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    index = DocumentIndex(document_path=path)
+
+    assert index.update() == 3
+
+    record = index.find_by_hash(Hash("def456"))
+    assert record is not None
+    assert record.line_number == 3
+    (task,) = index.read_tasks([record])
+    assert task.description == "Second task"
+    assert task.deadline == datetime.date(2022, 1, 31)
+
+    records = index.find_by_tag(Tag(type="g", value="g1"))
+    tasks = list(index.read_tasks(records))
+    assert [task.description for task in tasks] == ["Café with ünïcödé", "Third task"]
+    assert tasks[0].details == [TaskDetail(description="with details")]
+
+    assert index.find_by_deadline(datetime.date(2022, 1, 31)) == [record]
+
+
+def test_find_records_matching_all_criteria(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    index = load_index(document_path=path)
+
+    records = find_records(index, tags=[parse_tag("g:g1"), parse_tag("p:low")])
+
+    assert [record.line_number for record in records] == [4]
+    assert find_records(index) == index.records
+
+
+def test_index_is_updated_incrementally(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    load_index(document_path=path)
+
+    with path.open("a") as f:
+        f.write("- [x] Appended task  #g:g3 #aaa111\n")
+    index = DocumentIndex.load(document_path=path)
+
+    assert index.is_stale() is False
+    assert index.update() == 1
+    record = index.find_by_hash(Hash("aaa111"))
+    assert record is not None
+    assert record.line_number == 5
+
+
+def test_index_is_rebuilt_if_indexed_lines_change(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    load_index(document_path=path)
+
+    path.write_text(ARCHIVE.replace("Second task", "Edited task"))
+    index = DocumentIndex.load(document_path=path)
+
+    assert index.is_stale() is True
+    assert index.update() == 3
+    assert len(index.records) == 3
+
+
+def test_index_is_rebuilt_if_lines_in_the_middle_change(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("src.index.DIGESTED_BLOCK_SIZE", 64)
+    padding = "- [x] Padding  #g:g9\n" * 100
+    path = tmp_path / "archive.md"
+    path.write_text(padding + ARCHIVE + padding)
+    load_index(document_path=path)
+
+    # Same size edits, in a block other than the first and the last ones
+    edited = ARCHIVE.replace("- [x] Third task  #g:g1", "- [ ] Third task  #g:g3")
+    path.write_text(padding + edited + padding)
+    index = load_index(document_path=path)
+
+    records = index.find_by_tag(Tag(type="g", value="g3"))
+    assert [record.line_number for record in records] == [104]
+    assert len(index.find_by_tag(Tag(type="g", value="g1"))) == 1
+
+
+def test_settled_documents_are_not_digested_again(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    os.utime(path, (1_600_000_000, 1_600_000_000))
+    load_index(document_path=path)
+
+    def digest_blocks(*_: object, **__: object) -> List[bytes]:
+        raise AssertionError("The document was digested again")
+
+    monkeypatch.setattr("src.index._digest_blocks", digest_blocks)
+    assert len(load_index(document_path=path).records) == 3
+
+
+def test_incomplete_last_line_is_indexed_again(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE + "- [x] Incomplete  #g:g4")
+    index = load_index(document_path=path)
+    assert index.find_by_tag(Tag(type="g", value="g4"))
+
+    with path.open("a") as f:
+        f.write(" #bbb222\n")
+    index = load_index(document_path=path)
+
+    assert index.find_by_tag(Tag(type="g", value="g4")) == [
+        index.find_by_hash(Hash("bbb222"))
+    ]
+    assert len(index.records) == 4
+
+
+def test_clean_updates_archive_index(tmp_path: Path) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text("- [x] Done task  #g:g5 #ccc333\n- [ ] Pending task\n")
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text(ARCHIVE)
+    load_index(document_path=archive_path)
+
+    archive_completed_tasks(path=wip_path, archive_path=archive_path)
+
+    assert index_path(archive_path).exists()
+    index = DocumentIndex.load(document_path=archive_path)
+    assert index.is_stale() is False
+    record = index.find_by_hash(Hash("ccc333"))
+    assert record is not None
+    (task,) = index.read_tasks([record])
+    assert task.description == "Done task"
+
+
+def test_tags_are_read_incrementally(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    assert load_index(document_path=path).tags == {
+        Tag(type="g", value="g1"),
+        Tag(type="g", value="g2"),
+        Tag(type="d", value="2022-01-31"),
+        Tag(type="p", value="low"),
+    }
+
+    with path.open("a") as f:
+        f.write("- [x] Appended task  #g:g3\n")
+    parsed_lines: List[str] = []
+
+    def counting_index_keys(line: str) -> Optional[IndexKeys]:
+        parsed_lines.append(line)
+        return index_keys(line)
+
+    monkeypatch.setattr("src.index.index_keys", counting_index_keys)
+    tags = load_index(document_path=path).tags
+
+    assert Tag(type="g", value="g3") in tags
+    assert parsed_lines == ["- [x] Appended task  #g:g3"]
+
+
+def test_tags_are_read_from_scratch_if_file_shrinks(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    load_index(document_path=path).tags
+
+    path.write_text("- [x] Only task  #g:g9\n")
+
+    assert load_index(document_path=path).tags == {Tag(type="g", value="g9")}
+
+
+def test_tags_in_incomplete_last_line_are_read_again(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text("- [x] Task  #g:gro")
+    assert load_index(document_path=path).tags == {Tag(type="g", value="gro")}
+
+    with path.open("a") as f:
+        f.write("up\n")
+
+    assert load_index(document_path=path).tags == {Tag(type="g", value="group")}
+
+
+@pytest.mark.usefixtures("wide_hashes")
+def test_hashes_are_read_incrementally(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE + "- [x] Last task  #abc9")
+    assert list(load_index(document_path=path).iter_hash_keys()) == [
+        hash_key(Hash("abc123")),
+        hash_key(Hash("def456")),
+    ]
+
+    with path.open("a") as f:
+        f.write("99\n- [x] Appended task  #0123456789a\n")
+
+    assert list(load_index(document_path=path).iter_hash_keys()) == [
+        hash_key(Hash("abc123")),
+        hash_key(Hash("def456")),
+        hash_key(Hash("abc999")),
+        hash_key(Hash("0123456789a")),
+    ]
+
+
+def test_deadlines_are_indexed_in_order(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(
+        ARCHIVE + "- [x] Earlier  #d:2022-01-01\n- [x] Later  #d:2022-02-01"
+    )
+    load_index(document_path=path)
+
+    with path.open("a") as f:
+        f.write(" #abc999\n- [x] Same day  #d:2022-01-31\n")
+    index = DocumentIndex.load(document_path=path)
+    assert index.update() == 2  # the completed line and the appended one
+
+    def descriptions(
+        deadlines: Iterable[Tuple[datetime.date, List[Record]]]
+    ) -> List[Tuple[datetime.date, List[str]]]:
+        return [
+            (deadline, [task.description for task in index.read_tasks(records)])
+            for deadline, records in deadlines
+        ]
+
+    assert descriptions(index.iter_deadlines()) == [
+        (datetime.date(2022, 1, 1), ["Earlier"]),
+        (datetime.date(2022, 1, 31), ["Second task", "Same day"]),
+        (datetime.date(2022, 2, 1), ["Later"]),
+    ]
+    start, end = datetime.date(2022, 1, 2), datetime.date(2022, 1, 31)
+    assert descriptions(index.iter_deadlines(start=start, end=end)) == [
+        (end, ["Second task", "Same day"]),
+    ]
+    assert list(index.iter_deadlines(end=datetime.date(2021, 12, 31))) == []
+
+
+@pytest.mark.parametrize(
+    ("lines", "error"),
+    (
+        pytest.param(["## Title"], "got Title", id="title"),
+        pytest.param(["plain text"], "got nothing", id="nothing"),
+    ),
+)
+def test_parse_task_lines_without_task_fails(lines: List[str], error: str) -> None:
+    with pytest.raises(ValueError, match=f"Expected a task at line 3, {error}"):
+        parse_task_lines(lines, first_line_number=3)
@@ -1,11 +1,15 @@
+import dataclasses
 import datetime
-from typing import List, Tuple
+import pickle
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
 
 import pytest
 
 from src.interpreter import (
     HAS_HASH,
     HAS_TAGS,
+    LEXERS,
     BulletPointPrefix,
     CompletedSymbol,
     EmptyLineToken,
@@ -16,6 +20,7 @@ from src.interpreter import (
     IncompleteSymbol,
     Indentation,
     IsEscaped,
+    Lexer,
     Tag,
     TagToken,
     Task,
@@ -29,16 +34,23 @@ from src.interpreter import (
     is_task,
     is_title,
     items_to_markdown,
+    iter_analysed_items,
+    iter_items,
     parse_document,
+    parse_document_in_parallel,
     parse_external_reference,
     parse_tag_token,
     parse_task_detail,
     parse_title,
+    split_document,
     split_escaped,
+    token_kinds,
     tokenize_document,
+    tokenize_escaped_text,
+    tokenize_escaped_text_in_single_pass,
     tokenize_line,
 )
-from src.types import ExternalReference, MarkdownStr, TaskDetail, Title
+from src.types import EmptyLine, ExternalReference, Item, MarkdownStr, TaskDetail, Title
 
 
 @pytest.mark.parametrize(
@@ -82,6 +94,11 @@ def test_split_escaped_text(text: str, expected: List[Tuple[IsEscaped, str]]) ->
         pytest.param("foo  #000000", True, id="all_numbers"),
         pytest.param("foo  #aaaaaa", True, id="all_letters"),
         pytest.param("foo  #000aaa", True, id="numbers_and_letters"),
+        pytest.param("foo  #000aaa11", False, id="wider_hash"),
+        pytest.param("foo  #000aa", False, id="narrower_hash"),
+        pytest.param("ask in #general", False, id="wider_word"),
+        pytest.param("see #1234567", False, id="wider_number"),
+        pytest.param("foo  #000aaz11", False, id="wider_hash_must_be_hexadecimal"),
         pytest.param("foo `#000000`", False, id="escaped_hash"),
         pytest.param("foo `#000000`  #g:foo3", False, id="escaped_hash_and_tag"),
         # The hash must be at the end of the line, because it's the less human readable
@@ -262,11 +279,37 @@ def test_has_tag(text: str, expected_tags: List[str]) -> None:
         ),
     ),
 )
-def test_tokenize_line(line, expected):
-    result = tokenize_line(line)
+@pytest.mark.parametrize("lexer_name", list(LEXERS.keys()))
+def test_tokenize_line(line, expected, lexer_name):
+    result = tokenize_line(line, lexer=LEXERS[lexer_name])
     assert result == expected
 
 
+@pytest.mark.parametrize(
+    "text",
+    (
+        pytest.param("- [x]\tFoo", id="tab_after_completed_symbol"),
+        pytest.param("- [\t]\tFoo - [ ] bar", id="tabs_in_incomplete_symbol"),
+        pytest.param("  -\tDetail", id="tab_after_bullet_point"),
+        pytest.param(" \t - Detail", id="mixed_indentation"),
+        pytest.param("- [ ] Foo\t#g:g1", id="tab_before_tag"),
+        pytest.param("- [ ] Foo #g:a-b #g:a", id="tag_followed_by_hyphen"),
+        pytest.param("- [ ] Foo  #g:b#g:a-q #g:a", id="hash_symbol_inside_tag"),
+        pytest.param("- [ ] Foo #abcdefg #abcdef", id="hash_prefix_in_text"),
+        pytest.param("- [ ] Foo #abcdef #g:g1", id="hash_before_tag"),
+        pytest.param("- [ ] Foo #abcdef bar", id="hash_in_the_middle"),
+        pytest.param("- [ ] Foo  #g:g1 bar #p:p1", id="tag_in_the_middle"),
+        pytest.param("- [ ] #g:g1", id="only_tags"),
+        pytest.param("##Title ## Foo", id="title_without_space"),
+        pytest.param("[1]: foo", id="broken_external_reference"),
+        pytest.param("<!-- Something else -->", id="other_comment"),
+        pytest.param("- ", id="only_bullet_point"),
+    ),
+)
+def test_single_pass_lexer_matches_multi_pass_lexer(text: str) -> None:
+    assert tokenize_escaped_text_in_single_pass(text) == tokenize_escaped_text(text)
+
+
 def test_tokenize_document():
     raw_document: MarkdownStr = "\n".join(
         (
@@ -327,7 +370,7 @@ def test_tokenize_document():
     ),
 )
 def test_is_empty_line(token_types, expected):
-    assert is_empty_line(token_types) is expected
+    assert is_empty_line(token_kinds(token_types)) is expected
 
 
 @pytest.mark.parametrize(
@@ -341,7 +384,7 @@ def test_is_empty_line(token_types, expected):
     ),
 )
 def test_is_task(token_types, expected):
-    assert is_task(token_types) is expected
+    assert is_task(token_kinds(token_types)) is expected
 
 
 @pytest.mark.parametrize(
@@ -354,7 +397,7 @@ def test_is_task(token_types, expected):
     ),
 )
 def test_is_detail(token_types, expected):
-    assert is_detail(token_types) is expected
+    assert is_detail(token_kinds(token_types)) is expected
 
 
 @pytest.mark.parametrize(
@@ -367,7 +410,7 @@ def test_is_detail(token_types, expected):
     ),
 )
 def test_is_external_references_header(token_types, expected):
-    assert is_external_references_header(token_types) is expected
+    assert is_external_references_header(token_kinds(token_types)) is expected
 
 
 @pytest.mark.parametrize(
@@ -380,7 +423,7 @@ def test_is_external_references_header(token_types, expected):
     ),
 )
 def test_is_external_references(token_types, expected):
-    assert is_external_reference(token_types) is expected
+    assert is_external_reference(token_kinds(token_types)) is expected
 
 
 @pytest.mark.parametrize(
@@ -391,7 +434,19 @@ def test_is_external_references(token_types, expected):
     ),
 )
 def test_is_title(token_types, expected):
-    assert is_title(token_types) is expected
+    assert is_title(token_kinds(token_types)) is expected
+
+
+def test_tokenized_line_kinds():
+    line = TokenizedLine(line_number=1, tokens=tokenize_line("- [ ] Foo  #g:g1"))
+    assert line.kinds == token_kinds({IncompleteSymbol, Text, TagToken})
+
+
+def test_stateless_tokens_and_items_are_shared():
+    assert tokenize_line("")[0] is tokenize_line("")[0]
+    assert tokenize_line("- [ ] a")[0] is tokenize_line("- [ ] b")[0]
+    assert EmptyLine() is EmptyLine()
+    assert pickle.loads(pickle.dumps(EmptyLine())) is EmptyLine()
 
 
 def test_parse_tag_token():
@@ -439,6 +494,7 @@ def test_add_detail_to_task():
         tags=[],
         details=[TaskDetail(description="Detail")],
     )
+    assert task.details == [], "original task must not be modified"
 
 
 def test_parse_a_single_uncompleted_task_with_details():
@@ -501,10 +557,37 @@ def test_parse_and_restore_tasks_in_the_right_shape():
         "- [ ] Do baz  #p:priority_a"
     )
     tasks = parse_document(raw)
-    parsed_raw = items_to_markdown(tasks)
+    parsed_raw = items_to_markdown(tasks, verbatim=False)
     assert raw == parsed_raw
 
 
+@pytest.mark.parametrize("lexer_name", list(LEXERS.keys()))
+def test_words_after_hash_symbol_are_not_hashes(lexer_name: str) -> None:
+    raw: MarkdownStr = "- [ ] ask in #general\n- [ ] fix issue #1234567"
+    tasks = parse_document(raw, lexer=LEXERS[lexer_name])
+    assert [task.hash for task in tasks if isinstance(task, Task)] == [None, None]
+    assert items_to_markdown(tasks, verbatim=False) == raw
+
+
+@pytest.mark.parametrize("lexer_name", list(LEXERS.keys()))
+def test_short_commit_shas_are_not_hashes_by_default(lexer_name: str) -> None:
+    raw: MarkdownStr = "- [ ] revert commit #a1b2c3d"
+    (task,) = parse_document(raw, lexer=LEXERS[lexer_name])
+    assert isinstance(task, Task)
+    assert task.hash is None
+    assert task.description == "revert commit #a1b2c3d"
+
+
+@pytest.mark.usefixtures("wide_hashes")
+@pytest.mark.parametrize("lexer_name", list(LEXERS.keys()))
+def test_wider_hashes_are_parsed_if_hashes_are_that_wide(lexer_name: str) -> None:
+    raw: MarkdownStr = "- [ ] revert commit  #a1b2c3d"
+    (task,) = parse_document(raw, lexer=LEXERS[lexer_name])
+    assert isinstance(task, Task)
+    assert task.hash == "a1b2c3d"
+    assert task.description == "revert commit"
+
+
 def test_parse_external_references_header():
     raw: MarkdownStr = "\n".join(
         [
@@ -515,7 +598,7 @@ def test_parse_external_references_header():
         ]
     )
     items = parse_document(raw)
-    parsed_raw = items_to_markdown(items)
+    parsed_raw = items_to_markdown(items, verbatim=False)
     assert raw == parsed_raw
 
 
@@ -532,7 +615,7 @@ def test_parse_external_references():
         )
     )
     items = parse_document(raw)
-    parsed_raw = items_to_markdown(items)
+    parsed_raw = items_to_markdown(items, verbatim=False)
     assert raw == parsed_raw
 
 
@@ -555,14 +638,14 @@ def test_parse_wip_document_with_titles():
         )
     )
     items = parse_document(raw)
-    parsed_raw = items_to_markdown(items)
+    parsed_raw = items_to_markdown(items, verbatim=False)
     assert raw == parsed_raw
 
 
 def test_parse_task_with_escaped_text():
     raw: MarkdownStr = "- [ ] Escaped task `- [ ] Foo  #d:2021-09-18`  #g:g1"
     items = parse_document(raw)
-    parsed_raw = items_to_markdown(items)
+    parsed_raw = items_to_markdown(items, verbatim=False)
     assert raw == parsed_raw
 
 
@@ -574,10 +657,57 @@ def test_parse_task_detail_with_escaped_text():
         )
     )
     items = parse_document(raw)
-    parsed_raw = items_to_markdown(items)
+    parsed_raw = items_to_markdown(items, verbatim=False)
     assert raw == parsed_raw
 
 
+NON_CANONICAL_DOCUMENT: MarkdownStr = "\n".join(
+    (
+        "## Backlog",
+        "",
+        "- [ ] Do foo #g:group1",
+        "  - Some details",
+        "- [ ] Do bar  #p:high",
+        "",
+    )
+)
+
+
+def test_unmodified_items_are_serialized_verbatim():
+    items = parse_document(NON_CANONICAL_DOCUMENT)
+    assert items_to_markdown(items) == NON_CANONICAL_DOCUMENT
+
+
+def test_unmodified_items_are_rendered_again_if_not_verbatim():
+    items = parse_document(NON_CANONICAL_DOCUMENT)
+    rendered = items_to_markdown(items, verbatim=False)
+    assert rendered == NON_CANONICAL_DOCUMENT.replace(" #g:", "  #g:")
+
+
+def test_modified_items_are_rendered_again():
+    items = parse_document(NON_CANONICAL_DOCUMENT)
+    modified = [
+        dataclasses.replace(item, done=True) if isinstance(item, Task) else item
+        for item in items
+    ]
+    assert items_to_markdown(modified) == "\n".join(
+        (
+            "## Backlog",
+            "",
+            "- [x] Do foo  #g:group1",
+            "  - Some details",
+            "- [x] Do bar  #p:high",
+            "",
+        )
+    )
+
+
+def test_source_text_survives_pickling():
+    items = parse_document(NON_CANONICAL_DOCUMENT)
+    unpickled = pickle.loads(pickle.dumps(items))
+    assert items_to_markdown(unpickled) == NON_CANONICAL_DOCUMENT
+
+
 def test_task_with_deadline():
     raw: MarkdownStr = "- [ ] Task  #d:2021-09-23"
     items = parse_document(raw)
@@ -586,6 +716,142 @@ def test_task_with_deadline():
     assert task.deadline == datetime.date(2021, 9, 23)
 
 
+def test_iter_items_yields_same_items_as_parse_document(tmp_path: Path) -> None:
+    raw: MarkdownStr = "\n".join(
+        (
+            "## Tasks to focus on",
+            "",
+            "- [ ] Task for today  #g:g1",
+            "  - with details",
+            "",
+            "## Backlog",
+            "",
+            "- [ ] Future task  #345def",
+            "- [x] Done task",
+            "",
+            "<!-- External references -->",
+            "",
+            '[1]: https://example.com "Example page"',
+            "",
+        )
+    )
+    path = tmp_path / "wip.md"
+    path.write_text(raw)
+
+    items = list(iter_items(path=path))
+
+    assert items_to_markdown(items, verbatim=False) == raw
+    assert [type(item) for item in items] == [
+        type(item) for item in parse_document(raw)
+    ]
+
+
+def test_iter_analysed_items_yields_task_once_its_details_end() -> None:
+    consumed_lines: List[int] = []
+
+    def lines() -> Iterator[TokenizedLine]:
+        raw_lines = ["- [ ] Task", "  - detail", "- [ ] Other task", "  - detail"]
+        for line_number, line in enumerate(raw_lines, start=1):
+            consumed_lines.append(line_number)
+            yield TokenizedLine(line_number=line_number, tokens=tokenize_line(line))
+
+    items = iter_analysed_items(lines())
+    first_item = next(items)
+
+    assert first_item == Task(
+        description="Task",
+        done=False,
+        details=[TaskDetail(description="detail")],
+        tags=[],
+    )
+    assert consumed_lines == [1, 2, 3]
+
+
+def test_parse_task_with_many_details():
+    detail_amount = 5_000
+    raw: MarkdownStr = "\n".join(
+        ("- [ ] Long running task", *(f"  - log {i}" for i in range(detail_amount)))
+    )
+    (task,) = parse_document(raw)
+    assert isinstance(task, Task)
+    assert len(task.details) == detail_amount
+    assert task.details[-1] == TaskDetail(description=f"log {detail_amount - 1}")
+
+
+PARALLEL_DOCUMENT: MarkdownStr = "\n".join(
+    (
+        "## Tasks to focus on",
+        "",
+        "- [ ] Task for today  #g:g1",
+        "  - with details",
+        "",
+        "",
+        "- [x] Another task  #d:2021-09-23 #345def",
+        "",
+        "## Backlog",
+        "",
+        *(f"- [ ] Future task {i}\n  - detail {i}\n" for i in range(20)),
+        "",
+        "<!-- External references -->",
+        "",
+        '[1]: https://example.com "Example page"',
+        "",
+    )
+)
+
+
+@pytest.mark.parametrize("chunk_size", (1, 10, 50, 10_000))
+def test_split_document(chunk_size: int) -> None:
+    chunks = list(split_document(PARALLEL_DOCUMENT, chunk_size=chunk_size))
+
+    assert "\n".join(chunk.text for chunk in chunks) == PARALLEL_DOCUMENT
+    for chunk in chunks[1:]:
+        assert chunk.text.startswith("\n"), "chunks must start with an empty line"
+        first_line = PARALLEL_DOCUMENT.split("\n")[chunk.first_line_number - 1]
+        assert first_line == ""
+
+
+@pytest.mark.parametrize("chunk_size", (1, 10, 50, 10_000))
+def test_parse_document_in_parallel(chunk_size: int) -> None:
+    items = parse_document_in_parallel(
+        PARALLEL_DOCUMENT, max_workers=2, chunk_size=chunk_size
+    )
+    assert items == parse_document(PARALLEL_DOCUMENT)
+    assert items_to_markdown(items, verbatim=False) == PARALLEL_DOCUMENT
+
+
+def test_parse_document_in_parallel_raises_same_error_as_sequential_parser() -> None:
+    raw = PARALLEL_DOCUMENT.replace("- [ ] Future task 15", "Not a task")
+
+    with pytest.raises(ValueError) as sequential_error:
+        parse_document(raw)
+    with pytest.raises(ValueError) as parallel_error:
+        parse_document_in_parallel(raw, max_workers=2, chunk_size=10)
+
+    assert str(parallel_error.value) == str(sequential_error.value)
+    assert "(line 57)" in str(parallel_error.value)
+
+
+def test_parallel_threshold_is_in_bytes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    raw = "- [ ] Café with ünïcödé\n"
+    path = tmp_path / "wip.md"
+    path.write_text(raw)
+    threshold = len(raw)  # smaller than the size in bytes
+    parsed_in_parallel: List[str] = []
+
+    def parse_in_parallel(raw: str, lexer: Optional[Lexer] = None) -> List[Item]:
+        parsed_in_parallel.append(raw)
+        return parse_document(raw)
+
+    monkeypatch.setattr("src.interpreter.parse_document_in_parallel", parse_in_parallel)
+    parse_document(raw, parallel_threshold=threshold)
+    list(iter_items(path=path, parallel_threshold=threshold))
+
+    assert parsed_in_parallel == [raw, raw]
+
+
 @pytest.mark.skip(reason="TODO")
 def test_parse_empty_lines_between_tasks():
     ...
@@ -1,4 +1,14 @@
-from src.io import json_dumps_with_trailing_comma, json_loads_with_trailing_comma
+from pathlib import Path
+
+import pytest
+
+from src.io import (
+    compress_file,
+    iter_markdown_lines,
+    json_dumps_with_trailing_comma,
+    json_loads_with_trailing_comma,
+    read_markdown_file,
+)
 
 
 def test_read_with_trailing_comma():
@@ -75,3 +85,47 @@ def test_add_trailing_comma():
             "}",
         )
     )
+
+
+@pytest.mark.parametrize(
+    "content",
+    (
+        pytest.param("", id="empty_file"),
+        pytest.param("\n", id="only_new_line"),
+        pytest.param("a\nb", id="no_eof_new_line"),
+        pytest.param("a\nb\n", id="eof_new_line"),
+        pytest.param("a\n\n\nb\n\n", id="many_empty_lines"),
+    ),
+)
+def test_iter_markdown_lines(tmp_path: Path, content: str) -> None:
+    path = tmp_path / "file.md"
+    path.write_text(content)
+
+    lines = list(iter_markdown_lines(path=path))
+
+    assert lines == read_markdown_file(path=path).split("\n")
+
+
+@pytest.mark.parametrize("compression", ("gzip", "lzma"))
+def test_compressed_files_are_read_like_plain_ones(
+    tmp_path: Path, compression: str
+) -> None:
+    content = "- [ ] Café  #g:g1\n  - detail\n\n- [x] Done"
+    path = tmp_path / "file.md"
+    path.write_text(content)
+
+    compressed_path = compress_file(path, compression=compression)
+
+    assert not path.exists()
+    assert compressed_path.name.startswith("file.md.")
+    assert read_markdown_file(path=compressed_path) == content
+    assert list(iter_markdown_lines(path=compressed_path)) == content.split("\n")
+
+
+def test_unsupported_compression(tmp_path: Path) -> None:
+    path = tmp_path / "file.md"
+    path.write_text("")
+
+    with pytest.raises(ValueError, match="Unsupported compression"):
+        compress_file(path, compression="zip")
+    assert path.exists()
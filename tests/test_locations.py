@@ -0,0 +1,214 @@
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from src.cli.task import find_task, set_task_done
+from src.hash import Hash
+from src.index import Record
+from src.io import compress_file
+from src.locations import TaskLocations, TaskSpan, load_locations
+
+ARCHIVE = "\n".join(
+    (
+        "- [x] Café with ünïcödé  #g:g1 #abc123",
+        "  - with details",
+        "- [x] Second task  #g:g2 #def456",
+        "- [x] Task without hash  #g:g1",
+        "- [x] Last task  #abc999",
+        "",
+    )
+)
+WIP = "\n".join(
+    (
+        "## Title",
+        "",
+        "- [ ] First  #g:g1 #aaa111",
+        "  - first detail",
+        "  - second detail",
+        "- [x] Second  #bbb222",
+        "",
+        "## Another title",
+        "",
+        "- [ ] Third  #ccc333",
+        "",
+    )
+)
+
+
+def test_find_tasks_by_hash(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    locations = load_locations(document_path=path, directory=tmp_path / "locations")
+
+    span = locations.find(Hash("abc123"))
+    assert span == TaskSpan(record=Record(offset=0, line_number=1), lines=2)
+    assert span.last_line_number == 2
+    assert locations.read_lines(Hash("abc123"), span) == [
+        "- [x] Café with ünïcödé  #g:g1 #abc123",
+        "  - with details",
+    ]
+
+    last_span = locations.find(Hash("abc999"))
+    assert last_span is not None
+    task = locations.read_task(Hash("abc999"), last_span)
+    assert task is not None
+    assert task.description == "Last task"
+
+    assert locations.find(Hash("000000")) is None
+
+
+@pytest.mark.usefixtures("wide_hashes")
+def test_locations_are_updated_incrementally(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    directory = tmp_path / "locations"
+    load_locations(document_path=path, directory=directory)
+
+    with path.open("a") as f:
+        f.write("  - detail of the last task\n- [x] Appended  #0123456789a\n")
+    locations = TaskLocations.load(document_path=path, directory=directory)
+
+    assert locations.update() == 1  # the last task, complete now
+    last_span = locations.find(Hash("abc999"))
+    assert last_span is not None and last_span.lines == 2
+    appended_span = locations.find(Hash("0123456789a"))
+    assert appended_span is not None and appended_span.record.line_number == 7
+
+
+def test_appended_hashes_are_merged(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("src.locations.MIN_MERGED_HASHES", 1)
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    directory = tmp_path / "locations"
+    load_locations(document_path=path, directory=directory)
+
+    locations = TaskLocations.load(document_path=path, directory=directory)
+    assert locations.appended_ids == {}
+    assert len(locations.merged_keys) == 2
+    assert locations.find(Hash("def456")) is not None
+
+
+def test_span_is_checked_before_reading(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    locations = load_locations(document_path=path, directory=tmp_path / "locations")
+    span = locations.find(Hash("abc123"))
+    assert span is not None
+
+    path.write_text(ARCHIVE.replace("  - with details\n", ""))
+
+    assert locations.read_lines(Hash("abc123"), span) is None
+    assert locations.read_lines(Hash("def456"), span) is None
+
+
+def test_find_task_in_wip_and_archive(tmp_path: Path) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text(WIP)
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text(ARCHIVE)
+    compressed_path = tmp_path / "old.md"
+    compressed_path.write_text("- [x] Compressed  #fff000\n")
+    compressed_path = compress_file(compressed_path, compression="gzip")
+
+    def find(hash: str) -> str:
+        found = find_task(
+            hash=Hash(hash),
+            wip_path=wip_path,
+            archive_paths=[archive_path, compressed_path],
+            directory=tmp_path / "locations",
+        )
+        assert found is not None
+        return found.to_str()
+
+    assert find("ccc333") == f"{wip_path}:10\n- [ ] Third  #ccc333"
+    assert find("def456") == f"{archive_path}:3\n- [x] Second task  #g:g2 #def456"
+    assert find("fff000") == f"{compressed_path}:1\n- [x] Compressed  #fff000"
+    assert (
+        find_task(hash=Hash("000000"), wip_path=wip_path, directory=tmp_path / "l")
+        is None
+    )
+
+
+def test_find_task_in_wip_file_edited_in_the_middle(tmp_path: Path) -> None:
+    padding = "- [ ] Padding\n" * 400
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text(padding + WIP + padding + "- [ ] Last\n")
+    directory = tmp_path / "locations"
+    load_locations(document_path=wip_path, directory=directory)
+
+    wip_path.write_text(wip_path.read_text().replace("#bbb222", "#ddd444"))
+    locations = TaskLocations.load(document_path=wip_path, directory=directory)
+    assert not locations.mark.is_valid(wip_path)
+
+    def find(hash: str) -> Optional[int]:
+        found = find_task(hash=Hash(hash), wip_path=wip_path, directory=directory)
+        return None if found is None else found.line_number
+
+    assert find("ddd444") == 406
+    assert find("bbb222") is None
+    assert find("aaa111") == 403
+
+
+def test_missing_task_is_not_searched_again_in_unchanged_wip_file(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text(WIP)
+    directory = tmp_path / "locations"
+    set_task_done(path=wip_path, hash=Hash("aaa111"), done=True, directory=directory)
+
+    def rebuild(self: TaskLocations) -> int:
+        raise AssertionError("Tasks were located from scratch")
+
+    monkeypatch.setattr(TaskLocations, "rebuild", rebuild)
+    assert (
+        find_task(hash=Hash("000000"), wip_path=wip_path, directory=directory) is None
+    )
+
+
+def test_set_task_done_rewrites_task_line_in_place(tmp_path: Path) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text(WIP)
+    directory = tmp_path / "locations"
+
+    found = set_task_done(
+        path=wip_path, hash=Hash("aaa111"), done=True, directory=directory
+    )
+
+    assert found.task.done
+    assert found.line_number == 3
+    assert wip_path.read_text() == WIP.replace("- [ ] First", "- [x] First")
+    locations = TaskLocations.load(document_path=wip_path, directory=directory)
+    assert locations.mark.is_valid(wip_path)
+
+    set_task_done(path=wip_path, hash=Hash("aaa111"), done=False, directory=directory)
+    set_task_done(path=wip_path, hash=Hash("ccc333"), done=True, directory=directory)
+    set_task_done(path=wip_path, hash=Hash("bbb222"), done=True, directory=directory)
+    assert wip_path.read_text() == WIP.replace("- [ ] Third", "- [x] Third")
+
+
+def test_set_task_done_only_rewrites_the_checkbox(tmp_path: Path) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text("- [x] Escape `- [ ] ` in Markdown  #aaa111\n")
+    directory = tmp_path / "locations"
+
+    set_task_done(path=wip_path, hash=Hash("aaa111"), done=True, directory=directory)
+    assert wip_path.read_text() == "- [x] Escape `- [ ] ` in Markdown  #aaa111\n"
+
+    set_task_done(path=wip_path, hash=Hash("aaa111"), done=False, directory=directory)
+    assert wip_path.read_text() == "- [ ] Escape `- [ ] ` in Markdown  #aaa111\n"
+
+
+def test_set_task_done_of_missing_task_fails(tmp_path: Path) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text(WIP)
+    with pytest.raises(ValueError, match="No task with hash '000000'"):
+        set_task_done(
+            path=wip_path,
+            hash=Hash("000000"),
+            done=True,
+            directory=tmp_path / "locations",
+        )
@@ -0,0 +1,107 @@
+import os
+from dataclasses import replace
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from src.passes import (
+    Document,
+    Pass,
+    PassManager,
+    count_touched_items,
+    get_passes,
+    register_pass,
+)
+from src.types import EmptyLine, Item, MarkdownStr, Task, Title
+
+DOCUMENT: MarkdownStr = "\n".join(
+    (
+        "## Backlog",
+        "",
+        "- [ ] Do foo",
+        "- [x] Do bar",
+        "",
+    )
+)
+
+
+def complete_all_tasks(document: Document) -> Document:
+    items = [
+        replace(item, done=True) if isinstance(item, Task) and not item.done else item
+        for item in document.items
+    ]
+    return document.with_items(items)
+
+
+def identity(document: Document) -> Document:
+    return document
+
+
+COMPLETE_ALL_TASKS = Pass(
+    name="complete", function=complete_all_tasks, description="Completing tasks"
+)
+IDENTITY = Pass(name="identity", function=identity, description="Doing nothing")
+
+
+def test_pass_manager_chains_passes_and_writes_once(tmp_path: Path) -> None:
+    path = tmp_path / "wip.md"
+    path.write_text(DOCUMENT)
+
+    result = PassManager([IDENTITY, COMPLETE_ALL_TASKS]).run(path=path)
+
+    assert result.written is True
+    assert path.read_text() == DOCUMENT.replace("- [ ]", "- [x]")
+    assert [report.name for report in result.reports] == ["identity", "complete"]
+    assert [report.items_touched for report in result.reports] == [0, 1]
+
+
+def test_pass_manager_does_not_write_unchanged_file(tmp_path: Path) -> None:
+    path = tmp_path / "wip.md"
+    path.write_text(DOCUMENT.replace("- [ ]", "- [x]"))
+    os.utime(path, ns=(0, 0))
+
+    result = PassManager([COMPLETE_ALL_TASKS]).run(path=path)
+
+    assert result.written is False
+    assert path.stat().st_mtime_ns == 0
+
+
+def test_read_only_passes_must_not_change_the_document(tmp_path: Path) -> None:
+    path = tmp_path / "wip.md"
+    path.write_text(DOCUMENT)
+    read_only_pass = replace(COMPLETE_ALL_TASKS, read_only=True)
+
+    with pytest.raises(ValueError, match="Read-only pass 'complete'"):
+        PassManager([read_only_pass]).run(path=path)
+
+    assert path.read_text() == DOCUMENT
+
+
+def test_count_touched_items() -> None:
+    title = Title(title="foo")
+    before: List[Item] = [title, EmptyLine()]
+    added: List[Item] = [title, EmptyLine(), EmptyLine()]
+    replaced: List[Item] = [Title(title="foo"), EmptyLine()]
+    removed: List[Item] = [EmptyLine()]
+    assert count_touched_items(before, before) == 0
+    assert count_touched_items(before, added) == 1
+    assert count_touched_items(before, replaced) == 1
+    assert count_touched_items(before, removed) == 1
+
+
+def test_passes_are_registered_by_name(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("src.passes.PASSES", {})
+
+    @register_pass("test-identity", description="Doing nothing")
+    def registered_identity(document: Document) -> Document:
+        return document
+
+    (registered_pass,) = get_passes(["test-identity"])
+    assert registered_pass.function is registered_identity
+
+    with pytest.raises(ValueError, match="already a pass"):
+        register_pass("test-identity", description="Again")(identity)
+
+    with pytest.raises(ValueError, match="Unknown pass"):
+        get_passes(["unknown"])
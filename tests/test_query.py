@@ -0,0 +1,111 @@
+import datetime
+from typing import List
+
+import pytest
+
+from src.interpreter import parse_document
+from src.query import (
+    And,
+    DoneTerm,
+    Not,
+    TagTerm,
+    TaskIndex,
+    bitmap_from_positions,
+    iter_positions,
+    parse_query,
+)
+from src.types import Tag, Task
+
+DOCUMENT = "\n".join(
+    (
+        "- [ ] First  #g:infra #p:low #d:2022-01-10",
+        "",
+        "## Title",
+        "",
+        "- [x] Second  #g:infra #d:2022-01-20",
+        "- [ ] Third  #g:ops",
+        "  - detail",
+        "- [ ] Fourth  #g:infra #d:2022-01-30",
+    )
+)
+
+
+@pytest.fixture
+def index() -> TaskIndex:
+    tasks = [item for item in parse_document(DOCUMENT) if isinstance(item, Task)]
+    return TaskIndex(tasks)
+
+
+def select(index: TaskIndex, raw_query: str) -> List[str]:
+    return [task.description for task in index.select(parse_query(raw_query))]
+
+
+@pytest.mark.parametrize(
+    ("raw_query", "expected"),
+    (
+        pytest.param("g:infra", ["First", "Second", "Fourth"], id="tag"),
+        pytest.param("g:infra AND NOT p:low", ["Second", "Fourth"], id="and_not"),
+        pytest.param("g:infra not p:low undone", ["Fourth"], id="implicit_and"),
+        pytest.param("g:ops OR p:low", ["First", "Third"], id="or"),
+        pytest.param("NOT (g:ops OR done)", ["First", "Fourth"], id="parentheses"),
+        pytest.param("g:ops OR p:low AND done", ["Third"], id="and_before_or"),
+        pytest.param("before:2022-01-20", ["First"], id="before"),
+        pytest.param("after:2022-01-20", ["Fourth"], id="after"),
+        pytest.param(
+            "after:2021-12-31 before:2022-01-31",
+            ["First", "Second", "Fourth"],
+            id="between",
+        ),
+        pytest.param("g:unknown", [], id="unknown_tag"),
+    ),
+)
+def test_select(index: TaskIndex, raw_query: str, expected: List[str]) -> None:
+    assert select(index, raw_query) == expected
+
+    query = parse_query(raw_query)
+    matching = [task.description for task in index.tasks if query.matches(task)]
+    assert matching == expected
+
+
+def test_parse_query() -> None:
+    assert parse_query("g:infra AND NOT done") == And(
+        operands=[
+            TagTerm(tag=Tag(type="g", value="infra")),
+            Not(operand=DoneTerm(done=True)),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    ("raw_query", "error"),
+    (
+        ("", "Empty query"),
+        ("g:infra AND", "Unexpected end"),
+        ("(g:infra", "Unexpected end"),
+        ("g:infra)", r"Unexpected '\)'"),
+        ("OR g:infra", "Unexpected 'OR'"),
+        ("infra", "Expected a tag"),
+        ("before:yesterday", "Expected a date"),
+    ),
+)
+def test_invalid_queries(raw_query: str, error: str) -> None:
+    with pytest.raises(ValueError, match=error):
+        parse_query(raw_query)
+
+
+def test_bitmaps() -> None:
+    positions = [0, 7, 8, 63, 64, 1000]
+
+    bitmap = bitmap_from_positions(positions, size=1001)
+
+    assert bitmap == sum(1 << position for position in positions)
+    assert list(iter_positions(bitmap)) == positions
+    assert list(iter_positions(0)) == []
+
+
+def test_deadline_index(index: TaskIndex) -> None:
+    assert index.deadlines == [
+        datetime.date(2022, 1, 10),
+        datetime.date(2022, 1, 20),
+        datetime.date(2022, 1, 30),
+    ]
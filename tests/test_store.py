@@ -0,0 +1,78 @@
+import datetime
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from src.cli.clean import archive_completed_tasks
+from src.hash import Hash
+from src.interpreter import parse_document
+from src.store import TaskStore
+from src.types import Tag, Task
+from tests.test_index import ARCHIVE
+
+
+def parse_tasks(raw: str) -> List[Task]:
+    return [item for item in parse_document(raw) if isinstance(item, Task)]
+
+
+def test_stored_tasks_are_read_back(tmp_path: Path) -> None:
+    tasks = parse_tasks(ARCHIVE)
+    with TaskStore(path=tmp_path / "archive.sqlite") as store:
+        assert store.add_tasks(tasks) == 3
+
+    with TaskStore(path=tmp_path / "archive.sqlite") as store:
+        assert len(store) == 3
+        assert store.search() == tasks
+
+
+def test_search(tmp_path: Path) -> None:
+    with TaskStore(path=tmp_path / "archive.sqlite") as store:
+        store.add_tasks(parse_tasks(ARCHIVE))
+
+        def descriptions(tasks: List[Task]) -> List[str]:
+            return [task.description for task in tasks]
+
+        assert descriptions(store.search("task")) == ["Second task", "Third task"]
+        assert descriptions(store.search("details")) == ["Café with ünïcödé"]
+        assert descriptions(store.search("task NOT third")) == ["Second task"]
+        assert descriptions(store.search(hash=Hash("def456"))) == ["Second task"]
+        assert descriptions(
+            store.search(tags=[Tag(type="g", value="g1"), Tag(type="p", value="low")])
+        ) == ["Third task"]
+        assert descriptions(
+            store.search("task", deadline=datetime.date(2022, 1, 31))
+        ) == ["Second task"]
+        assert descriptions(store.search(limit=1)) == ["Café with ünïcödé"]
+
+        with pytest.raises(ValueError, match="Invalid search"):
+            store.search("task AND")
+
+
+def test_load_archive_replaces_stored_tasks(tmp_path: Path) -> None:
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text(ARCHIVE)
+    with TaskStore(path=tmp_path / "archive.sqlite") as store:
+        store.add_tasks(parse_tasks("- [x] Stale task"))
+
+        assert store.load_archive([archive_path]) == 3
+
+        assert store.search() == parse_tasks(ARCHIVE)
+        assert store.search("stale") == []
+
+
+def test_clean_stores_archived_tasks(tmp_path: Path) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text("- [x] Done task  #g:g1\n- [ ] Pending task\n")
+
+    with TaskStore(path=tmp_path / "archive.sqlite") as store:
+        archive_completed_tasks(
+            path=wip_path, archive_path=tmp_path / "archive.md", store=store
+        )
+
+        (task,) = store.search("done")
+        assert task.to_str() == "- [x] Done task  #g:g1"
+        (archived_at,) = store.connection.execute(
+            "SELECT archived_at FROM tasks"
+        ).fetchone()
+        assert archived_at.startswith(datetime.date.today().isoformat())
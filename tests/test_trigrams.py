@@ -0,0 +1,157 @@
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from src.cli.grep import grep_tasks
+from src.io import compress_file
+from src.trigrams import TrigramIndex, load_trigram_index, trigrams
+
+ARCHIVE = "\n".join(
+    (
+        "- [x] Fix flaky test  #g:ci #abc123",
+        "  - the test was flaky because of timezones",
+        "- [x] Deploy staging  #g:infra #def456",
+        "- [x] Remove flaky retries  #g:ci",
+        "",
+    )
+)
+
+
+def descriptions(
+    paths: List[Path], text: str, tmp_path: Path, wip_path: Optional[Path] = None
+) -> List[str]:
+    matches = grep_tasks(
+        text=text,
+        wip_path=wip_path,
+        archive_paths=paths,
+        directory=tmp_path / "trigrams",
+    )
+    return [match.task.description for match in matches]
+
+
+def test_trigrams() -> None:
+    assert trigrams("flaky") == {"fla", "lak", "aky"}
+    assert trigrams("ci") == set()
+
+
+def test_grep_ranks_matching_tasks(tmp_path: Path) -> None:
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text("## Title\n\n- [ ] Investigate flaky deploy\n")
+    archive_path = tmp_path / "archive.md"
+    archive_path.write_text(ARCHIVE)
+    paths = [archive_path]
+
+    def grep(text: str) -> List[str]:
+        return descriptions(paths, text, tmp_path, wip_path=wip_path)
+
+    assert grep("flaky") == [
+        "Fix flaky test",
+        "Investigate flaky deploy",
+        "Remove flaky retries",
+    ]
+    assert grep("FLAKY deploy") == ["Investigate flaky deploy"]
+    assert grep("timezones") == ["Fix flaky test"]
+    assert grep("unknown") == []
+    assert grep("ci") == []  # tags are not searched
+
+    (match, *_) = grep_tasks(
+        text="test", archive_paths=paths, directory=tmp_path / "trigrams"
+    )
+    assert match.to_str() == f"{archive_path}:1: - [x] Fix flaky test  #g:ci #abc123"
+
+
+def test_index_is_updated_incrementally(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    directory = tmp_path / "trigrams"
+    assert len(load_trigram_index(document_path=path, directory=directory)) == 3
+
+    with path.open("a") as f:
+        f.write("- [x] Appended task\n")
+    index = TrigramIndex.load(document_path=path, directory=directory)
+
+    assert index.update() == 1  # the appended task is read next time
+    assert len(index) == 4
+    (record,) = index.find_candidates(["appended"])
+    assert record.line_number == 5
+
+
+def test_details_appended_to_last_task_are_indexed(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text("- [x] First\n- [x] Second\n")
+    directory = tmp_path / "trigrams"
+    load_trigram_index(document_path=path, directory=directory)
+
+    with path.open("a") as f:
+        f.write("  - late detail\n")
+
+    assert descriptions([path], "late", tmp_path) == ["Second"]
+
+
+def test_index_is_rebuilt_if_file_changes(tmp_path: Path) -> None:
+    path = tmp_path / "WIP.md"
+    path.write_text(ARCHIVE)
+    load_trigram_index(document_path=path, directory=tmp_path / "trigrams")
+
+    path.write_text(ARCHIVE.replace("Deploy staging", "Deploy production"))
+
+    assert descriptions([path], "staging", tmp_path) == []
+    assert descriptions([path], "production", tmp_path) == ["Deploy production"]
+
+
+def test_wip_file_edited_in_the_middle_is_read_again(tmp_path: Path) -> None:
+    # Edits in the middle of long files are not noticed by append-only indexes
+    padding = "- [ ] Padding\n" * 1000
+    wip_path = tmp_path / "WIP.md"
+    wip_path.write_text(f"{padding}- [ ] call the plumber\n{padding}")
+    directory = tmp_path / "trigrams"
+    assert descriptions([], "plumber", tmp_path, wip_path=wip_path) == [
+        "call the plumber"
+    ]
+    assert not TrigramIndex(document_path=wip_path, directory=directory).path.exists()
+
+    wip_path.write_text(
+        wip_path.read_text().replace("call the plumber", "fix the printers")
+    )
+
+    assert descriptions([], "plumber", tmp_path, wip_path=wip_path) == []
+    assert descriptions([], "printers", tmp_path, wip_path=wip_path) == [
+        "fix the printers"
+    ]
+
+
+def test_compressed_files_are_scanned(tmp_path: Path) -> None:
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    compressed_path = compress_file(path, compression="gzip")
+
+    matches = grep_tasks(text="deploy", archive_paths=[compressed_path])
+
+    assert [(match.line_number, match.task.hash) for match in matches] == [
+        (3, "def456")
+    ]
+
+
+def test_appended_postings_are_merged(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("src.trigrams.MIN_MERGED_TASKS", 0)
+    path = tmp_path / "archive.md"
+    path.write_text(ARCHIVE)
+    directory = tmp_path / "trigrams"
+    load_trigram_index(document_path=path, directory=directory)
+    with path.open("a") as f:
+        f.write("- [x] Another flaky task\n\n")
+
+    index = load_trigram_index(document_path=path, directory=directory)
+
+    assert index.merged_size == 4
+    assert [path.name for path in directory.glob("*.postings")] == [
+        index.postings_path(index.generation).name
+    ]
+    assert descriptions([path], "flaky", tmp_path) == [
+        "Fix flaky test",
+        "Remove flaky retries",
+        "Another flaky task",
+    ]
@@ -0,0 +1,67 @@
+import difflib
+from typing import List
+
+import pytest
+
+from src.validation import DiffLine, validate_round_trip
+
+ORIGINAL = "\n".join(
+    (
+        "## Backlog",
+        "",
+        "- [ ] Do foo #g:group1",
+        "- [ ] Do bar  #p:high",
+        "  - Some details",
+        "- [ ] Do baz  #g:group1",
+        "",
+    )
+)
+
+
+def differ_diff(original: str, parsed: str) -> List[DiffLine]:
+    """Previous implementation, kept as a reference."""
+    raw_diff = difflib.Differ().compare(original.split("\n"), parsed.split("\n"))
+    numbered_diff = ((i, line) for i, line in enumerate(raw_diff))
+    return [(i, line) for i, line in numbered_diff if not line.startswith("  ")]
+
+
+def test_identical_documents_are_valid():
+    report = validate_round_trip(ORIGINAL, ORIGINAL)
+    assert report.is_valid
+    assert report.diff == []
+    assert report.truncated is False
+
+
+@pytest.mark.parametrize(
+    "parsed",
+    (
+        pytest.param(
+            ORIGINAL.replace(" #g:group1\n", "  #g:group1\n", 1), id="one-line"
+        ),
+        pytest.param(ORIGINAL.replace(" #g:", "  #g:"), id="several-lines"),
+        pytest.param(ORIGINAL.replace("## Backlog", "## Tasks"), id="first-line"),
+        pytest.param(ORIGINAL + "\n", id="added-line"),
+        pytest.param(ORIGINAL.replace("  - Some details\n", ""), id="removed-line"),
+    ),
+)
+def test_diff_matches_reference_implementation(parsed: str) -> None:
+    report = validate_round_trip(ORIGINAL, parsed)
+    assert report.is_valid is False
+    assert report.diff == differ_diff(ORIGINAL, parsed)
+
+
+def test_diff_is_capped():
+    original = "\n".join(f"- [ ] Task {i} #g:g1" for i in range(100))
+    parsed = original.replace(" #g:", "  #g:")
+
+    report = validate_round_trip(original, parsed, max_diffs=5)
+
+    assert report.truncated is True
+    assert report.diff == differ_diff(original, parsed)[:5]
+
+
+def test_diff_is_not_truncated_below_the_cap():
+    parsed = ORIGINAL.replace("## Backlog", "## Tasks")
+    report = validate_round_trip(ORIGINAL, parsed, max_diffs=100)
+    assert report.truncated is False
+    assert report.diff == differ_diff(ORIGINAL, parsed)